@@ -1,39 +1,53 @@
 from .core import CapitalSelector, Channel
 from .builder import CapitalSelectorBuilder
+from .batch import BatchedCapitalSelector
+from .history import HistoryRecorder
 from .rebirth import RebirthPolicy, SwitchTypePolicy, SedimentAwareRebirthPolicy
-from .reweight import exp_reweight, simplex_normalize
+from .reweight import exp_reweight, simplex_normalize, ReweightOperator, ExpReweight
 from .stats import EWMAStats
-from .channels import DummyChannel, GaussianExplorer, TailRiskExplorer, DeterministicExplorer
-from .broker import Broker, BrokerConfig, CreditPolicy, PhaseCChannel, LegacyChannelAdapter
-from .stack import StackChannel, StackManager, StackConfig, StackFormationThresholds
+from .channels import DummyChannel, GaussianExplorer, TailRiskExplorer, DeterministicExplorer, DeterministicExplorerBank, BankedExplorer
+from .quantiles import QuantileBank
+from .broker import Broker, BrokerConfig, CreditPolicy, PolicySnapshot, PhaseCChannel, LegacyChannelAdapter
+from .sharded import ShardedBroker
+from .stack import StackBank, StackChannel, StackManager, StackConfig, StackFormationThresholds
 from .sediment import SedimentDAG, SedimentNode
 
 __all__ = [
     "CapitalSelector",
     "Channel",
     "CapitalSelectorBuilder",
+    "BatchedCapitalSelector",
+    "HistoryRecorder",
     "RebirthPolicy",
     "SwitchTypePolicy",
     "SedimentAwareRebirthPolicy",
     "exp_reweight",
     "simplex_normalize",
+    "ReweightOperator",
+    "ExpReweight",
     "EWMAStats",
     "DummyChannel",
     # Phase C
     "PhaseCChannel",
     "LegacyChannelAdapter",
     "CreditPolicy",
+    "PolicySnapshot",
+    "QuantileBank",
     "BrokerConfig",
     "Broker",
+    "ShardedBroker",
     "StackConfig",
     "StackFormationThresholds",
     "StackChannel",
+    "StackBank",
     "StackManager",
     "SedimentDAG",
     "SedimentNode",
     "GaussianExplorer",
     "TailRiskExplorer",
     "DeterministicExplorer",
+    "DeterministicExplorerBank",
+    "BankedExplorer",
     "RepairPolicy",
     "RepairPolicySet",
     "RepairContext",
@@ -46,3 +60,29 @@ __all__ = [
 ]
 from .repair import RepairPolicy, RepairPolicySet, RepairContext, CapsPolicy, LagPolicy, SoftBailoutPolicy, IsolationPolicy, simplex_renorm
 from .telemetry import TelemetryLogger
+
+# Tensor backend: resolved on first attribute access so that importing the
+# package (CPU-only use) never imports torch. Kept out of __all__ on purpose.
+_LAZY_ATTRS = {
+    "CudaCore": ".cuda_impl",
+    "DeviceState": ".cuda_state",
+    "CudaState": ".cuda_state",
+    "to_device_state": ".cuda_state",
+    "to_device_state_batch": ".cuda_state",
+    "from_device_state": ".cuda_state",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
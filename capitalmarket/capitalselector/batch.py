@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+from typing import Sequence
+import numpy as np
+
+from .core import CapitalSelector
+from .builder import CapitalSelectorBuilder
+from .rebirth import RebirthPolicy
+from .reweight import ExpReweight
+
+
+def _lane_param(val, B: int, name: str) -> np.ndarray:
+    arr = np.array(val, dtype=float)
+    if arr.ndim == 0:
+        arr = np.full(B, float(arr))
+    if arr.shape != (B,):
+        raise ValueError(f"{name} must be a scalar or have shape ({B},)")
+    return arr
+
+
+class BatchedCapitalSelector:
+    """B independent CapitalSelectors stepped as one struct-of-arrays.
+
+    Lane b reproduces `CapitalSelector.feedback_vector` (EWMAStats update,
+    exponentiated-gradient reweight, rebirth, invariants) of a builder-made
+    selector with eta[b], beta[b] and rebirth_threshold[b] exactly.
+
+    State layout (batch-first):
+    - w: (B, K)
+    - wealth, mu, var, dd, cum_pi, peak_cum_pi: (B,)
+    """
+
+    def __init__(
+        self,
+        *,
+        weights: np.ndarray,
+        wealth,
+        rebirth_threshold,
+        beta,
+        eta,
+        seed_var=1.0,
+        kinds: Sequence[str] | None = None,
+        rebirth_policies: Sequence[RebirthPolicy | None] | None = None,
+    ):
+        w = np.array(weights, dtype=float)
+        if w.ndim != 2 or w.shape[1] == 0:
+            raise ValueError("weights must have shape (B, K) with K >= 1")
+        self.B, self.K = w.shape
+        B = self.B
+
+        self.w = w
+        self.wealth = _lane_param(wealth, B, "wealth")
+        self.rebirth_threshold = _lane_param(rebirth_threshold, B, "rebirth_threshold")
+        self.beta = _lane_param(beta, B, "beta")
+        self.eta = _lane_param(eta, B, "eta")
+        self.seed_var = _lane_param(seed_var, B, "seed_var")
+
+        self.mu = np.zeros(B)
+        self.var = self.seed_var.copy()
+        self.dd = np.zeros(B)
+        self.cum_pi = np.zeros(B)
+        self.peak_cum_pi = np.zeros(B)
+
+        self._last_r = np.zeros(B)
+        self._last_c = np.zeros(B)
+
+        self.kinds = list(kinds) if kinds is not None else ["entrepreneur"] * B
+        self.rebirth_policies = list(rebirth_policies) if rebirth_policies is not None else [None] * B
+        if len(self.kinds) != B or len(self.rebirth_policies) != B:
+            raise ValueError("kinds and rebirth_policies must have one entry per lane")
+
+    @property
+    def reweight_fn(self) -> ExpReweight:
+        """The lanes' reweight operator, with eta as a (B, 1) column."""
+        return ExpReweight(self.eta[:, None])
+
+    # ---------- Conversion ----------
+
+    @classmethod
+    def from_selectors(cls, selectors: Sequence[CapitalSelector]) -> "BatchedCapitalSelector":
+        """Stack per-object selectors (same K, ExpReweight) into one batch."""
+        if len(selectors) == 0:
+            raise ValueError("Need at least one selector")
+        for s in selectors:
+            if s.w is None:
+                raise ValueError("selector.w must be initialized before batching")
+        if not all(isinstance(s.reweight_fn, ExpReweight) for s in selectors):
+            raise ValueError("Batching requires ExpReweight operators")
+        if any(getattr(s, "log_weights", False) for s in selectors):
+            raise ValueError("Log-domain selectors cannot be batched")
+        if len({len(s.w) for s in selectors}) != 1:
+            raise ValueError("All selectors must share the same K")
+
+        batch = cls(
+            weights=np.stack([np.asarray(s.w, dtype=float) for s in selectors]),
+            wealth=[s.wealth for s in selectors],
+            rebirth_threshold=[s.rebirth_threshold for s in selectors],
+            beta=[s.stats.beta for s in selectors],
+            eta=[s.reweight_fn.eta for s in selectors],
+            seed_var=[s.stats.seed_var for s in selectors],
+            kinds=[s.kind for s in selectors],
+            rebirth_policies=[s.rebirth_policy for s in selectors],
+        )
+        batch.mu[:] = [s.stats.mu for s in selectors]
+        batch.var[:] = [s.stats.var for s in selectors]
+        batch.dd[:] = [s.stats.dd for s in selectors]
+        batch.cum_pi[:] = [s.stats.cum_pi for s in selectors]
+        batch.peak_cum_pi[:] = [s.stats.peak_cum_pi for s in selectors]
+        batch._last_r[:] = [s._last_r for s in selectors]
+        batch._last_c[:] = [s._last_c for s in selectors]
+        return batch
+
+    def lane(self, b: int) -> CapitalSelector:
+        """Materialize lane b as a fresh builder-made CapitalSelector."""
+        selector = (
+            CapitalSelectorBuilder()
+            .with_K(self.K)
+            .with_initial_wealth(self.wealth[b])
+            .with_rebirth_threshold(self.rebirth_threshold[b])
+            .with_stats(self.beta[b])
+            .with_reweight_eta(self.eta[b])
+            .with_kind(self.kinds[b])
+            .build()
+        )
+        selector.rebirth_policy = self.rebirth_policies[b]
+        self._write_lane(b, selector)
+        return selector
+
+    def to_selectors(self, selectors: Sequence[CapitalSelector] | None = None) -> list[CapitalSelector]:
+        """Export lanes to per-object selectors.
+
+        If `selectors` is given, their state is overwritten in place (channels
+        and reweight_fn are kept); otherwise fresh selectors are built.
+        """
+        if selectors is None:
+            return [self.lane(b) for b in range(self.B)]
+        if len(selectors) != self.B:
+            raise ValueError("Need exactly one selector per lane")
+        for b, s in enumerate(selectors):
+            self._write_lane(b, s)
+        return list(selectors)
+
+    def _write_lane(self, b: int, selector: CapitalSelector) -> None:
+        selector.wealth = float(self.wealth[b])
+        selector.rebirth_threshold = float(self.rebirth_threshold[b])
+        selector.kind = self.kinds[b]
+        selector.w = self.w[b].copy()
+        selector.K = self.K
+        selector._last_r = float(self._last_r[b])
+        selector._last_c = float(self._last_c[b])
+        st = selector.stats
+        st.beta = float(self.beta[b])
+        st.seed_var = float(self.seed_var[b])
+        st.mu = float(self.mu[b])
+        st.var = float(self.var[b])
+        st.dd = float(self.dd[b])
+        st.cum_pi = float(self.cum_pi[b])
+        st.peak_cum_pi = float(self.peak_cum_pi[b])
+
+    def _read_lane(self, b: int, selector: CapitalSelector) -> None:
+        self.wealth[b] = selector.wealth
+        self.kinds[b] = selector.kind
+        self.w[b] = selector.w
+        st = selector.stats
+        self.mu[b] = st.mu
+        self.var[b] = st.var
+        self.dd[b] = st.dd
+        self.cum_pi[b] = st.cum_pi
+        self.peak_cum_pi[b] = st.peak_cum_pi
+
+    # ---------- Feedback ----------
+
+    def feedback_batch(self, r: np.ndarray, c, freeze: bool = False) -> np.ndarray:
+        """Batched `feedback_vector`: r has shape (B, K), c shape (B,).
+
+        Returns the boolean rebirth mask of this step (shape (B,)).
+        """
+        r = np.asarray(r, dtype=float)
+        if r.shape != (self.B, self.K):
+            raise ValueError(f"r must have shape ({self.B}, {self.K})")
+        c = np.broadcast_to(np.asarray(c, dtype=float), (self.B,))
+
+        if freeze:
+            self._enforce_invariants()
+            return np.zeros(self.B, dtype=bool)
+
+        r_total = r.sum(axis=1)
+        self._last_r = r_total
+        self._last_c = c.copy()
+        self.wealth += r_total - c
+
+        # compute_pi (Profile A)
+        pi_total = r_total - c
+        pi_vec = r - self.w * c[:, None]
+
+        # EWMAStats.update
+        beta = self.beta
+        mu_new = (1 - beta) * self.mu + beta * pi_total
+        var_new = (1 - beta) * self.var + beta * (pi_total - self.mu) ** 2
+        self.mu = mu_new
+        self.var = np.maximum(var_new, 0.0)
+        self.cum_pi += pi_total
+        self.peak_cum_pi = np.maximum(self.peak_cum_pi, self.cum_pi)
+        self.dd = self.peak_cum_pi - self.cum_pi
+
+        adv = pi_vec - self.mu[:, None]
+        self.w = self.reweight_fn.apply_batch(self.w, adv)
+
+        reborn = self.wealth < self.rebirth_threshold
+        if reborn.any():
+            self._rebirth(np.flatnonzero(reborn))
+
+        self._enforce_invariants()
+        return reborn
+
+    def _rebirth(self, idx: np.ndarray) -> None:
+        for b in idx:
+            policy = self.rebirth_policies[b]
+            if policy is not None:
+                # policies act on the object API; round-trip this lane only
+                sel = self.lane(int(b))
+                policy.on_rebirth(sel)
+                self._read_lane(int(b), sel)
+
+        self.wealth[idx] = np.maximum(self.wealth[idx], self.rebirth_threshold[idx])
+        self.w[idx] = np.ones(self.K) / self.K
+        self.mu[idx] = 0.0
+        self.var[idx] = self.seed_var[idx]
+        self.dd[idx] = 0.0
+        self.cum_pi[idx] = 0.0
+        self.peak_cum_pi[idx] = 0.0
+
+    def _enforce_invariants(self) -> None:
+        self.w = self._simplex_normalize(self.w)
+
+    def _simplex_normalize(self, w: np.ndarray) -> np.ndarray:
+        """Row-wise `simplex_normalize` (uniform fallback on zero rows)."""
+        w = np.clip(w, 0.0, None)
+        s = w.sum(axis=1)
+        zero = s == 0
+        if zero.any():
+            w[zero] = np.ones(self.K) / self.K
+            s[zero] = 1.0
+        return w / s[:, None]
+
+    # ---------- Introspection ----------
+
+    def state(self):
+        return {
+            "wealth": self.wealth.copy(),
+            "kind": list(self.kinds),
+            "mu": self.mu.copy(),
+            "var": self.var.copy(),
+            "dd": self.dd.copy(),
+            "cum_pi": self.cum_pi.copy(),
+            "peak_cum_pi": self.peak_cum_pi.copy(),
+            "weights": self.w.copy(),
+        }
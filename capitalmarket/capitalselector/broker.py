@@ -1,12 +1,18 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Dict, Optional, Tuple, Iterable
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Iterable
+import heapq
+import json
 import math
+import weakref
 import numpy as np
 
 from .stats import EWMAStats
+from .quantiles import QuantileBank
 
 
 # -----------------------------
@@ -51,6 +57,74 @@ class CreditPolicy:
     blocked: bool = False
 
 
+class _ReadOnlyDict(Mapping):
+    """Read-only Mapping over a dict it owns (unlike MappingProxyType, copyable)."""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return repr(self._data)
+
+
+class _ReadOnlyCreditPolicy(CreditPolicy):
+    """CreditPolicy handed out by PolicySnapshot; assignments raise."""
+
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            raise AttributeError("PolicySnapshot entries are read-only; use to_dict() for an editable copy")
+        super().__setattr__(name, value)
+
+
+class PolicySnapshot(Mapping):
+    """Read-only id -> CreditPolicy mapping over copied policy columns.
+
+    CreditPolicy objects are built on access only and reject assignments;
+    `to_dict()` returns a plain dict of editable copies.
+    """
+
+    def __init__(self, ids: List[str], limit: np.ndarray, min_interval: np.ndarray, blocked: np.ndarray):
+        # ids is the broker's append-only id list; only the first n are ours
+        self._ids = ids
+        self._n = len(limit)
+        self._index: Optional[Dict[str, int]] = None
+        self.limit = limit
+        self.min_interval = min_interval
+        self.blocked = blocked
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __iter__(self):
+        return iter(self._ids[: self._n])
+
+    def __getitem__(self, explorer_id: str) -> CreditPolicy:
+        if self._index is None:
+            self._index = {eid: i for i, eid in enumerate(self._ids[: self._n])}
+        i = self._index[explorer_id]
+        return _ReadOnlyCreditPolicy(float(self.limit[i]), float(self.min_interval[i]), bool(self.blocked[i]))
+
+    def to_dict(self) -> Dict[str, CreditPolicy]:
+        """Plain id -> CreditPolicy dict (copies; edits do not write back)."""
+        return {
+            eid: CreditPolicy(limit, min_interval, blocked)
+            for eid, limit, min_interval, blocked in zip(
+                self._ids[: self._n], self.limit.tolist(), self.min_interval.tolist(), self.blocked.tolist()
+            )
+        }
+
+
 # -----------------------------
 # EWMA helpers
 # -----------------------------
@@ -98,6 +172,167 @@ class EWMACov:
         return self.cov
 
 
+class _ActiveSet:
+    """Id -> slot map of the explorers taking part in correlation tracking."""
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def slots(self, explorer_ids: Iterable[str]) -> np.ndarray:
+        """Slots for ids; new ids are appended."""
+        out = []
+        for eid in explorer_ids:
+            slot = self.index.get(eid)
+            if slot is None:
+                slot = self.index[eid] = len(self.ids)
+                self.ids.append(eid)
+            out.append(slot)
+        return np.asarray(out, dtype=np.intp)
+
+    def lookup(self, explorer_ids: Iterable[str]) -> np.ndarray:
+        """Slots for ids, -1 for ids outside the set."""
+        return np.array([self.index.get(eid, -1) for eid in explorer_ids], dtype=np.intp)
+
+    def remove(self, explorer_ids: Iterable[str]) -> Optional[np.ndarray]:
+        """Drop ids and renumber; returns the old slots of the kept ids (or None)."""
+        drop = set(explorer_ids)
+        keep_ids = [eid for eid in self.ids if eid not in drop]
+        if len(keep_ids) == len(self.ids):
+            return None
+        keep = np.asarray([self.index[eid] for eid in keep_ids], dtype=np.intp)
+        self.ids = keep_ids
+        self.index = {eid: i for i, eid in enumerate(keep_ids)}
+        return keep
+
+
+class DenseCovariance:
+    """Exact EWMA covariance of centred returns over the active set.
+
+    One rank-1 step per update: C[S, S] <- (1 - beta) C[S, S] + beta outer(x, x).
+    Symmetric, so (a, b) and (b, a) share one entry. O(n^2) memory.
+    """
+
+    def __init__(self, beta: float):
+        self.beta = float(beta)
+        self.active = _ActiveSet()
+        self.cov = np.zeros((0, 0))
+
+    def update(self, explorer_ids: List[str], x: np.ndarray):
+        slots = self.active.slots(explorer_ids)
+        m, cap = len(self.active.ids), len(self.cov)
+        if m > cap:
+            new_cap = max(m, 2 * cap, 16)
+            grown = np.zeros((new_cap, new_cap))
+            grown[:cap, :cap] = self.cov
+            self.cov = grown
+        sub = np.ix_(slots, slots)
+        self.cov[sub] = (1 - self.beta) * self.cov[sub] + self.beta * np.outer(x, x)
+
+    def drop(self, explorer_ids: Iterable[str]):
+        keep = self.active.remove(explorer_ids)
+        if keep is None:
+            return
+        cov = np.zeros_like(self.cov)
+        cov[: len(keep), : len(keep)] = self.cov[np.ix_(keep, keep)]
+        self.cov = cov
+
+    def state(self) -> Dict[str, np.ndarray]:
+        m = len(self.active.ids)
+        return {"ids": np.array(self.active.ids, dtype=str), "cov": self.cov[:m, :m]}
+
+    def restore(self, state: Dict[str, np.ndarray]):
+        self.active = _ActiveSet()
+        self.active.slots(state["ids"].tolist())
+        self.cov = np.array(state["cov"], dtype=float)
+
+    def pair(self, a: str, b: str) -> Optional[float]:
+        sa, sb = self.active.index.get(a), self.active.index.get(b)
+        if sa is None or sb is None:
+            return None
+        return float(self.cov[sa, sb])
+
+    def block(self, slots_a: np.ndarray, slots_b: np.ndarray) -> np.ndarray:
+        return self.cov[np.ix_(slots_a, slots_b)]
+
+
+class SketchCovariance:
+    """Random-projection sketch of the EWMA covariance (approximate mode).
+
+    Every active explorer keeps a `dim`-vector s_i; an update with centred
+    returns x draws z ~ N(0, I / dim) and sets
+    s_i <- sqrt(1 - beta) s_i + sqrt(beta) x_i z   (i in S),
+    so that E[s_a . s_b] equals the exact EWMA covariance for a fixed active
+    set. The per-pair standard error is about |s_a| |s_b| / sqrt(dim).
+    O(n * dim) memory and O(|S| * dim) per update.
+
+    Decay is per explorer, not per pair: an update ages every row in S, so
+    s_a . s_b shrinks by sqrt(1 - beta) for each update that includes only
+    one of a and b, where the exact tracker leaves that pair unchanged.
+    With varying active sets rho is therefore biased toward 0 for pairs that
+    are rarely updated together; `error_estimate` does not cover this.
+    """
+
+    def __init__(self, beta: float, dim: int, seed: int = 0):
+        if int(dim) < 1:
+            raise ValueError("sketch dim must be >= 1")
+        self.beta = float(beta)
+        self.dim = int(dim)
+        self._rng = np.random.default_rng(int(seed))
+        self.active = _ActiveSet()
+        self.sketch = np.zeros((0, self.dim))
+
+    def update(self, explorer_ids: List[str], x: np.ndarray):
+        slots = self.active.slots(explorer_ids)
+        m, cap = len(self.active.ids), len(self.sketch)
+        if m > cap:
+            grown = np.zeros((max(m, 2 * cap, 16), self.dim))
+            grown[:cap] = self.sketch
+            self.sketch = grown
+        z = self._rng.standard_normal(self.dim) / math.sqrt(self.dim)
+        self.sketch[slots] = math.sqrt(1 - self.beta) * self.sketch[slots] + math.sqrt(self.beta) * np.outer(x, z)
+
+    def drop(self, explorer_ids: Iterable[str]):
+        keep = self.active.remove(explorer_ids)
+        if keep is None:
+            return
+        sketch = np.zeros_like(self.sketch)
+        sketch[: len(keep)] = self.sketch[keep]
+        self.sketch = sketch
+
+    def state(self) -> Dict[str, np.ndarray]:
+        m = len(self.active.ids)
+        return {
+            "ids": np.array(self.active.ids, dtype=str),
+            "sketch": self.sketch[:m],
+            "rng": np.array(json.dumps(self._rng.bit_generator.state)),
+        }
+
+    def restore(self, state: Dict[str, np.ndarray]):
+        self.active = _ActiveSet()
+        self.active.slots(state["ids"].tolist())
+        self.sketch = np.array(state["sketch"], dtype=float).reshape(-1, self.dim)
+        self._rng.bit_generator.state = json.loads(str(state["rng"]))
+
+    def pair(self, a: str, b: str) -> Optional[float]:
+        sa, sb = self.active.index.get(a), self.active.index.get(b)
+        if sa is None or sb is None:
+            return None
+        return float(self.sketch[sa] @ self.sketch[sb])
+
+    def block(self, slots_a: np.ndarray, slots_b: np.ndarray) -> np.ndarray:
+        return self.sketch[slots_a] @ self.sketch[slots_b].T
+
+    def error_estimate(self, slots: np.ndarray) -> np.ndarray:
+        """A-priori per-pair standard error |s_a| |s_b| / sqrt(dim).
+
+        Only the projection noise; not the decay bias of pairs that are not
+        updated together (see the class docstring).
+        """
+        norms = np.linalg.norm(self.sketch[slots], axis=1)
+        return np.outer(norms, norms) / math.sqrt(self.dim)
+
+
 # -----------------------------
 # Broker (Inhibitor)
 # -----------------------------
@@ -132,6 +367,20 @@ class BrokerConfig:
     base_min_interval: float = 0.0
     cooldown_factor: float = 1.0
 
+    # correlation tracking: "exact" (dense matrix) or "sketch" (random projection)
+    corr_mode: str = "exact"
+    corr_sketch_dim: int = 64
+    corr_sketch_seed: int = 0
+    # sketch mode: track the first N active ids exactly as well (correlation_error)
+    corr_audit_size: int = 0
+
+    # multi-level tail bank (empty: only the alpha_tail q/cvar columns)
+    tail_levels: Tuple[float, ...] = ()
+    tail_method: str = "sa"  # "sa" (EWMAQuantile rule) or "p2"
+    # bank levels whose cvar drives tail inhibition (the worst of them counts);
+    # empty: the alpha_tail cvar column
+    tail_inhibit_levels: Tuple[float, ...] = ()
+
 
 @dataclass
 class ExplorerMetrics:
@@ -150,245 +399,932 @@ class ExplorerMetrics:
     last_dt: float = 1.0
 
 
+# Per-explorer columns of the array-backed Broker: name -> (dtype, initial value).
+# None marks values taken from BrokerConfig at registration.
+_EXPLORER_COLUMNS: Dict[str, Tuple[type, Optional[float]]] = {
+    # EWMAStats(beta_mu) on r: mean (+ its own variance, not used by decisions)
+    "mu": (float, 0.0),
+    "mu_var": (float, 1.0),
+    # EWMAStats(beta_var) on r: variance (+ its own mean)
+    "var_mu": (float, 0.0),
+    "var": (float, 1.0),
+    # tail quantile / cvar proxy
+    "q": (float, 0.0),
+    "cvar": (float, 0.0),
+    # drawdown on cumulative net cashflow
+    "dd_peak": (float, 0.0),
+    "dd_value": (float, 0.0),
+    "dd": (float, 0.0),
+    "surv": (float, 1.0),
+    "dt_mu": (float, 1.0),
+    # last observation
+    "last_r": (float, 0.0),
+    "last_c": (float, 0.0),
+    "last_alive": (bool, True),
+    "last_dt": (float, 1.0),
+    # credit policy + gating
+    "limit": (float, None),
+    "min_interval": (float, None),
+    "blocked": (bool, False),
+    "last_funded_at": (float, -math.inf),
+    # eligibility index (see Broker._classify): current verdict + live heap key
+    "eligible": (bool, False),
+    "cool_key": (float, math.nan),
+    # observed since the last metric_snapshot (its cached entry is outdated)
+    "stale": (bool, True),
+    # correlation epoch of the last change to the row's rho values
+    "touched": (np.int64, 0),
+    # row is in the active correlation set (has rho values that can move)
+    "corr_active": (bool, False),
+}
+
+# bookkeeping columns rebuilt from the others (not part of saved state)
+_DERIVED_COLUMNS = ("eligible", "cool_key", "stale", "touched", "corr_active")
+
+_STATE_FORMAT = 1
+
+
 class Broker:
     """Phase-C Broker as Inhibitor.
 
     Observes only semantikfreie time-series metrics and produces CreditPolicy per explorer.
+
+    State is struct-of-arrays: explorer ids map to row indices (registration
+    order) of NumPy columns (see `_EXPLORER_COLUMNS`). `observe_batch` updates
+    many explorers at once; `observe` is its one-row form.
+    `metrics` and `policies` are snapshot views in the legacy dataclass form.
     """
 
     def __init__(self, config: Optional[BrokerConfig] = None):
         self.cfg = config or BrokerConfig()
-        self.metrics: Dict[str, ExplorerMetrics] = {}
-        self.policies: Dict[str, CreditPolicy] = {}
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._cols: Dict[str, np.ndarray] = {
+            name: np.empty(0, dtype=dtype) for name, (dtype, _) in _EXPLORER_COLUMNS.items()
+        }
         self._time: float = 0.0
-        self._last_funded_at: Dict[str, float] = {}
-
-        # sparse correlation tracking
-        self._cov: Dict[Tuple[str, str], EWMACov] = {}
+        # mark_funded() on ids that were never observed (registered on first use)
+        self._funded_unregistered: Dict[str, float] = {}
+        # eligibility index: rows eligible as of the last sync, and a heap of
+        # (next-eligible time, row) for rows waiting out their min_interval
+        self._ready: set = set()
+        self._cooling: List[Tuple[float, int]] = []
+        # metric_snapshot cache; rows flagged in the "stale" column are rebuilt
+        self._snapshot: Dict[str, Mapping[str, float]] = {}
+        self._snapshot_view: Optional[Mapping[str, Mapping[str, float]]] = None
+        # bumped whenever rho values may change; rows record it in "touched"
+        self._corr_epoch = 0
+
+        # correlation tracking over the active set (ids that took part in
+        # update_correlations), exact or sketched
+        cfg = self.cfg
+        if cfg.corr_mode == "exact":
+            self._corr = DenseCovariance(cfg.beta_var)
+        elif cfg.corr_mode == "sketch":
+            self._corr = SketchCovariance(cfg.beta_var, cfg.corr_sketch_dim, cfg.corr_sketch_seed)
+        else:
+            raise ValueError(f"Unsupported corr_mode: {cfg.corr_mode}")
+        self._corr_audit: Optional[DenseCovariance] = None
+        if cfg.corr_mode == "sketch" and cfg.corr_audit_size > 0:
+            self._corr_audit = DenseCovariance(cfg.beta_var)
+
+        # optional quantile bank over cfg.tail_levels
+        self._tail: Optional[QuantileBank] = None
+        self._tail_inhibit: Optional[np.ndarray] = None
+        if cfg.tail_levels:
+            self._tail = QuantileBank(cfg.tail_levels, method=cfg.tail_method, eta=cfg.eta_q, beta_cvar=cfg.beta_cvar)
+        if cfg.tail_inhibit_levels:
+            if self._tail is None:
+                raise ValueError("tail_inhibit_levels needs tail_levels")
+            self._tail_inhibit = self._tail.level_index(cfg.tail_inhibit_levels)
 
     # ----- registration -----
 
-    def _ensure(self, explorer_id: str):
-        if explorer_id in self.metrics:
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def ids(self) -> List[str]:
+        """Explorer ids in row order."""
+        return list(self._ids)
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of one per-explorer column (row order = `ids`).
+
+        Gating changes go through `decide_limits` / `mark_funded`, which keep
+        the eligibility index in step.
+        """
+        view = self._cols[name][: len(self._ids)].view()
+        view.flags.writeable = False
+        return view
+
+    def _grow(self, need: int):
+        cap = len(self._cols["mu"])
+        if need <= cap:
             return
+        new_cap = max(need, 2 * cap, 16)
+        for name, arr in self._cols.items():
+            grown = np.empty(new_cap, dtype=arr.dtype)
+            grown[:cap] = arr
+            self._cols[name] = grown
+        if self._tail is not None:
+            self._tail.grow(new_cap)
+
+    def _ensure(self, explorer_id: str) -> int:
+        idx = self._index.get(explorer_id)
+        if idx is not None:
+            return idx
         cfg = self.cfg
-        self.metrics[explorer_id] = ExplorerMetrics(
-            mu=EWMAStats(beta=cfg.beta_mu, mu=0.0, var=1.0),
-            var=EWMAStats(beta=cfg.beta_var, mu=0.0, var=1.0),  # store mean in mu.mu, variance in mu.var
-            q=EWMAQuantile(alpha=cfg.alpha_tail, eta=cfg.eta_q, q=0.0),
-            cvar=0.0,
-            dd=EWMADrawdown(),
-            surv=1.0,
-            dt_mu=1.0,
-        )
-        self.policies[explorer_id] = CreditPolicy(limit=cfg.default_limit, min_interval=cfg.base_min_interval, blocked=False)
-        self._last_funded_at[explorer_id] = -float("inf")
+        idx = len(self._ids)
+        self._grow(idx + 1)
+        for name, (_, init) in _EXPLORER_COLUMNS.items():
+            self._cols[name][idx] = init if init is not None else 0.0
+        self._cols["limit"][idx] = cfg.default_limit
+        self._cols["min_interval"][idx] = cfg.base_min_interval
+        self._cols["last_funded_at"][idx] = self._funded_unregistered.pop(explorer_id, -math.inf)
+        self._index[explorer_id] = idx
+        self._ids.append(explorer_id)
+        self._classify(idx)
+        return idx
+
+    def index_of(self, explorer_ids: Iterable[str]) -> np.ndarray:
+        """Row indices for ids (unknown ids are registered)."""
+        return np.fromiter((self._ensure(eid) for eid in explorer_ids), dtype=np.intp)
+
+    def lookup(self, explorer_ids: Iterable[str]) -> np.ndarray:
+        """Row indices for ids, -1 for unknown ids (nothing is registered)."""
+        index = self._index
+        return np.fromiter((index.get(eid, -1) for eid in explorer_ids), dtype=np.intp)
 
     # ----- observation -----
 
     def observe(self, explorer_id: str, r: float, c: float, alive: bool, dt: float):
-        self._ensure(explorer_id)
+        """Single-explorer `observe_batch` on Python floats.
 
-        m = self.metrics[explorer_id]
+        Same arithmetic as the batch path (bit-identical); kept scalar because
+        per-call NumPy overhead would dominate one-row updates.
+        """
+        idx = self._ensure(explorer_id)
         cfg = self.cfg
+        col = self._cols
 
         r = float(r); c = float(c); dt = float(dt) if dt and dt > 0 else 1.0
         net = r - c
 
         # store last obs
-        m.last_r, m.last_c, m.last_alive, m.last_dt = r, c, bool(alive), dt
+        col["last_r"][idx] = r
+        col["last_c"][idx] = c
+        col["last_alive"][idx] = bool(alive)
+        col["last_dt"][idx] = dt
 
         # update time (global)
         self._time += dt
 
         # mean/var on r
-        m.mu.update(r)
-        m.var.update(r)  # uses EWMAStats.var as variance; mu inside m.var.mu unused
-        vol = math.sqrt(max(m.var.var, 0.0))
+        old_var = float(col["var"][idx])
+        b = cfg.beta_mu
+        mu = float(col["mu"][idx])
+        col["mu_var"][idx] = max((1 - b) * float(col["mu_var"][idx]) + b * (r - mu) ** 2, 0.0)
+        col["mu"][idx] = (1 - b) * mu + b * r
+        b = cfg.beta_var
+        var_mu = float(col["var_mu"][idx])
+        col["var"][idx] = max((1 - b) * float(col["var"][idx]) + b * (r - var_mu) ** 2, 0.0)
+        col["var_mu"][idx] = (1 - b) * var_mu + b * r
 
         # tail quantile and cvar proxy
-        q = m.q.update(r)
+        q = float(col["q"][idx])
+        q = q + cfg.eta_q * (cfg.alpha_tail - (1.0 if r < q else 0.0))
+        col["q"][idx] = q
         loss = min(r - q, 0.0)
-        m.cvar = (1 - cfg.beta_cvar) * m.cvar + cfg.beta_cvar * loss  # negative or 0
+        col["cvar"][idx] = (1 - cfg.beta_cvar) * float(col["cvar"][idx]) + cfg.beta_cvar * loss
 
         # drawdown on net
-        m.dd.update(net)
+        value = float(col["dd_value"][idx]) + net
+        col["dd_value"][idx] = value
+        if value > col["dd_peak"][idx]:
+            col["dd_peak"][idx] = value
+        dd = float(col["dd_peak"][idx]) - value
+        if dd > col["dd"][idx]:
+            col["dd"][idx] = dd
 
         # survival EWMA
         alive_f = 1.0 if alive else 0.0
-        m.surv = (1 - cfg.beta_surv) * m.surv + cfg.beta_surv * alive_f
+        col["surv"][idx] = (1 - cfg.beta_surv) * float(col["surv"][idx]) + cfg.beta_surv * alive_f
 
         # dt mean
-        m.dt_mu = (1 - cfg.beta_dt) * m.dt_mu + cfg.beta_dt * dt
+        col["dt_mu"][idx] = (1 - cfg.beta_dt) * float(col["dt_mu"][idx]) + cfg.beta_dt * dt
+        col["stale"][idx] = True
+
+        if self._tail is not None:
+            self._tail.update(np.array([idx]), np.array([r]))
+        # rho only moves through the var norm, and only for active rows
+        if col["corr_active"][idx] and max(float(col["var"][idx]), 1e-12) != max(old_var, 1e-12):
+            self._touch(idx)
+
+    def observe_batch(self, explorers, r, c, alive, dt=None):
+        """Vectorised `observe` for many explorers (ids or row indices).
+
+        Equivalent to calling `observe` for each entry in order; an explorer
+        may appear at most once per batch. `dt=None` means dt=1 for all.
+        """
+        if isinstance(explorers, np.ndarray) and explorers.dtype.kind in "iu":
+            idx = explorers.astype(np.intp, copy=False)
+            if idx.size and (idx.min() < 0 or idx.max() >= len(self._ids)):
+                raise IndexError("explorer index out of range")
+        else:
+            idx = self.index_of(explorers)
+        n = len(idx)
+        if len(np.unique(idx)) != n:
+            raise ValueError("observe_batch requires unique explorers per batch")
+
+        r = np.broadcast_to(np.asarray(r, dtype=float), (n,))
+        c = np.broadcast_to(np.asarray(c, dtype=float), (n,))
+        alive = np.broadcast_to(np.asarray(alive, dtype=bool), (n,))
+        dt = np.ones(n) if dt is None else np.broadcast_to(np.asarray(dt, dtype=float), (n,))
+        dt = np.where(dt > 0, dt, 1.0)
+        if n == 0:
+            return
+
+        # update time (global, sequential sum as in per-id observation)
+        self._time = float(np.add.accumulate(np.concatenate(([self._time], dt)))[-1])
+        self._observe_and_touch(idx, r, c, alive, dt)
+
+    def _observe_and_touch(self, idx: np.ndarray, r: np.ndarray, c: np.ndarray, alive: np.ndarray, dt: np.ndarray):
+        """`_observe_rows` plus the correlation touch of rows whose rho moved."""
+        old_norm = self._rho_norm(idx)
+        self._observe_rows(idx, r, c, alive, dt)
+        moved = idx[self._cols["corr_active"][idx] & (self._rho_norm(idx) != old_norm)]
+        if len(moved):
+            self._touch(moved)
+
+    def _observe_rows(self, idx: np.ndarray, r: np.ndarray, c: np.ndarray, alive: np.ndarray, dt: np.ndarray):
+        """Per-row part of `observe_batch` (all but the global time)."""
+        cfg = self.cfg
+        col = self._cols
+        net = r - c
+
+        # store last obs
+        col["last_r"][idx] = r
+        col["last_c"][idx] = c
+        col["last_alive"][idx] = alive
+        col["last_dt"][idx] = dt
+
+        # mean/var on r (EWMAStats.update semantics)
+        b = cfg.beta_mu
+        mu = col["mu"][idx]
+        col["mu_var"][idx] = np.maximum((1 - b) * col["mu_var"][idx] + b * (r - mu) ** 2, 0.0)
+        col["mu"][idx] = (1 - b) * mu + b * r
+        b = cfg.beta_var
+        var_mu = col["var_mu"][idx]
+        col["var"][idx] = np.maximum((1 - b) * col["var"][idx] + b * (r - var_mu) ** 2, 0.0)
+        col["var_mu"][idx] = (1 - b) * var_mu + b * r
+
+        # tail quantile and cvar proxy
+        q = col["q"][idx]
+        q = q + cfg.eta_q * (cfg.alpha_tail - np.where(r < q, 1.0, 0.0))
+        col["q"][idx] = q
+        loss = np.minimum(r - q, 0.0)
+        col["cvar"][idx] = (1 - cfg.beta_cvar) * col["cvar"][idx] + cfg.beta_cvar * loss  # negative or 0
+
+        # drawdown on net
+        value = col["dd_value"][idx] + net
+        peak = col["dd_peak"][idx]
+        peak = np.where(value > peak, value, peak)
+        dd = peak - value
+        max_dd = col["dd"][idx]
+        col["dd_value"][idx] = value
+        col["dd_peak"][idx] = peak
+        col["dd"][idx] = np.where(dd > max_dd, dd, max_dd)
+
+        # survival EWMA
+        alive_f = np.where(alive, 1.0, 0.0)
+        col["surv"][idx] = (1 - cfg.beta_surv) * col["surv"][idx] + cfg.beta_surv * alive_f
+
+        # dt mean
+        col["dt_mu"][idx] = (1 - cfg.beta_dt) * col["dt_mu"][idx] + cfg.beta_dt * dt
+        col["stale"][idx] = True
+
+        if self._tail is not None:
+            self._tail.update(idx, r)
 
     # ----- correlations -----
 
+    @property
+    def correlation_epoch(self) -> int:
+        """Counter of changes that may move rho values (see `CorrelationGraph`).
+
+        Bumped by correlation updates and drops, and by observations that
+        change the var norm of a row in the active correlation set; mu and
+        last_r only enter rho through the next `update_correlations`.
+        """
+        return self._corr_epoch
+
+    def _touch(self, rows):
+        self._corr_epoch += 1
+        self._cols["touched"][rows] = self._corr_epoch
+
+    def drop_correlations(self, explorer_ids: Iterable[str]):
+        """Remove ids from the active correlation set (storage is compacted)."""
+        explorer_ids = list(explorer_ids)
+        self._corr.drop(explorer_ids)
+        if self._corr_audit is not None:
+            self._corr_audit.drop(explorer_ids)
+        rows = self.lookup(eid for eid in explorer_ids if eid in self._index)
+        self._cols["corr_active"][rows] = False
+        self._touch(rows)
+
     def update_correlations(self, top_ids: Iterable[str]):
-        """Update sparse correlations between a set of ids using last_r - mu."""
-        ids = list(top_ids)
-        cfg = self.cfg
-        for i in range(len(ids)):
-            for j in range(i+1, len(ids)):
-                a, b = ids[i], ids[j]
-                if a not in self.metrics or b not in self.metrics:
-                    continue
-                ma, mb = self.metrics[a], self.metrics[b]
-                xa = ma.last_r - ma.mu.mu
-                xb = mb.last_r - mb.mu.mu
-                key = (a, b)
-                cov = self._cov.get(key)
-                if cov is None:
-                    cov = EWMACov(beta=cfg.beta_var, cov=0.0)
-                    self._cov[key] = cov
-                cov.update(xa, xb)
+        """EWMA update of pairwise covariances of last_r - mu among ids.
+
+        Exact mode is one rank-1 step on the dense active-set matrix; sketch
+        mode one step of the random-projection sketch. Ids without metrics
+        are skipped.
+        """
+        ids = [eid for eid in dict.fromkeys(top_ids) if eid in self._index]
+        if len(ids) < 2:
+            return
+        rows = np.fromiter((self._index[eid] for eid in ids), dtype=np.intp)
+        x = self._cols["last_r"][rows] - self._cols["mu"][rows]
+        self._corr.update(ids, x)
+        self._cols["corr_active"][rows] = True
+        self._touch(rows)
+
+        audit = self._corr_audit
+        if audit is not None:
+            # the first corr_audit_size ids ever seen are tracked exactly as well
+            room = self.cfg.corr_audit_size - len(audit.active.ids)
+            take = []
+            for k, eid in enumerate(ids):
+                if eid in audit.active.index:
+                    take.append(k)
+                elif room > 0:
+                    take.append(k)
+                    room -= 1
+            if len(take) >= 2:
+                audit.update([ids[k] for k in take], x[take])
+
+    def _rho_norm(self, rows: np.ndarray) -> np.ndarray:
+        return np.maximum(self._cols["var"][rows], 1e-12)
 
     def rho(self, a: str, b: str) -> float:
         if a == b:
             return 1.0
-        key = (a, b) if (a, b) in self._cov else (b, a)
-        cov = self._cov.get(key)
-        if cov is None:
-            return 0.0
-        ma, mb = self.metrics.get(a), self.metrics.get(b)
-        if ma is None or mb is None:
+        cov = self._corr.pair(a, b)
+        ia, ib = self._index.get(a), self._index.get(b)
+        if cov is None or ia is None or ib is None:
             return 0.0
-        va = max(ma.var.var, 1e-12)
-        vb = max(mb.var.var, 1e-12)
-        return float(cov.cov / (math.sqrt(va * vb) + 1e-12))
+        var = self._cols["var"]
+        va = max(float(var[ia]), 1e-12)
+        vb = max(float(var[ib]), 1e-12)
+        return float(cov / (math.sqrt(va * vb) + 1e-12))
+
+    def _rho_block(self, tracker, ids_a: List[str], ids_b: List[str]) -> np.ndarray:
+        slots_a, slots_b = tracker.active.lookup(ids_a), tracker.active.lookup(ids_b)
+        rows_a = np.array([self._index.get(eid, -1) for eid in ids_a], dtype=np.intp)
+        rows_b = np.array([self._index.get(eid, -1) for eid in ids_b], dtype=np.intp)
+        ka = np.flatnonzero((slots_a >= 0) & (rows_a >= 0))
+        kb = np.flatnonzero((slots_b >= 0) & (rows_b >= 0))
+
+        rho = np.zeros((len(ids_a), len(ids_b)))
+        if len(ka) and len(kb):
+            cov = tracker.block(slots_a[ka], slots_b[kb])
+            norm = np.sqrt(np.outer(self._rho_norm(rows_a[ka]), self._rho_norm(rows_b[kb]))) + 1e-12
+            rho[np.ix_(ka, kb)] = cov / norm
+        return rho
+
+    def rho_matrix(self, explorer_ids: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Correlation matrix for ids (default: the active set), as `rho` pairwise.
+
+        Unit diagonal; pairs never updated together are 0.
+        """
+        ids = list(self._corr.active.ids if explorer_ids is None else explorer_ids)
+        rho = self._rho_block(self._corr, ids, ids)
+        np.fill_diagonal(rho, 1.0)
+        return rho
+
+    def most_correlated(self, explorer_id: str, k: int, among: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """Top-k ids by |rho| with explorer_id (default: over the active set)."""
+        ids = [eid for eid in (self._corr.active.ids if among is None else among) if eid != explorer_id]
+        if not ids or k <= 0:
+            return []
+        rho = self._rho_block(self._corr, [explorer_id], ids)[0]
+        k = min(int(k), len(ids))
+        top = np.argpartition(-np.abs(rho), k - 1)[:k]
+        top = top[np.argsort(-np.abs(rho[top]), kind="stable")]
+        return [(ids[t], float(rho[t])) for t in top]
+
+    def correlation_error(self) -> Dict[str, float]:
+        """Sketch vs exact rho on the audited ids (corr_audit_size > 0).
+
+        Reports max/mean/rms absolute error over pairs updated together, and
+        the mean a-priori standard-error estimate of the sketch (`estimate`).
+        """
+        audit = self._corr_audit
+        if audit is None:
+            raise ValueError("correlation_error needs corr_mode='sketch' and corr_audit_size > 0")
+        ids = [eid for eid in audit.active.ids if eid in self._index]
+        slots = audit.active.lookup(ids)
+        seen = audit.block(slots, slots) != 0.0
+        np.fill_diagonal(seen, False)
+        if not seen.any():
+            return {"pairs": 0, "max_abs": 0.0, "mean_abs": 0.0, "rms": 0.0, "estimate": 0.0}
+
+        err = np.abs(self._rho_block(self._corr, ids, ids) - self._rho_block(audit, ids, ids))[seen]
+        rows = np.array([self._index[eid] for eid in ids], dtype=np.intp)
+        norm = np.sqrt(np.outer(self._rho_norm(rows), self._rho_norm(rows))) + 1e-12
+        estimate = (self._corr.error_estimate(self._corr.active.lookup(ids)) / norm)[seen]
+        return {
+            "pairs": int(seen.sum() // 2),
+            "max_abs": float(err.max()),
+            "mean_abs": float(err.mean()),
+            "rms": float(np.sqrt(np.mean(err ** 2))),
+            "estimate": float(estimate.mean()),
+        }
+
+    # ----- tail -----
+
+    @property
+    def tail_bank(self) -> Optional[QuantileBank]:
+        """The multi-level quantile bank (None without cfg.tail_levels)."""
+        return self._tail
+
+    def tail_cvar(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """cvar feeding tail inhibition, per row (default: all rows).
+
+        The alpha_tail column, or the worst cvar over cfg.tail_inhibit_levels.
+        """
+        if rows is None:
+            rows = slice(0, len(self._ids))
+        if self._tail_inhibit is None:
+            return self._cols["cvar"][rows]
+        return self._tail.cvar[rows][:, self._tail_inhibit].min(axis=1)
 
     # ----- decisions -----
 
-    def decide_limits(self) -> Dict[str, CreditPolicy]:
-        """Compute new policies based on current metrics.
+    def update_limits(self) -> None:
+        """Compute new policies based on current metrics (in place, vectorised).
 
         No positive judgement. Only inhibition: reduce limits, cooldown, block.
         """
-        cfg = self.cfg
-        for eid, m in self.metrics.items():
-            pol = self.policies.get(eid, CreditPolicy(limit=cfg.default_limit, min_interval=cfg.base_min_interval, blocked=False))
-
-            # immediate block on death
-            if not m.last_alive:
-                pol.blocked = True
-                pol.limit = 0.0
-                self.policies[eid] = pol
-                continue
-
-            mu = m.mu.mu
-            vol = math.sqrt(max(m.var.var, 0.0))
-            cvar = m.cvar
-            dd = m.dd.max_dd
-
-            # start from current
-            limit = pol.limit
-            min_interval = max(pol.min_interval, cfg.base_min_interval)
-
-            # volatility inhibition
-            if abs(mu) > 1e-12 and vol > cfg.k_var * abs(mu):
-                limit = max(cfg.min_limit, limit * cfg.lambda_down)
+        changed = self._limit_rows(slice(0, len(self._ids)))
+        for idx in np.flatnonzero(changed).tolist():
+            self._classify(idx)
 
-            # tail risk inhibition (cvar negative)
-            if cvar < -cfg.gamma_tail * cfg.sigma_ref:
-                limit = max(cfg.min_limit, limit * cfg.lambda_down)
-                if cfg.hard_block_tail:
-                    pol.blocked = True
-                    limit = 0.0
-
-            # drawdown inhibition
-            if dd > cfg.k_dd * cfg.sigma_ref:
-                limit = max(cfg.min_limit, limit * cfg.lambda_down)
-                if cfg.hard_block_dd:
-                    pol.blocked = True
-                    limit = 0.0
-
-            # cooldown based on dt mean (simple)
-            min_interval = max(min_interval, m.dt_mu * cfg.cooldown_factor)
-
-            pol.limit = float(limit)
-            pol.min_interval = float(min_interval)
-            self.policies[eid] = pol
-
-        return {k: CreditPolicy(v.limit, v.min_interval, v.blocked) for k, v in self.policies.items()}
+    def _limit_rows(self, rows) -> np.ndarray:
+        """Apply the inhibition rules to rows; returns which rows may have
+        changed eligibility (gate flipped or cooldown grew)."""
+        cfg = self.cfg
+        col = self._cols
+        alive = col["last_alive"][rows]
+        mu = col["mu"][rows]
+        vol = np.sqrt(np.maximum(col["var"][rows], 0.0))
+        blocked = col["blocked"][rows].copy()
+
+        # start from current
+        limit = col["limit"][rows].copy()
+        min_interval = col["min_interval"][rows]
+        min_interval = np.where(cfg.base_min_interval > min_interval, cfg.base_min_interval, min_interval)
+
+        def inhibit(limit, hit):
+            down = limit * cfg.lambda_down
+            return np.where(hit, np.where(down > cfg.min_limit, down, cfg.min_limit), limit)
+
+        # volatility inhibition
+        abs_mu = np.abs(mu)
+        limit = inhibit(limit, (abs_mu > 1e-12) & (vol > cfg.k_var * abs_mu))
+
+        # tail risk inhibition (cvar negative)
+        tail = self.tail_cvar(rows) < -cfg.gamma_tail * cfg.sigma_ref
+        limit = inhibit(limit, tail)
+        if cfg.hard_block_tail:
+            blocked |= tail
+            limit[tail] = 0.0
+
+        # drawdown inhibition
+        dd = col["dd"][rows] > cfg.k_dd * cfg.sigma_ref
+        limit = inhibit(limit, dd)
+        if cfg.hard_block_dd:
+            blocked |= dd
+            limit[dd] = 0.0
+
+        # cooldown based on dt mean (simple)
+        cooldown = col["dt_mu"][rows] * cfg.cooldown_factor
+        min_interval = np.where(cooldown > min_interval, cooldown, min_interval)
+
+        # immediate block on death (interval untouched)
+        dead = ~alive
+        blocked[dead] = True
+        limit[dead] = 0.0
+        min_interval = np.where(dead, col["min_interval"][rows], min_interval)
+
+        was_open = ~col["blocked"][rows] & (col["limit"][rows] > 0.0)
+        changed = (was_open != (~blocked & (limit > 0.0))) | (min_interval > col["min_interval"][rows])
+        col["limit"][rows] = limit
+        col["blocked"][rows] = blocked
+        col["min_interval"][rows] = min_interval
+        return changed
+
+    def decide_limits(self) -> PolicySnapshot:
+        """`update_limits`, returning the new policies as a lazy snapshot."""
+        self.update_limits()
+        return self._policy_snapshot()
 
     # ----- gating -----
 
     def is_eligible(self, explorer_id: str) -> bool:
-        pol = self.policies.get(explorer_id)
-        if pol is None:
+        idx = self._index.get(explorer_id)
+        if idx is None:
             return True
-        if pol.blocked or pol.limit <= 0.0:
+        col = self._cols
+        if col["blocked"][idx] or col["limit"][idx] <= 0.0:
             return False
-        last = self._last_funded_at.get(explorer_id, -float("inf"))
-        if (self._time - last) < pol.min_interval:
+        if (self._time - col["last_funded_at"][idx]) < col["min_interval"][idx]:
             return False
         return True
 
+    def _classify(self, idx: int):
+        """Re-file one row in the eligibility index after its gate changed.
+
+        Open rows (not blocked, limit > 0) are either eligible now or queued
+        under the time their min_interval runs out; closed rows are in
+        neither. Heap entries whose key differs from `cool_key` are stale.
+        """
+        col = self._cols
+        self._ready.discard(idx)
+        col["eligible"][idx] = False
+        col["cool_key"][idx] = math.nan
+        if col["blocked"][idx] or col["limit"][idx] <= 0.0:
+            return
+        last = float(col["last_funded_at"][idx])
+        min_interval = float(col["min_interval"][idx])
+        if (self._time - last) >= min_interval:
+            self._ready.add(idx)
+            col["eligible"][idx] = True
+            return
+        key = last + min_interval
+        # slightly early, so rounding in last + min_interval never delays a row
+        key -= abs(key) * 1e-12
+        col["cool_key"][idx] = key
+        heapq.heappush(self._cooling, (key, idx))
+
+    def _sync_eligibility(self):
+        """Move rows whose cooldown ran out by `_time` into the eligible set."""
+        heap, col = self._cooling, self._cols
+        cool_key = col["cool_key"]
+        retry = []
+        while heap and heap[0][0] <= self._time:
+            key, idx = heapq.heappop(heap)
+            if key != cool_key[idx]:
+                continue
+            if (self._time - col["last_funded_at"][idx]) >= col["min_interval"][idx]:
+                cool_key[idx] = math.nan
+                self._ready.add(idx)
+                col["eligible"][idx] = True
+            else:
+                retry.append((key, idx))
+        for item in retry:
+            heapq.heappush(heap, item)
+
+    def eligible_rows(self) -> set:
+        """Rows eligible for funding now (a live set; do not modify)."""
+        self._sync_eligibility()
+        return self._ready
+
+    def eligible_ids(self) -> List[str]:
+        return [self._ids[idx] for idx in sorted(self.eligible_rows())]
+
+    def eligible_mask(self, rows: np.ndarray) -> np.ndarray:
+        """`is_eligible` for registered rows."""
+        self._sync_eligibility()
+        return self._cols["eligible"][rows]
+
     def mark_funded(self, explorer_id: str):
-        self._last_funded_at[explorer_id] = self._time
+        idx = self._index.get(explorer_id)
+        if idx is None:
+            self._funded_unregistered[explorer_id] = self._time
+        else:
+            self._cols["last_funded_at"][idx] = self._time
+            self._classify(idx)
+
+    def apply_policies_array(self, rows: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Array form of `apply_policies`; weights are aligned with broker rows.
+
+        Ineligible rows get weight 0; the rest are capped at their limit and
+        renormalized (all zeros if nothing remains).
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        w = np.asarray(weights, dtype=float)
+        limit = self._cols["limit"][rows]
+        w = np.where(limit < w, limit, w)
+        w = np.where(self.eligible_mask(rows) & (w > 0), w, 0.0)
+        # left-to-right sum, as the dict version
+        s = np.add.accumulate(w)[-1] if len(w) else 0.0
+        if s <= 0:
+            return np.zeros(len(w))
+        return w / s
 
     def apply_policies(self, weights: Dict[str, float]) -> Dict[str, float]:
         """Apply blocking, min_interval and limit caps to a weight dict.
 
         Returns renormalized weights (sum=1) for remaining active channels.
         """
-        out = {}
-        for eid, w in weights.items():
-            self._ensure(eid)
-            pol = self.policies.get(eid, CreditPolicy(limit=self.cfg.default_limit, min_interval=self.cfg.base_min_interval, blocked=False))
-            if pol.blocked or not self.is_eligible(eid):
-                continue
-            w2 = min(float(w), float(pol.limit))
-            if w2 > 0:
-                out[eid] = w2
+        ids = list(weights.keys())
+        rows = self.index_of(ids)
+        w = self.apply_policies_array(rows, np.fromiter(weights.values(), dtype=float, count=len(ids)))
+        if not w.any():
+            return {eid: 0.0 for eid in ids}
+        return {eid: v for eid, v, keep in zip(ids, w.tolist(), (w > 0).tolist()) if keep}
 
-        s = sum(out.values())
-        if s <= 0:
-            return {eid: 0.0 for eid in weights.keys()}
-        return {eid: w / s for eid, w in out.items()}
+    def apply_decorrelation_cap_array(self, rows: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Array form of `apply_decorrelation_cap` (weights aligned with rows).
 
-    def apply_decorrelation_cap(self, weights: Dict[str, float]) -> Dict[str, float]:
-        """Optional de-correlation cap: if two funded explorers are highly correlated
-        and at least one has bad tail risk, reduce both weights.
+        Returns the input array itself when nothing can be renormalized.
         """
         cfg = self.cfg
-        ids = [eid for eid, w in weights.items() if w > 0]
-        if len(ids) < 2:
+        rows = np.asarray(rows, dtype=np.intp)
+        weights = np.asarray(weights, dtype=float)
+        funded = np.flatnonzero(weights > 0)
+        if len(funded) < 2:
             return weights
+        ids = [self._ids[r] for r in rows[funded].tolist()]
         # update correlations among active ids
         self.update_correlations(ids)
 
-        w = dict(weights)
-        for i in range(len(ids)):
-            for j in range(i+1, len(ids)):
-                a, b = ids[i], ids[j]
-                rho = abs(self.rho(a, b))
-                if rho <= cfg.tau_corr:
-                    continue
-                ma, mb = self.metrics[a], self.metrics[b]
-                bad_tail = (ma.cvar < -cfg.gamma_tail * cfg.sigma_ref) or (mb.cvar < -cfg.gamma_tail * cfg.sigma_ref)
-                if not bad_tail:
-                    continue
-                # cap both
-                w[a] *= cfg.lambda_down
-                w[b] *= cfg.lambda_down
-
-        s = sum(w.values())
+        bad = self.tail_cvar(rows[funded]) < -cfg.gamma_tail * cfg.sigma_ref
+        hit = np.abs(self._rho_block(self._corr, ids, ids)) > cfg.tau_corr
+        hit &= bad[:, None] | bad[None, :]
+        hit = np.triu(hit, k=1)
+        # cap both partners of every hit pair, once per pair
+        hits = np.zeros(len(weights), dtype=np.intp)
+        hits[funded] = hit.sum(axis=0) + hit.sum(axis=1)
+
+        w = weights.copy()
+        for k in range(int(hits.max())):
+            w[hits > k] *= cfg.lambda_down
+
+        s = np.add.accumulate(w)[-1]
         if s <= 0:
             return weights
-        return {eid: float(v/s) for eid, v in w.items()}
+        return w / s
+
+    def apply_decorrelation_cap(self, weights: Dict[str, float]) -> Dict[str, float]:
+        """Optional de-correlation cap: if two funded explorers are highly correlated
+        and at least one has bad tail risk, reduce both weights.
+        """
+        ids = list(weights.keys())
+        if sum(1 for w in weights.values() if w > 0) < 2:
+            return weights
+        raw = np.fromiter(weights.values(), dtype=float, count=len(ids))
+        w = self.apply_decorrelation_cap_array(self.index_of(ids), raw)
+        if w is raw:
+            return weights
+        return dict(zip(ids, w.tolist()))
 
     # ----- introspection -----
 
-    def metric_snapshot(self) -> Dict[str, Dict[str, float]]:
-        snap = {}
-        for eid, m in self.metrics.items():
-            snap[eid] = {
-                "mu": float(m.mu.mu),
-                "vol": float(math.sqrt(max(m.var.var, 0.0))),
-                "cvar": float(m.cvar),
-                "dd": float(m.dd.max_dd),
-                "surv": float(m.surv),
-                "dt": float(m.dt_mu),
-                "alive": float(1.0 if m.last_alive else 0.0),
-            }
-        return snap
+    @property
+    def policies(self) -> Dict[str, CreditPolicy]:
+        """Dict of all credit policies (copies; edits do not write back)."""
+        return self._policy_snapshot().to_dict()
+
+    def _policy_snapshot(self) -> PolicySnapshot:
+        n = len(self._ids)
+        col = self._cols
+        return PolicySnapshot(self._ids, col["limit"][:n].copy(), col["min_interval"][:n].copy(), col["blocked"][:n].copy())
+
+    @property
+    def metrics(self) -> Dict[str, ExplorerMetrics]:
+        """Snapshot of per-explorer metrics in the legacy dataclass form.
+
+        The nested EWMAStats carry mu/var only (their drawdown fields are
+        not tracked by the broker).
+        """
+        cfg = self.cfg
+        n = len(self._ids)
+        rows = {name: arr[:n].tolist() for name, arr in self._cols.items()}
+        out: Dict[str, ExplorerMetrics] = {}
+        for i, eid in enumerate(self._ids):
+            out[eid] = ExplorerMetrics(
+                mu=EWMAStats(beta=cfg.beta_mu, mu=rows["mu"][i], var=rows["mu_var"][i]),
+                var=EWMAStats(beta=cfg.beta_var, mu=rows["var_mu"][i], var=rows["var"][i]),
+                q=EWMAQuantile(alpha=cfg.alpha_tail, eta=cfg.eta_q, q=rows["q"][i]),
+                cvar=rows["cvar"][i],
+                dd=EWMADrawdown(peak=rows["dd_peak"][i], value=rows["dd_value"][i], max_dd=rows["dd"][i]),
+                surv=rows["surv"][i],
+                dt_mu=rows["dt_mu"][i],
+                last_r=rows["last_r"][i],
+                last_c=rows["last_c"][i],
+                last_alive=bool(rows["last_alive"][i]),
+                last_dt=rows["last_dt"][i],
+            )
+        return out
+
+    def metric_arrays(self, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """`metric_snapshot` fields as arrays over rows (default: all, row order)."""
+        col = self._cols
+        if rows is None:
+            rows = slice(0, len(self._ids))
+        return {
+            "mu": col["mu"][rows],
+            "vol": np.sqrt(np.maximum(col["var"][rows], 0.0)),
+            "cvar": col["cvar"][rows],
+            "dd": col["dd"][rows],
+            "surv": col["surv"][rows],
+            "dt": col["dt_mu"][rows],
+            "alive": np.where(col["last_alive"][rows], 1.0, 0.0),
+        }
+
+    def metric_snapshot(self) -> Mapping[str, Mapping[str, float]]:
+        """Per-explorer metrics (id -> mu/vol/cvar/dd/surv/dt/alive), read-only.
+
+        Cached: without observations since the previous call the same
+        snapshot is returned; otherwise only the observed explorers are
+        rebuilt into a new snapshot, which shares the unchanged entries.
+        Earlier snapshots are never rewritten.
+        """
+        stale_col = self._cols["stale"][: len(self._ids)]
+        stale = np.flatnonzero(stale_col)
+        if len(stale) or self._snapshot_view is None:
+            arrays = {name: arr.tolist() for name, arr in self.metric_arrays(stale).items()}
+            names = tuple(arrays)
+            snap, ids = dict(self._snapshot), self._ids
+            for k, values in enumerate(zip(*arrays.values())):
+                snap[ids[stale[k]]] = _ReadOnlyDict(dict(zip(names, values)))
+            stale_col[stale] = False
+            self._snapshot = snap
+            self._snapshot_view = _ReadOnlyDict(snap)
+        return self._snapshot_view
+
+    # ----- persistence -----
+
+    def state_dict(self) -> Dict[str, np.ndarray]:
+        """Complete broker state as flat NumPy arrays (`save` writes these).
+
+        Derived bookkeeping (eligibility index, snapshot cache) is rebuilt on
+        restore and not included. Ids are stored as strings, so non-str ids
+        raise TypeError instead of coming back converted.
+        """
+        for eid in (*self._ids, *self._funded_unregistered, *self._corr.active.ids):
+            if not isinstance(eid, str):
+                raise TypeError(f"Broker state only supports str explorer ids, got {eid!r}")
+        n = len(self._ids)
+        cfg = asdict(self.cfg)
+        state: Dict[str, np.ndarray] = {
+            "format": np.array(_STATE_FORMAT),
+            "config": np.array(json.dumps(cfg)),
+            "ids": np.array(self._ids, dtype=str),
+            "time": np.array(self._time),
+            "funded_unregistered_ids": np.array(list(self._funded_unregistered), dtype=str),
+            "funded_unregistered_at": np.array(list(self._funded_unregistered.values()), dtype=float),
+        }
+        for name in _EXPLORER_COLUMNS:
+            if name not in _DERIVED_COLUMNS:
+                state[f"col_{name}"] = self._cols[name][:n]
+        for name, arr in self._corr.state().items():
+            state[f"corr_{name}"] = arr
+        if self._corr_audit is not None:
+            for name, arr in self._corr_audit.state().items():
+                state[f"audit_{name}"] = arr
+        for name, arr in self._tail_state(n).items():
+            state[f"tail_{name}"] = arr
+        return state
+
+    def _tail_state(self, n: int) -> Dict[str, np.ndarray]:
+        return {} if self._tail is None else self._tail.state(n)
+
+    def _restore_tail(self, state: Dict[str, np.ndarray]):
+        if self._tail is not None:
+            self._tail.restore(state)
+            self._tail.grow(len(self._cols["mu"]))
+
+    @classmethod
+    def from_state_dict(cls, state: Dict[str, Any], **kwargs) -> "Broker":
+        """Rebuild a broker from `state_dict` output (kwargs go to the constructor)."""
+        if int(state["format"]) != _STATE_FORMAT:
+            raise ValueError(f"Unsupported broker state format: {int(state['format'])}")
+        cfg = {
+            key: tuple(val) if isinstance(val, list) else val
+            for key, val in json.loads(str(state["config"])).items()
+        }
+        broker = cls(BrokerConfig(**cfg), **kwargs)
+        ids = [str(eid) for eid in state["ids"].tolist()]
+        n = len(ids)
+        broker._grow(n)
+        for name, (_, init) in _EXPLORER_COLUMNS.items():
+            if name in _DERIVED_COLUMNS:
+                broker._cols[name][:n] = init
+            else:
+                broker._cols[name][:n] = state[f"col_{name}"]
+        broker._ids = ids
+        broker._index = {eid: i for i, eid in enumerate(ids)}
+        broker._time = float(state["time"])
+        broker._funded_unregistered = dict(
+            zip(state["funded_unregistered_ids"].tolist(), state["funded_unregistered_at"].tolist())
+        )
+
+        def section(prefix):
+            return {key[len(prefix):]: val for key, val in state.items() if key.startswith(prefix)}
+
+        broker._corr.restore(section("corr_"))
+        if broker._corr_audit is not None:
+            broker._corr_audit.restore(section("audit_"))
+        broker._restore_tail(section("tail_"))
+        broker._cols["corr_active"][broker.lookup(eid for eid in broker._corr.active.ids if eid in broker._index)] = True
+        broker._rebuild_eligibility()
+        return broker
+
+    def save(self, path: str | Path) -> None:
+        """Write `state_dict` as an uncompressed `.npz` archive at exactly `path`.
+
+        No suffix is appended, so `load(path)` reads the same file.
+        """
+        state = self.state_dict()
+        with open(path, "wb") as fh:
+            np.savez(fh, **state)
+
+    @classmethod
+    def load(cls, path: str | Path, **kwargs) -> "Broker":
+        """Restore a broker written by `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls.from_state_dict({key: data[key] for key in data.files}, **kwargs)
+
+    def _rebuild_eligibility(self):
+        """Vectorised `_classify` of every row (after a restore)."""
+        n = len(self._ids)
+        col = self._cols
+        last = col["last_funded_at"][:n]
+        min_interval = col["min_interval"][:n]
+        is_open = ~col["blocked"][:n] & (col["limit"][:n] > 0.0)
+        ready = is_open & ((self._time - last) >= min_interval)
+        cooling = np.flatnonzero(is_open & ~ready)
+        key = last[cooling] + min_interval[cooling]
+        key -= np.abs(key) * 1e-12
+        col["eligible"][:n] = ready
+        col["cool_key"][:n] = math.nan
+        col["cool_key"][cooling] = key
+        self._ready = set(np.flatnonzero(ready).tolist())
+        self._cooling = list(zip(key.tolist(), cooling.tolist()))
+        heapq.heapify(self._cooling)
+
+
+class CorrelationGraph:
+    """Low-correlation adjacency over a broker's active correlation set.
+
+    `adjacency[i, j]` is True iff not |rho(ids[i], ids[j])| > tau (the
+    diagonal is False). Explorers outside the active set have rho 0 with
+    everyone and are not stored. `sync` recomputes only rows the broker
+    touched since the previous sync (see `Broker.correlation_epoch`).
+    """
+
+    def __init__(self, tau: float):
+        self.tau = float(tau)
+        self._broker: Optional[weakref.ref] = None
+        self._epoch = 0
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._rows = np.zeros(0, dtype=np.intp)  # broker rows of ids
+        self.adjacency = np.zeros((0, 0), dtype=bool)
+
+    def sync(self, broker: Broker) -> None:
+        active = broker._corr.active.ids
+        m, k = len(active), len(self.ids)
+        rebuild = self._broker is None or broker is not self._broker() or active[:k] != self.ids
+        if not rebuild and m == k and broker.correlation_epoch == self._epoch:
+            return
+
+        if rebuild:
+            self.ids = list(active)
+            self._rows = broker.lookup(self.ids)
+            self.adjacency = np.zeros((m, m), dtype=bool)
+            dirty = np.arange(m)
+        else:
+            # existing rows touched since the last sync, plus new ids
+            touched = broker.column("touched")[self._rows]
+            dirty = np.concatenate([np.flatnonzero(touched > self._epoch), np.arange(k, m)])
+            if m > k:
+                grown = np.zeros((m, m), dtype=bool)
+                grown[:k, :k] = self.adjacency
+                self.adjacency = grown
+                self.ids = list(active)
+                self._rows = np.concatenate([self._rows, broker.lookup(self.ids[k:])])
+        self.index = {eid: i for i, eid in enumerate(self.ids)}
+        self._broker = weakref.ref(broker)
+        self._epoch = broker.correlation_epoch
+
+        if len(dirty):
+            dirty_ids = [self.ids[i] for i in dirty.tolist()]
+            ok = ~(np.abs(broker._rho_block(broker._corr, dirty_ids, self.ids)) > self.tau)
+            self.adjacency[dirty, :] = ok
+            self.adjacency[:, dirty] = ok.T
+            self.adjacency[dirty, dirty] = False
+
+    def compatible(self, explorer_ids: List[str]) -> np.ndarray:
+        """Adjacency among explorer_ids (ids outside the graph are compatible
+        with everything); call `sync` first."""
+        k = len(explorer_ids)
+        out = np.ones((k, k), dtype=bool)
+        slots = np.array([self.index.get(eid, -1) for eid in explorer_ids], dtype=np.intp)
+        inside = np.flatnonzero(slots >= 0)
+        out[np.ix_(inside, inside)] = self.adjacency[np.ix_(slots[inside], slots[inside])]
+        np.fill_diagonal(out, False)
+        return out
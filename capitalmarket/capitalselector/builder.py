@@ -2,7 +2,7 @@ from .core import CapitalSelector, Channel
 from .channels import DummyChannel
 from .stats import EWMAStats
 from .rebirth import RebirthPolicy
-from .reweight import exp_reweight
+from .reweight import ExpReweight
 from .config import ProfileAConfig, ProfileBConfig
 
 
@@ -13,6 +13,7 @@ class CapitalSelectorBuilder:
         self._beta = 0.01
         self._eta = 1.0
         self._kind = "entrepreneur"
+        self._log_weights = False
         self._rebirth_policy = None
         self._channels: list[Channel] = []
         self._resolved_config: dict[str, object] = {}
@@ -46,6 +47,10 @@ class CapitalSelectorBuilder:
     def with_reweight_eta(self, eta: float):
         self._eta = float(eta); return self
 
+    def with_log_weights(self, enabled: bool = True):
+        """Keep weights in the log domain (logsumexp-normalised EG update)."""
+        self._log_weights = bool(enabled); return self
+
     def with_kind(self, kind: str):
         self._kind = kind; return self
 
@@ -66,15 +71,13 @@ class CapitalSelectorBuilder:
     def build(self) -> CapitalSelector:
         stats = EWMAStats(beta=self._beta, seed_var=1.0)
 
-        def reweight(w, adv):
-            return exp_reweight(w, adv, self._eta)
-
         return CapitalSelector(
             wealth=self._wealth,
             rebirth_threshold=self._rebirth_threshold,
             stats=stats,
-            reweight_fn=reweight,
+            reweight_fn=ExpReweight(self._eta),
             kind=self._kind,
             rebirth_policy=self._rebirth_policy,
             channels=self._channels,
+            log_weights=self._log_weights,
         )
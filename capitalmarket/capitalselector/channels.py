@@ -117,3 +117,53 @@ class DeterministicExplorer(PhaseCChannel):
         if not self.alive:
             return 0.0, 0.0, False, self.dt
         return self.r * float(weight), self.c * float(weight), True, self.dt
+
+
+class BankedExplorer(PhaseCChannel):
+    """One row of an explorer bank, exposed as a Phase-C channel."""
+
+    def __init__(self, bank, row: int):
+        self.bank = bank
+        self.row = int(row)
+
+    @property
+    def alive(self) -> bool:
+        return bool(self.bank.alive[self.row])
+
+    def step(self, weight: float):
+        return self.bank.step_row(self.row, weight)
+
+
+class DeterministicExplorerBank:
+    """Deterministic explorers held as arrays, one row per explorer.
+
+    `member(row)` is a BankedExplorer that steps exactly like a
+    DeterministicExplorer with the row's parameters; `step_rows` steps many
+    rows in one array operation. Stacks whose members all belong to one
+    bank are stepped through `step_rows`.
+    """
+
+    def __init__(self, r, c=0.0, dt=1.0):
+        self.r = np.array(r, dtype=float).reshape(-1)
+        n = len(self.r)
+        self.c = np.broadcast_to(np.asarray(c, dtype=float), (n,)).copy()
+        self.dt = np.broadcast_to(np.asarray(dt, dtype=float), (n,)).copy()
+        self.alive = np.ones(n, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.r)
+
+    def member(self, row: int) -> BankedExplorer:
+        return BankedExplorer(self, row)
+
+    def step_row(self, row: int, weight: float):
+        if not self.alive[row]:
+            return 0.0, 0.0, False, self.dt.item(row)
+        return self.r.item(row) * float(weight), self.c.item(row) * float(weight), True, self.dt.item(row)
+
+    def step_rows(self, rows: np.ndarray, weights: np.ndarray):
+        """Step rows[k] with weights[k]; arrays (r, c, alive, dt)."""
+        alive = self.alive[rows]
+        r = np.where(alive, self.r[rows] * weights, 0.0)
+        c = np.where(alive, self.c[rows] * weights, 0.0)
+        return r, c, alive, self.dt[rows]
@@ -3,7 +3,7 @@ from __future__ import annotations
 import numpy as np
 from .stats import EWMAStats
 from .rebirth import RebirthPolicy
-from .reweight import simplex_normalize
+from .reweight import simplex_normalize, exp_reweight_normalize, ExpReweight
 
 from abc import ABC, abstractmethod
 from typing import Tuple
@@ -20,6 +20,21 @@ class Channel(ABC):
         pass
 
 
+def _log_normalize(log_w: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(log w - logsumexp(log w), w) on the simplex; uniform if no entry is finite."""
+    m = log_w.max()
+    if not np.isfinite(m):
+        # all-zero (or invalid) weights: same uniform fallback as simplex_normalize
+        log_w = np.full(len(log_w), -np.log(len(log_w)))
+        return log_w, np.exp(log_w)
+    log_w = log_w - m
+    w = np.exp(log_w)
+    s = w.sum()   # >= 1, the max entry contributes exp(0)
+    log_w -= np.log(s)
+    w /= s
+    return log_w, w
+
+
 class CapitalSelector(Channel):
     """
     Der kanonische, stackbare CapitalSelector.
@@ -35,6 +50,7 @@ class CapitalSelector(Channel):
         kind: str = "entrepreneur",
         rebirth_policy: RebirthPolicy | None = None,
         channels: list[Channel] | None = None,
+        log_weights: bool = False,
     ):
         # G2 inventory: see docs/phase_g_g2_state_inventory.md
         self.wealth = wealth
@@ -52,6 +68,15 @@ class CapitalSelector(Channel):
         self._last_r = 0.0
         self._last_c = 0.0
 
+        # owned scratch buffer for the fused reweight kernel (not state)
+        self._w_work: np.ndarray | None = None
+
+        # optional log-domain weights; `w` stays the canonical view and
+        # log w is re-derived whenever `w` was replaced from outside
+        self.log_weights = bool(log_weights)
+        self._log_w: np.ndarray | None = None
+        self._log_w_src: np.ndarray | None = None
+
     # ---------- Allocation ----------
 
     def allocate(self) -> np.ndarray:
@@ -72,9 +97,9 @@ class CapitalSelector(Channel):
             return
 
         rs, cs = [], []
-        w = self.allocate()
 
-        for wi, ch in zip(w, self.channels):
+        # read-only pass over the weights; no defensive copy needed
+        for wi, ch in zip(self.w, self.channels):
             r_i, c_i = ch.step(wi)
             rs.append(r_i)
             cs.append(c_i)
@@ -98,6 +123,10 @@ class CapitalSelector(Channel):
             self.rebirth()
 
     def feedback_vector(self, r_vec: np.ndarray, c: float, trace: list[str] | None = None, freeze: bool = False):
+        self._feedback_vector(r_vec, c, trace, freeze)
+
+    def _feedback_vector(self, r_vec: np.ndarray, c: float, trace: list[str] | None, freeze: bool) -> bool:
+        """feedback_vector body; returns True if this step triggered a rebirth."""
         r_total = r_vec.sum()
 
         if freeze:
@@ -106,7 +135,7 @@ class CapitalSelector(Channel):
             self._enforce_invariants()
             if trace is not None:
                 trace.append("invariants")
-            return
+            return False
 
         self._last_r = r_total
         self._last_c = c
@@ -119,12 +148,26 @@ class CapitalSelector(Channel):
         if trace is not None:
             trace.append("update_stats")
 
-        adv = pi_vec - self.stats.mu   # ⚠️ jetzt Vektor!
-        self.w = self.reweight_fn(self.w, adv)
+        adv = pi_vec
+        adv -= self.stats.mu   # ⚠️ jetzt Vektor!
+        reborn = self.wealth < self.rebirth_threshold
+
+        if self.log_weights:
+            # logsumexp-normalised, hence already on the simplex
+            self._log_reweight(adv)
+            done = not reborn
+        else:
+            done = not reborn and self._fused_reweight(adv)
+            if not done:
+                self.w = self.reweight_fn(self.w, adv)
         if trace is not None:
             trace.append("reweight")
+        if done:
+            if trace is not None:
+                trace.append("invariants")
+            return False
 
-        if self.wealth < self.rebirth_threshold:
+        if reborn:
             self.rebirth()
             if trace is not None:
                 trace.append("rebirth")
@@ -132,6 +175,117 @@ class CapitalSelector(Channel):
         self._enforce_invariants()
         if trace is not None:
             trace.append("invariants")
+        return bool(reborn)
+
+    def run_sequence(self, R: np.ndarray, C: np.ndarray, *, freeze: bool = False) -> dict[str, np.ndarray]:
+        """Run T feedback steps from a (T, K) return matrix and (T,) costs.
+
+        Equivalent (bit-for-bit) to calling `feedback_vector(R[t], C[t])` for
+        t = 0..T-1. Returns preallocated trajectories of the post-step state:
+        wealth, mu, var, dd, cum_pi, peak_cum_pi (T,), weights (T, K) and
+        rebirth flags (T,).
+        A selector without weights starts uniform over the K columns; one
+        with a different number of weights is rejected.
+        """
+        R = np.asarray(R, dtype=float)
+        C = np.asarray(C, dtype=float)
+        if R.ndim != 2:
+            raise ValueError("R must be a 2D array of shape (T, K)")
+        T, K = R.shape
+        if C.shape != (T,):
+            raise ValueError(f"C must have shape ({T},)")
+        if self.w is None:
+            self.w = np.ones(K) / max(1, K)
+            self.K = K
+        elif len(self.w) != K:
+            raise ValueError(f"R has {K} columns but the selector has {len(self.w)} weights")
+
+        traj = {
+            "wealth": np.empty(T),
+            "mu": np.empty(T),
+            "var": np.empty(T),
+            "dd": np.empty(T),
+            "cum_pi": np.empty(T),
+            "peak_cum_pi": np.empty(T),
+            "weights": np.empty((T, K)),
+            "rebirth": np.zeros(T, dtype=bool),
+        }
+        if T == 0:
+            return traj
+        fused = (
+            not freeze
+            and not self.log_weights
+            and isinstance(self.reweight_fn, ExpReweight)
+            and isinstance(self.w, np.ndarray)
+            and self.w.dtype == np.float64
+        )
+        if fused:
+            self._scan_exp(R, C, traj)
+            return traj
+
+        wealth, mu, var, dd = traj["wealth"], traj["mu"], traj["var"], traj["dd"]
+        cum_pi, peak_cum_pi = traj["cum_pi"], traj["peak_cum_pi"]
+        weights, rebirth = traj["weights"], traj["rebirth"]
+        stats = self.stats
+        step = self._feedback_vector
+        for t in range(T):
+            rebirth[t] = step(R[t], float(C[t]), None, freeze)
+            wealth[t] = self.wealth
+            mu[t] = stats.mu
+            var[t] = stats.var
+            dd[t] = stats.dd
+            cum_pi[t] = stats.cum_pi
+            peak_cum_pi[t] = stats.peak_cum_pi
+            weights[t] = self.w
+        return traj
+
+    def _scan_exp(self, R: np.ndarray, C: np.ndarray, traj: dict[str, np.ndarray]) -> None:
+        """run_sequence loop for the ExpReweight hot path.
+
+        `_feedback_vector` inlined with the state in locals; each step's
+        weights are written straight into their trajectory row. Steps that
+        trigger a rebirth run through `_feedback_vector` itself, so rebirth
+        hooks see the usual selector state.
+        """
+        wealth_t, mu_t, var_t, dd_t = traj["wealth"], traj["mu"], traj["var"], traj["dd"]
+        cum_pi_t, peak_cum_pi_t = traj["cum_pi"], traj["peak_cum_pi"]
+        weights, rebirth = traj["weights"], traj["rebirth"]
+        stats = self.stats
+        eta = self.reweight_fn.eta
+        threshold = self.rebirth_threshold
+        w = self.w
+        work = self._w_work
+        if work is None or work.shape != w.shape:
+            work = self._w_work = np.empty_like(w)
+
+        wealth = self.wealth
+        for t in range(len(R)):
+            r_vec = R[t]
+            c = float(C[t])
+            r_total = r_vec.sum()
+            if wealth + (r_total - c) < threshold:
+                self.w, self.wealth = w, wealth
+                rebirth[t] = self._feedback_vector(r_vec, c, None, False)
+                w, wealth = self.w, self.wealth
+                weights[t] = w
+            else:
+                wealth += r_total - c
+                stats.update(float(r_total) - c)
+                adv = r_vec - w * c
+                adv -= stats.mu
+                w = exp_reweight_normalize(w, adv, eta, out=weights[t], work=work)
+            wealth_t[t] = wealth
+            mu_t[t] = stats.mu
+            var_t[t] = stats.var
+            dd_t[t] = stats.dd
+            cum_pi_t[t] = stats.cum_pi
+            peak_cum_pi_t[t] = stats.peak_cum_pi
+
+        self._last_r = r_total
+        self._last_c = c
+        self.wealth = wealth
+        # the last row belongs to the trajectory
+        self.w = w.copy()
 
     def compute_pi(self, r_vec: np.ndarray, c_total: float):
         """Compute canonical net-flow aggregates.
@@ -150,13 +304,71 @@ class CapitalSelector(Channel):
             pi_vec = r_vec - self.w * C
         return R, C, Pi, pi_vec
 
+    def _fused_reweight(self, adv: np.ndarray) -> bool:
+        """Hot path: ExpReweight + invariants with one temporary less.
+
+        The new weights go into a fresh array every step (so weights handed
+        out earlier never change); only the exponent scratch is reused.
+        Results are identical to `reweight_fn` followed by `_enforce_invariants`.
+        Returns False if the fused kernel does not apply.
+        """
+        w = self.w
+        if not isinstance(self.reweight_fn, ExpReweight) or not isinstance(w, np.ndarray) or w.dtype != np.float64:
+            return False
+        work = self._w_work
+        if work is None or work.shape != w.shape:
+            work = self._w_work = np.empty_like(w)
+        self.w = exp_reweight_normalize(w, adv, self.reweight_fn.eta, out=np.empty_like(w), work=work)
+        return True
+
+    def _sync_log_w(self) -> np.ndarray:
+        """Return log w, re-deriving it if `w` was replaced since the last log update."""
+        if self._log_w is None or self._log_w_src is not self.w:
+            with np.errstate(divide="ignore"):
+                self._log_w = np.log(np.clip(np.asarray(self.w, dtype=float), 0.0, None))
+            self._log_w_src = self.w
+        return self._log_w
+
+    def _set_log_w(self, log_w: np.ndarray, w: np.ndarray | None = None) -> None:
+        """Adopt normalised log weights and expose w = exp(log w)."""
+        self._log_w = log_w
+        self.w = np.exp(log_w) if w is None else w
+        self._log_w_src = self.w
+
+    def _log_reweight(self, adv: np.ndarray) -> None:
+        """Exponentiated-gradient step in the log domain.
+
+        log w += eta * score, normalised with logsumexp. Large eta * score
+        cannot overflow and weights never collapse to the uniform fallback.
+        """
+        if not isinstance(self.reweight_fn, ExpReweight):
+            raise ValueError("log_weights requires an ExpReweight reweight_fn")
+        self._set_log_w(*_log_normalize(self._sync_log_w() + self.reweight_fn.eta * adv))
+
     def _enforce_invariants(self):
-        """Ensure weight simplex constraints after updates."""
-        if self.w is not None:
+        """Ensure weight simplex constraints after updates.
+
+        In log mode the projection runs on log w (logsumexp), so entries
+        too small for w keep their log value.
+        """
+        if self.w is None:
+            return
+        if self.log_weights:
+            self._set_log_w(*_log_normalize(self._sync_log_w()))
+        else:
             self.w = simplex_normalize(self.w)
 
     # ---------- Rebirth ----------
 
+    def has_rebirth_hooks(self) -> bool:
+        """True if a rebirth runs more than the built-in reset.
+
+        That is the case with a rebirth policy or when `rebirth` is replaced
+        (subclass override or an instance hook, as the G3 experiments do).
+        """
+        rebirth = getattr(self.rebirth, "__func__", None)
+        return self.rebirth_policy is not None or rebirth is not CapitalSelector.rebirth
+
     def rebirth(self):
         if self.rebirth_policy:
             self.rebirth_policy.on_rebirth(self)
@@ -164,6 +376,8 @@ class CapitalSelector(Channel):
         self.wealth = max(self.wealth, self.rebirth_threshold)
         if self.w is not None:
             self.w = np.ones(self.K) / self.K
+            if self.log_weights:
+                self._set_log_w(np.full(self.K, -np.log(self.K)), self.w)
         self.stats.reset()
 
     # ---------- Introspection ----------
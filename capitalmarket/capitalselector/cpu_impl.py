@@ -6,3 +6,6 @@ class CpuCore:
 
     def step(self, selector, r_vec, c_total, *, freeze: bool) -> None:
         selector.feedback_vector(r_vec, c_total, trace=None, freeze=freeze)
+
+    def run_sequence(self, selector, R, C, *, freeze: bool) -> dict:
+        return selector.run_sequence(R, C, freeze=freeze)
@@ -1,38 +1,56 @@
 from __future__ import annotations
 
-from typing import Callable
 import numpy as np
 import torch
 
+from .cuda_state import DeviceState, to_device_state, from_device_state
+from .reweight import ExpReweight, ReweightOperator
 
-def _extract_eta(reweight_fn: Callable) -> float:
-    closure = getattr(reweight_fn, "__closure__", None)
-    if not closure:
-        raise ValueError("Cannot extract eta from reweight_fn closure")
-    for cell in closure:
-        try:
-            val = cell.cell_contents
-        except ValueError:
-            continue
-        if isinstance(val, (int, float)):
-            return float(val)
-        if hasattr(val, "_eta"):
-            eta_val = getattr(val, "_eta")
-            if isinstance(eta_val, (int, float)):
-                return float(eta_val)
-    raise ValueError("No eta found in reweight_fn closure")
+
+def _simplex_normalize_t(w: torch.Tensor) -> torch.Tensor:
+    """Row-wise simplex_normalize for (B, K) tensors."""
+    w = torch.clamp(w, min=0.0)
+    s = w.sum(dim=1, keepdim=True)
+    return torch.where(
+        s == 0.0,
+        torch.ones_like(w) / w.shape[1],
+        w / s,
+    )
+
+
+def _log_normalize_t(log_w: torch.Tensor) -> torch.Tensor:
+    """Row-wise logsumexp normalisation; uniform fallback for all -inf rows."""
+    lse = torch.logsumexp(log_w, dim=1, keepdim=True)
+    uniform = torch.full_like(log_w, -float(np.log(log_w.shape[1])))
+    return torch.where(torch.isfinite(lse), log_w - lse, uniform)
+
+
+# run_sequence scalar trajectories and the DeviceState fields they come from
+_TRAJ_KEYS = ("wealth", "mu", "var", "dd", "cum_pi", "peak_cum_pi")
+_TRAJ_COLUMNS = ("wealth", "mean", "var", "drawdown", "cum_pi", "peak_cum_pi")
 
 
 class CudaCore:
     """CUDA backend skeleton with reweight port (Step 3)."""
 
+    def __init__(self, device: str | torch.device | None = None):
+        self.device = device
+
+    def _resolve_device(self) -> torch.device:
+        if self.device is not None:
+            return torch.device(self.device)
+        return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
     def step(self, selector, r_vec, c_total, *, freeze: bool) -> None:
+        self._step(selector, r_vec, c_total, freeze=freeze)
+
+    def _step(self, selector, r_vec, c_total, *, freeze: bool) -> bool:
         if freeze:
             selector._enforce_invariants()
-            return
+            return False
 
         if selector.w is None:
-            return
+            return False
 
         r_vec = np.asarray(r_vec, dtype=float)
         c_total = float(c_total)
@@ -48,24 +66,188 @@ class CudaCore:
 
         selector.stats.update(pi_total)
         score = pi_vec - float(selector.stats.mu)
-        eta = _extract_eta(selector.reweight_fn)
+        op = selector.reweight_fn
 
-        with torch.no_grad():
-            w = torch.as_tensor(w_np).unsqueeze(0)
-            g = torch.zeros_like(w)
-            g[:] = torch.as_tensor(score, dtype=w.dtype)
-            w_new = w * torch.exp(eta * g)
-            w_new = torch.clamp(w_new, min=0.0)
-            s = w_new.sum(dim=1, keepdim=True)
-            w_new = torch.where(
-                s == 0.0,
-                torch.ones_like(w_new) / w_new.shape[1],
-                w_new / s,
-            )
-
-        selector.w = w_new.squeeze(0).detach().cpu().numpy()
-
-        if selector.wealth < selector.rebirth_threshold:
+        if selector.log_weights:
+            if not isinstance(op, ExpReweight):
+                raise ValueError("log_weights requires an ExpReweight reweight_fn")
+            with torch.no_grad():
+                log_w = torch.as_tensor(selector._sync_log_w()).unsqueeze(0)
+                log_w = _log_normalize_t(log_w + op.eta * torch.as_tensor(score, dtype=log_w.dtype))
+            selector._set_log_w(log_w.squeeze(0).detach().cpu().numpy())
+        elif isinstance(op, ReweightOperator):
+            with torch.no_grad():
+                w = torch.as_tensor(w_np).unsqueeze(0)
+                g = torch.zeros_like(w)
+                g[:] = torch.as_tensor(score, dtype=w.dtype)
+                w_new = op.apply_tensor(w, g)
+            selector.w = w_new.squeeze(0).detach().cpu().numpy()
+        else:
+            # untyped reweight callables run as-is on the host
+            selector.w = np.asarray(op(w_np, score), dtype=float)
+
+        reborn = selector.wealth < selector.rebirth_threshold
+        if reborn:
             selector.rebirth()
 
-        selector._enforce_invariants()
+        if reborn or not selector.log_weights:
+            selector._enforce_invariants()
+        return bool(reborn)
+
+    def run_sequence(self, selector, R, C, *, freeze: bool) -> dict:
+        """Run T steps from R (T, K) / C (T,) with one host copy at the end.
+
+        Steps run through the device-resident `step_state`. The per-step
+        states are only kept; their columns are concatenated on the device
+        once and copied to the host in one transfer. Frozen runs,
+        non-ExpReweight operators and selectors with rebirth hooks
+        (`has_rebirth_hooks`) take the per-step path instead.
+        """
+        R = np.asarray(R, dtype=float)
+        C = np.asarray(C, dtype=float)
+        if R.ndim != 2:
+            raise ValueError("R must be a 2D array of shape (T, K)")
+        T, K = R.shape
+        if C.shape != (T,):
+            raise ValueError(f"C must have shape ({T},)")
+        if selector.w is None:
+            selector.w = np.ones(K) / max(1, K)
+            selector.K = K
+        elif len(selector.w) != K:
+            raise ValueError(f"R has {K} columns but the selector has {len(selector.w)} weights")
+
+        if T == 0 or freeze or not isinstance(selector.reweight_fn, ExpReweight) or selector.has_rebirth_hooks():
+            return self._run_sequence_stepwise(selector, R, C, freeze=freeze)
+
+        device = self._resolve_device()
+        state = to_device_state(selector, device=device)
+        dtype = state.weights.dtype
+        beta = float(selector.stats.beta)
+        eta = selector.reweight_fn.eta
+        seed_var = float(selector.stats.seed_var)
+
+        with torch.no_grad():
+            R_t = torch.as_tensor(R, dtype=dtype, device=device)
+            C_t = torch.as_tensor(C, dtype=dtype, device=device)
+            states = []
+            for t in range(T):
+                state = self.step_state(state, R_t[t:t + 1], C_t[t:t + 1], beta=beta, eta=eta, seed_var=seed_var)
+                states.append(state)
+            # (T, 7 + K): one device concat per column, one host copy
+            packed = torch.cat(
+                [
+                    torch.cat([getattr(st, name) for st in states]).to(dtype)
+                    for name in _TRAJ_COLUMNS + ("reborn", "weights")
+                ],
+                dim=1,
+            ).cpu().numpy()
+
+        from_device_state(state, [selector])
+        selector._last_r = float(R[-1].sum())
+        selector._last_c = float(C[-1])
+        traj = {key: packed[:, j].copy() for j, key in enumerate(_TRAJ_KEYS)}
+        traj["rebirth"] = packed[:, len(_TRAJ_KEYS)] != 0.0
+        traj["weights"] = packed[:, len(_TRAJ_KEYS) + 1 :].copy()
+        return traj
+
+    def _run_sequence_stepwise(self, selector, R: np.ndarray, C: np.ndarray, *, freeze: bool) -> dict:
+        T, K = R.shape
+        traj = {key: np.empty(T) for key in _TRAJ_KEYS}
+        traj["weights"] = np.empty((T, K))
+        traj["rebirth"] = np.zeros(T, dtype=bool)
+        for t in range(T):
+            traj["rebirth"][t] = self._step(selector, R[t], float(C[t]), freeze=freeze)
+            traj["wealth"][t] = selector.wealth
+            for key in _TRAJ_KEYS[1:]:
+                traj[key][t] = getattr(selector.stats, key)
+            traj["weights"][t] = selector.w
+        return traj
+
+    def step_state(
+        self,
+        state: DeviceState,
+        r,
+        c,
+        *,
+        beta: float | torch.Tensor,
+        eta: float | torch.Tensor,
+        seed_var: float | torch.Tensor = 1.0,
+        freeze: bool = False,
+    ) -> DeviceState:
+        """Device-resident step: DeviceState + r (B, K) + c (B,) -> new DeviceState.
+
+        All state (weights, stats, drawdown, rebirth mask) stays on the state's
+        device; nothing is synchronised to the host. beta/eta/seed_var are
+        floats or per-lane tensors of shape (B, 1). If the state carries
+        log_weights, the update runs in the log domain (logsumexp). Rebirth
+        policies are not invoked here (object hooks need the CPU path).
+        """
+        w = state.weights
+        with torch.no_grad():
+            r = torch.as_tensor(r, dtype=w.dtype, device=w.device)
+            c = torch.as_tensor(c, dtype=w.dtype, device=w.device).reshape(-1, 1)
+            if r.shape != w.shape:
+                raise ValueError(f"r must have shape {tuple(w.shape)}")
+
+            if freeze:
+                log_w = state.log_weights
+                if log_w is not None:
+                    log_w = _log_normalize_t(log_w)
+                return DeviceState(
+                    weights=_simplex_normalize_t(w) if log_w is None else torch.exp(log_w),
+                    wealth=state.wealth,
+                    mean=state.mean,
+                    var=state.var,
+                    drawdown=state.drawdown,
+                    cum_pi=state.cum_pi,
+                    peak_cum_pi=state.peak_cum_pi,
+                    rebirth_threshold=state.rebirth_threshold,
+                    reborn=torch.zeros_like(state.wealth, dtype=torch.bool),
+                    log_weights=log_w,
+                )
+
+            pi_total = r.sum(dim=1, keepdim=True) - c
+            pi_vec = r - w * c
+            wealth = state.wealth + pi_total
+
+            # EWMAStats.update
+            mean = (1 - beta) * state.mean + beta * pi_total
+            var = torch.clamp((1 - beta) * state.var + beta * (pi_total - state.mean) ** 2, min=0.0)
+            cum_pi = state.cum_pi + pi_total
+            peak_cum_pi = torch.maximum(state.peak_cum_pi, cum_pi)
+            drawdown = peak_cum_pi - cum_pi
+
+            log_w = state.log_weights
+            if log_w is not None:
+                log_w = _log_normalize_t(log_w + eta * (pi_vec - mean))
+            else:
+                w_new = _simplex_normalize_t(w * torch.exp(eta * (pi_vec - mean)))
+
+            # rebirth (masked per lane)
+            thr = state.rebirth_threshold
+            reborn = wealth < thr
+            wealth = torch.where(reborn, torch.maximum(wealth, thr), wealth)
+            if log_w is not None:
+                # log w stays authoritative: w is derived from it, not renormalised apart
+                log_w = torch.where(reborn, torch.full_like(log_w, -float(np.log(log_w.shape[1]))), log_w)
+                w_new = torch.exp(log_w)
+            else:
+                w_new = _simplex_normalize_t(torch.where(reborn, torch.ones_like(w_new) / w_new.shape[1], w_new))
+            mean = torch.where(reborn, torch.zeros_like(mean), mean)
+            var = torch.where(reborn, torch.as_tensor(seed_var, dtype=w.dtype, device=w.device).expand_as(var), var)
+            drawdown = torch.where(reborn, torch.zeros_like(drawdown), drawdown)
+            cum_pi = torch.where(reborn, torch.zeros_like(cum_pi), cum_pi)
+            peak_cum_pi = torch.where(reborn, torch.zeros_like(peak_cum_pi), peak_cum_pi)
+
+        return DeviceState(
+            weights=w_new,
+            wealth=wealth,
+            mean=mean,
+            var=var,
+            drawdown=drawdown,
+            cum_pi=cum_pi,
+            peak_cum_pi=peak_cum_pi,
+            rebirth_threshold=thr,
+            reborn=reborn,
+            log_weights=log_w,
+        )
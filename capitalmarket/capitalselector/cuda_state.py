@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict
 import numpy as np
-import torch
+
+if TYPE_CHECKING:  # torch is imported lazily by the functions that need it
+    import torch
 
 
 @dataclass(frozen=True)
@@ -26,6 +28,10 @@ class DeviceState:
     cum_pi: torch.Tensor
     peak_cum_pi: torch.Tensor
     rebirth_threshold: torch.Tensor
+    # rebirth mask of the step that produced this state (None before any step)
+    reborn: torch.Tensor | None = None
+    # log-domain weights (B, K); source of truth for the EG update when set
+    log_weights: torch.Tensor | None = None
 
     def to(self, device: str | torch.device) -> "DeviceState":
         return DeviceState(
@@ -37,6 +43,8 @@ class DeviceState:
             cum_pi=self.cum_pi.to(device),
             peak_cum_pi=self.peak_cum_pi.to(device),
             rebirth_threshold=self.rebirth_threshold.to(device),
+            reborn=None if self.reborn is None else self.reborn.to(device),
+            log_weights=None if self.log_weights is None else self.log_weights.to(device),
         )
 
     def to_cpu(self) -> "DeviceState":
@@ -45,6 +53,8 @@ class DeviceState:
 
 def to_device_state(selector, *, device: str | torch.device = "cpu", dtype: torch.dtype | None = None) -> DeviceState:
     """CPU selector -> DeviceState with batch dimension B=1."""
+    import torch
+
     if selector.w is None:
         raise ValueError("selector.w must be initialized before to_device_state()")
 
@@ -57,8 +67,13 @@ def to_device_state(selector, *, device: str | torch.device = "cpu", dtype: torc
         t = torch.as_tensor(np.array(val), device=device, dtype=base_dtype)
         return t.reshape(1, 1)
 
+    log_w_t = None
+    if getattr(selector, "log_weights", False):
+        log_w_t = torch.as_tensor(selector._sync_log_w(), device=device).to(dtype=base_dtype).unsqueeze(0)
+
     return DeviceState(
         weights=w_t,
+        log_weights=log_w_t,
         wealth=_scalar(float(selector.wealth)),
         mean=_scalar(float(selector.stats.mu)),
         var=_scalar(float(selector.stats.var)),
@@ -69,15 +84,75 @@ def to_device_state(selector, *, device: str | torch.device = "cpu", dtype: torc
     )
 
 
+def to_device_state_batch(
+    selectors,
+    *,
+    device: str | torch.device = "cpu",
+    dtype: torch.dtype | None = None,
+) -> DeviceState:
+    """CPU selectors (same K) -> DeviceState with batch dimension B=len(selectors)."""
+    import torch
+
+    if len(selectors) == 0:
+        raise ValueError("Need at least one selector")
+    states = [to_device_state(s, device=device, dtype=dtype) for s in selectors]
+    if len({st.weights.shape[1] for st in states}) != 1:
+        raise ValueError("All selectors must share the same K")
+
+    def _cat(name: str) -> torch.Tensor:
+        return torch.cat([getattr(st, name) for st in states], dim=0)
+
+    return DeviceState(
+        weights=_cat("weights"),
+        wealth=_cat("wealth"),
+        mean=_cat("mean"),
+        var=_cat("var"),
+        drawdown=_cat("drawdown"),
+        cum_pi=_cat("cum_pi"),
+        peak_cum_pi=_cat("peak_cum_pi"),
+        rebirth_threshold=_cat("rebirth_threshold"),
+        log_weights=None if any(st.log_weights is None for st in states) else _cat("log_weights"),
+    )
+
+
+def from_device_state(state: DeviceState, selectors) -> None:
+    """Host sync: write a DeviceState back into CPU selectors (lane b -> selectors[b]).
+
+    `_last_r`/`_last_c` are not part of DeviceState and are left untouched.
+    """
+    host = state.to_cpu()
+    if host.weights.shape[0] != len(selectors):
+        raise ValueError("Need exactly one selector per batch lane")
+    weights = host.weights.detach().numpy()
+    cols = {
+        name: getattr(host, name).detach().reshape(-1).numpy()
+        for name in ("wealth", "mean", "var", "drawdown", "cum_pi", "peak_cum_pi", "rebirth_threshold")
+    }
+    log_weights = None if host.log_weights is None else host.log_weights.detach().numpy()
+    for b, selector in enumerate(selectors):
+        selector.w = np.array(weights[b], dtype=float)
+        if log_weights is not None and getattr(selector, "log_weights", False):
+            selector._set_log_w(np.array(log_weights[b], dtype=float), selector.w)
+        selector.K = int(weights.shape[1])
+        selector.wealth = float(cols["wealth"][b])
+        selector.rebirth_threshold = float(cols["rebirth_threshold"][b])
+        selector.stats.mu = float(cols["mean"][b])
+        selector.stats.var = float(cols["var"][b])
+        selector.stats.dd = float(cols["drawdown"][b])
+        selector.stats.cum_pi = float(cols["cum_pi"][b])
+        selector.stats.peak_cum_pi = float(cols["peak_cum_pi"][b])
+
+
 def canonical_state_dump(
     selector,
     *,
     stack_manager: Any | None = None,
     sediment: Any | None = None,
+    broker: Any | None = None,
 ) -> Dict[str, Any]:
     """Return a canonical, next-step-sufficient dump for test equivalence."""
     stats = selector.stats
-    return {
+    dump = {
         "selector": {
             "wealth": float(selector.wealth),
             "rebirth_threshold": float(selector.rebirth_threshold),
@@ -99,6 +174,10 @@ def canonical_state_dump(
         "stack_manager": _dump_stack_manager(stack_manager),
         "sediment": _dump_sediment(sediment),
     }
+    if broker is not None:
+        # host-only section (toCuda/fromCuda do not carry it)
+        dump["broker"] = _dump_broker(broker)
+    return dump
 
 
 def _dump_stack_manager(stack_manager: Any | None) -> Dict[str, Any] | None:
@@ -154,6 +233,10 @@ def _dump_stack_manager(stack_manager: Any | None) -> Dict[str, Any] | None:
     }
 
 
+def _dump_broker(broker: Any) -> Dict[str, Any]:
+    return {name: arr.tolist() for name, arr in broker.state_dict().items()}
+
+
 def _dump_sediment(sediment: Any | None) -> Dict[str, Any] | None:
     if sediment is None:
         return None
@@ -180,6 +263,8 @@ def _dump_sediment(sediment: Any | None) -> Dict[str, Any] | None:
 
 def toCuda(state_dump: Dict[str, Any], device: str, dtype: torch.dtype | None = None) -> CudaState:
     """CPU/Python -> CUDA tensor representation. No semantic changes."""
+    import torch
+
     selector = state_dump["selector"]
     stats = state_dump["stats"]
 
@@ -4,10 +4,10 @@ from typing import Any, Dict, List
 import numpy as np
 
 from ..builder import CapitalSelectorBuilder
-from ..interfaces import validate_world_output
 from ..stack import StackManager
 from ..cuda_state import canonical_state_dump
 from ..worlds.deterministic_cluster_world import DeterministicClusterWorld
+from .selector_steps import iter_selector_steps
 from .topology_activation import topology_enabled, ensure_topology_state, update_topology_state
 
 
@@ -17,31 +17,18 @@ def run_g3_4_10_stack_trigger(steps: int = 500, enable_topology: bool | None = N
     stack_manager = StackManager(world_id="cluster", phase_id="G3_4_10", run_id="run_0")
 
     rebirth_count = {"n": 0}
-    original_rebirth = selector.rebirth
-
-    def _rebirth_wrapper():
-        rebirth_count["n"] += 1
-        return original_rebirth()
-
-    selector.rebirth = _rebirth_wrapper  # test/experiment hook
 
     dumps: Dict[int, Any] = {}
     dumps[0] = canonical_state_dump(selector, stack_manager=stack_manager, sediment=stack_manager.sediment)
 
     observables: List[Dict[str, Any]] = []
     topology_state: Dict[str, object] = {}
-    for t in range(int(steps)):
-        out = world.step(t)
-        r_vec, c_total = validate_world_output(out)
-        if selector.w is None or len(selector.w) != len(r_vec):
-            selector.w = np.ones(len(r_vec)) / max(1, len(r_vec))
-            selector.K = len(r_vec)
-        selector.feedback_vector(r_vec, c_total, trace=None, freeze=False)
+    for t, r_vec, wealth, w, reborn in iter_selector_steps(selector, world, int(steps)):
+        rebirth_count["n"] += reborn
         if topology_enabled(enable_topology):
             ensure_topology_state(topology_state, len(r_vec))
             update_topology_state(topology_state, r_vec, stack_manager)
 
-        w = selector.w
         if w is None:
             weight_entropy = 0.0
             dominant_channel = None
@@ -56,7 +43,7 @@ def run_g3_4_10_stack_trigger(steps: int = 500, enable_topology: bool | None = N
 
         observables.append(
             {
-                "wealth": float(selector.wealth),
+                "wealth": wealth,
                 "dominant_channel": dominant_channel,
                 "stack_count": len(stack_manager.stacks),
                 "rebirth_count": int(rebirth_count["n"]),
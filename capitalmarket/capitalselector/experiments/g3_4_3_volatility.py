@@ -4,8 +4,8 @@ from typing import Any, Dict, Iterable, List
 import numpy as np
 
 from ..builder import CapitalSelectorBuilder
-from ..interfaces import validate_world_output
 from ..stack import StackManager
+from .selector_steps import iter_selector_steps
 from .topology_activation import topology_enabled, ensure_topology_state, update_topology_state
 from ..cuda_state import canonical_state_dump
 from ..worlds.regime_switch_bandit_world import RegimeSwitchBanditWorld, VolatilityRegimeBanditWorld
@@ -16,13 +16,6 @@ def _run_world(world, *, steps: int, run_id: str, enable_topology: bool | None =
     stack_manager = StackManager(world_id="regime", phase_id="G3_4_3", run_id=run_id)
 
     rebirth_count = {"n": 0}
-    original_rebirth = selector.rebirth
-
-    def _rebirth_wrapper():
-        rebirth_count["n"] += 1
-        return original_rebirth()
-
-    selector.rebirth = _rebirth_wrapper  # test/experiment hook
 
     dumps: Dict[int, Any] = {}
     dumps[0] = canonical_state_dump(selector, stack_manager=stack_manager, sediment=stack_manager.sediment)
@@ -30,19 +23,13 @@ def _run_world(world, *, steps: int, run_id: str, enable_topology: bool | None =
     observables: List[Dict[str, Any]] = []
     r_seq: List[np.ndarray] = []
     topology_state: Dict[str, object] = {}
-    for t in range(int(steps)):
-        out = world.step(t)
-        r_vec, c_total = validate_world_output(out)
+    for t, r_vec, wealth, w, reborn in iter_selector_steps(selector, world, int(steps)):
         r_seq.append(np.asarray(r_vec, dtype=float))
-        if selector.w is None or len(selector.w) != len(r_vec):
-            selector.w = np.ones(len(r_vec)) / max(1, len(r_vec))
-            selector.K = len(r_vec)
-        selector.feedback_vector(r_vec, c_total, trace=None, freeze=False)
+        rebirth_count["n"] += reborn
         if topology_enabled(enable_topology):
             ensure_topology_state(topology_state, len(r_vec))
             update_topology_state(topology_state, r_vec, stack_manager)
 
-        w = selector.w
         if w is None:
             weight_entropy = 0.0
             dominant_channel = None
@@ -57,7 +44,7 @@ def _run_world(world, *, steps: int, run_id: str, enable_topology: bool | None =
 
         observables.append(
             {
-                "wealth": float(selector.wealth),
+                "wealth": wealth,
                 "dominant_channel": dominant_channel,
                 "stack_count": len(stack_manager.stacks),
                 "rebirth_count": int(rebirth_count["n"]),
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+import numpy as np
+
+from ..core import CapitalSelector
+from ..interfaces import World, iter_world_blocks
+
+
+def iter_selector_steps(
+    selector: CapitalSelector, world: World, steps: int, *, block: int = 1024
+) -> Iterator[tuple[int, np.ndarray, float, np.ndarray, bool]]:
+    """Step `selector` through `world` and yield (t, r_vec, wealth, w, reborn).
+
+    The world is sampled in blocks that run through `selector.run_sequence`;
+    the yielded wealth / weights are the post-step state of step t and
+    `reborn` its rebirth flag. Same trajectory as calling
+    `feedback_vector(r_vec, c_total)` per step (weights reset to uniform
+    whenever the number of channels changes), so per-step observers only
+    need the yielded values, not the selector itself.
+    """
+    for b0, R, C in iter_world_blocks(world, 0, int(steps), block=block):
+        K = R.shape[1]
+        if selector.w is None or len(selector.w) != K:
+            selector.w = np.ones(K) / max(1, K)
+            selector.K = K
+        traj = selector.run_sequence(R, C)
+        wealth, weights, rebirth = traj["wealth"], traj["weights"], traj["rebirth"]
+        for i in range(len(C)):
+            yield b0 + i, R[i], float(wealth[i]), weights[i], bool(rebirth[i])
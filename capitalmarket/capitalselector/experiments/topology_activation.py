@@ -54,9 +54,7 @@ def update_topology_state(state: Dict[str, object], r_vec, stack_manager: StackM
 
     broker.update_correlations(base_channels.keys())
 
-    for st in list(stack_manager.stacks.values()):
-        if isinstance(st, StackChannel):
-            st.step(1.0)
+    stack_manager.step_stacks({sid: 1.0 for sid, st in stack_manager.stacks.items() if isinstance(st, StackChannel)})
 
     stack_manager.maintain(channels)
     stack_manager.try_form_stack(broker, channels)
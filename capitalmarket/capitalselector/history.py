@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+import os
+import tempfile
+
+import numpy as np
+
+
+HISTORY_FIELDS = ("wealth", "kind", "mu", "var", "dd", "cum_pi", "peak_cum_pi", "weights")
+
+_INITIAL_ROWS = 1024
+
+
+def _read_scalar(selector, name: str) -> float:
+    if name == "wealth":
+        return selector.wealth
+    return getattr(selector.stats, name)
+
+
+class HistoryRecorder:
+    """Columnar per-step selector history (replaces a list of `state()` dicts).
+
+    Columns are preallocated NumPy arrays: one float64 column per scalar field,
+    an int16 code column for `kind` and a (rows, K) float64 block for the
+    weights. Only every `stride`-th step is recorded (t % stride == 0).
+
+    With `spill_dir`, columns whose allocation reaches `spill_threshold_bytes`
+    are memory-mapped `.npy` files instead of RAM. Each recorder writes into
+    its own fresh subdirectory of `spill_dir` (`spill_path`), so recorders
+    sharing a `spill_dir` do not overwrite each other.
+    """
+
+    def __init__(
+        self,
+        *,
+        fields: Iterable[str] | None = None,
+        stride: int = 1,
+        capacity: int | None = None,
+        spill_dir: str | Path | None = None,
+        spill_threshold_bytes: int = 256 * 2**20,
+    ):
+        self.fields = tuple(HISTORY_FIELDS if fields is None else fields)
+        unknown = set(self.fields) - set(HISTORY_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown history fields: {sorted(unknown)}")
+        if int(stride) < 1:
+            raise ValueError("stride must be >= 1")
+        self.stride = int(stride)
+        self.capacity = None if capacity is None else int(capacity)
+        self.spill_dir = None if spill_dir is None else Path(spill_dir)
+        self.spill_threshold_bytes = int(spill_threshold_bytes)
+        self.spill_path: Path | None = None
+
+        self.K: int | None = None
+        self.kinds: List[str] = []
+        self._kind_codes: Dict[str, int] = {}
+        self._cols: Dict[str, np.ndarray] = {}
+        self._rows = 0
+        self._n = 0
+
+    # ---------- Recording ----------
+
+    def begin(self, steps: int) -> None:
+        """Announce the horizon so columns are allocated once at full size.
+
+        A recorder holds one run: raises ValueError if rows were recorded.
+        """
+        if self._n:
+            raise ValueError("HistoryRecorder already holds a run; pass a fresh recorder")
+        if self.capacity is None:
+            self.capacity = -(-int(steps) // self.stride)
+
+    def record(self, t: int, selector) -> bool:
+        """Record the selector state at step t; returns False if decimated."""
+        if t % self.stride:
+            return False
+        if self._n == self._rows:
+            self._grow(selector.w)
+        i = self._n
+        cols = self._cols
+        cols["t"][i] = t
+        for name in self.fields:
+            if name == "kind":
+                cols["kind"][i] = self._kind_code(selector.kind)
+            elif name == "weights":
+                cols["weights"][i] = self._weights_of(selector)
+            else:
+                cols[name][i] = _read_scalar(selector, name)
+        self._n += 1
+        return True
+
+    def record_block(self, t0: int, traj: Dict[str, np.ndarray], kind: str) -> int:
+        """Record rows of a `run_sequence` trajectory that started at step t0.
+
+        Row i is the state after step t0 + i; only steps with t % stride == 0
+        are kept, as with `record`. `kind` is the selector kind for the whole
+        block. Returns the number of rows recorded.
+        """
+        T = len(traj["wealth"])
+        idx = np.arange((-int(t0)) % self.stride, T, self.stride)
+        n = len(idx)
+        if n == 0:
+            return 0
+        while self._n + n > self._rows:
+            self._grow(traj["weights"][0])
+        i, j = self._n, self._n + n
+        cols = self._cols
+        cols["t"][i:j] = int(t0) + idx
+        for name in self.fields:
+            if name == "kind":
+                cols["kind"][i:j] = self._kind_code(kind)
+            elif name == "weights":
+                if traj["weights"].shape[1] != self.K:
+                    raise ValueError(f"selector weights must have length K={self.K} while recording")
+                cols["weights"][i:j] = traj["weights"][idx]
+            else:
+                cols[name][i:j] = traj[name][idx]
+        self._n = j
+        return n
+
+    def _kind_code(self, kind: str) -> int:
+        code = self._kind_codes.get(kind)
+        if code is None:
+            code = self._kind_codes[kind] = len(self.kinds)
+            self.kinds.append(kind)
+        return code
+
+    def _weights_of(self, selector) -> np.ndarray:
+        w = selector.w
+        if w is None or len(w) != self.K:
+            raise ValueError(f"selector weights must have length K={self.K} while recording")
+        return w
+
+    # ---------- Storage ----------
+
+    def _column_specs(self, w):
+        specs = {"t": ((), np.int64)}
+        for name in self.fields:
+            if name == "kind":
+                specs[name] = ((), np.int16)
+            elif name == "weights":
+                if self.K is None:
+                    if w is None:
+                        raise ValueError("selector.w must be initialized before recording weights")
+                    self.K = len(w)
+                specs[name] = ((self.K,), np.float64)
+            else:
+                specs[name] = ((), np.float64)
+        return specs
+
+    def _grow(self, w) -> None:
+        if self._rows == 0:
+            rows = self.capacity or _INITIAL_ROWS
+        else:
+            rows = 2 * self._rows
+        for name, (tail, dtype) in self._column_specs(w).items():
+            new = self._allocate(name, (rows,) + tail, dtype)
+            old = self._cols.get(name)
+            if old is not None:
+                new[: self._n] = old[: self._n]
+            self._cols[name] = new
+        self._rows = rows
+
+    def _allocate(self, name: str, shape, dtype) -> np.ndarray:
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if self.spill_dir is None or nbytes < self.spill_threshold_bytes:
+            return np.empty(shape, dtype=dtype)
+        if self.spill_path is None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            self.spill_path = Path(tempfile.mkdtemp(prefix="history-", dir=self.spill_dir))
+        path = self.spill_path / f"{name}.npy"
+        if name in self._cols:
+            # growing a spilled column: map the new size next to the old file
+            tmp = self.spill_path / f"{name}.grow.npy"
+            arr = np.lib.format.open_memmap(tmp, mode="w+", dtype=dtype, shape=shape)
+            os.replace(tmp, path)
+            return arr
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+    def flush(self) -> None:
+        """Flush memory-mapped columns to disk."""
+        for arr in self._cols.values():
+            if isinstance(arr, np.memmap):
+                arr.flush()
+
+    @property
+    def spilled(self) -> bool:
+        return any(isinstance(arr, np.memmap) for arr in self._cols.values())
+
+    # ---------- Access ----------
+
+    def __len__(self) -> int:
+        return self._n
+
+    def column(self, name: str) -> np.ndarray:
+        """Recorded rows of one column (a view; `t` holds the step indices)."""
+        if name != "t" and name not in self.fields:
+            raise KeyError(name)
+        if name not in self._cols:
+            return np.empty((0, self.K or 0) if name == "weights" else (0,))
+        return self._cols[name][: self._n]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.column(name)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Row i in the `CapitalSelector.state()` layout."""
+        if not -self._n <= i < self._n:
+            raise IndexError("history index out of range")
+        i %= self._n
+        out: Dict[str, Any] = {}
+        for name in HISTORY_FIELDS:
+            if name not in self.fields:
+                continue
+            if name == "kind":
+                out[name] = self.kinds[int(self._cols["kind"][i])]
+            elif name == "weights":
+                out[name] = np.array(self._cols["weights"][i])
+            else:
+                out[name] = float(self._cols[name][i])
+        return out
+
+    def as_dicts(self) -> "HistoryView":
+        return HistoryView(self)
+
+
+class HistoryView(Sequence):
+    """Read-only list-of-dicts view over a HistoryRecorder (built per access)."""
+
+    def __init__(self, recorder: HistoryRecorder):
+        self._rec = recorder
+
+    def __len__(self) -> int:
+        return len(self._rec)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._rec.row(j) for j in range(*i.indices(len(self)))]
+        return self._rec.row(int(i))
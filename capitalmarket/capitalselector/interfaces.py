@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Protocol, Dict, Any
+from typing import Protocol, Dict, Any, Iterator
 import numpy as np
 
 
@@ -14,6 +14,17 @@ class World(Protocol):
         ...
 
 
+class BlockWorld(World, Protocol):
+    """World with an optional vectorised block contract.
+
+    Contract: step_block(t0, n) -> (R: (n, K) float, C: (n,) float), equal to
+    n sequential step(t0), ..., step(t0 + n - 1) calls (same RNG consumption).
+    """
+
+    def step_block(self, t0: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        ...
+
+
 class Curriculum(Protocol):
     """Curriculum provides a sequence of worlds (state-agnostic)."""
 
@@ -40,3 +51,57 @@ def validate_world_output(out: Dict[str, Any]) -> tuple[np.ndarray, float]:
     if r.ndim != 1:
         raise ValueError("World r must be a 1D array")
     return r, c
+
+
+def validate_world_block(R: Any, C: Any, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Validate and normalize World.step_block output (R: (n, K), C: (n,))."""
+    R = np.asarray(R, dtype=float)
+    C = np.asarray(C, dtype=float)
+    if R.ndim != 2 or R.shape[0] != int(n):
+        raise ValueError(f"World step_block R must have shape ({n}, K)")
+    if C.shape != (int(n),):
+        raise ValueError(f"World step_block C must have shape ({n},)")
+    return R, C
+
+
+def iter_world_blocks(world: World, t0: int, t1: int, *, block: int = 1024) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+    """Yield (b0, R, C) blocks covering t0 <= t < t1 (R: (n, K), C: (n,)).
+
+    Worlds with `step_block` are sampled `block` steps at a time; others are
+    stepped and stacked, with a new block wherever the length of r changes.
+    """
+    step_block = getattr(world, "step_block", None)
+    if step_block is not None:
+        for b0 in range(int(t0), int(t1), int(block)):
+            n = min(int(block), int(t1) - b0)
+            yield b0, *validate_world_block(*step_block(b0, n), n)
+        return
+    b0, rs, cs = int(t0), [], []
+    for t in range(int(t0), int(t1)):
+        r_vec, c_total = validate_world_output(world.step(t))
+        if rs and (len(r_vec) != len(rs[0]) or len(rs) == int(block)):
+            yield b0, np.stack(rs), np.array(cs)
+            b0, rs, cs = t, [], []
+        rs.append(r_vec)
+        cs.append(c_total)
+    if rs:
+        yield b0, np.stack(rs), np.array(cs)
+
+
+def iter_world(world: World, t0: int, t1: int, *, block: int = 1024) -> Iterator[tuple[int, np.ndarray, float]]:
+    """Yield (t, r_vec, c_total) for t0 <= t < t1.
+
+    Worlds with `step_block` are sampled `block` steps at a time (so the world
+    runs ahead of the consumer by up to block - 1 steps); others via `step`.
+    """
+    step_block = getattr(world, "step_block", None)
+    if step_block is None:
+        for t in range(int(t0), int(t1)):
+            r_vec, c_total = validate_world_output(world.step(t))
+            yield t, r_vec, c_total
+        return
+    for b0 in range(int(t0), int(t1), int(block)):
+        n = min(int(block), int(t1) - b0)
+        R, C = validate_world_block(*step_block(b0, n), n)
+        for i in range(n):
+            yield b0 + i, R[i], float(C[i])
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+
+_QUANTILE_METHODS = ("sa", "p2")
+
+
+class QuantileBank:
+    """Tail quantiles at several levels for many explorers, updated batch-wise.
+
+    State is (rows, L) for L levels. Each update feeds one observation per
+    given row. Two estimators:
+
+    - "sa": the EWMAQuantile rule q <- q + eta * (alpha - I[x < q]) per level
+    - "p2": the P^2 estimator (Jain & Chlamtac), five markers per level;
+      tracks the quantile of the whole history without storing it
+
+    Next to q, every level keeps the broker's cvar proxy
+    cvar <- (1 - beta_cvar) cvar + beta_cvar * min(x - q, 0).
+    """
+
+    def __init__(self, levels: Iterable[float], *, method: str = "sa", eta: float = 0.02, beta_cvar: float = 0.1):
+        self.levels = np.asarray(tuple(levels), dtype=float)
+        if self.levels.ndim != 1 or len(self.levels) == 0:
+            raise ValueError("levels must be a non-empty sequence")
+        if np.any((self.levels <= 0.0) | (self.levels >= 1.0)):
+            raise ValueError("levels must lie in (0, 1)")
+        if method not in _QUANTILE_METHODS:
+            raise ValueError(f"Unsupported quantile method: {method}")
+        self.method = method
+        self.eta = float(eta)
+        self.beta_cvar = float(beta_cvar)
+
+        L = len(self.levels)
+        self.q = np.zeros((0, L))
+        self.cvar = np.zeros((0, L))
+        if method == "p2":
+            p = self.levels[:, None]
+            # marker heights, actual and desired positions (0-based), per (row, level)
+            self._heights = np.zeros((0, L, 5))
+            self._pos = np.zeros((0, L, 5))
+            self._want = np.zeros((0, L, 5))
+            self._count = np.zeros(0, dtype=np.int64)
+            self._want0 = np.hstack([np.zeros_like(p), 2 * p, 4 * p, 2 + 2 * p, np.full_like(p, 4.0)])
+            self._dwant = np.hstack([np.zeros_like(p), p / 2, p, (1 + p) / 2, np.ones_like(p)])
+
+    def __len__(self) -> int:
+        return len(self.q)
+
+    def level_index(self, levels: Iterable[float]) -> np.ndarray:
+        """Positions of the given levels in `levels` (must match exactly)."""
+        out = []
+        for level in levels:
+            hit = np.flatnonzero(self.levels == float(level))
+            if len(hit) == 0:
+                raise ValueError(f"Level {level} is not tracked (levels: {self.levels.tolist()})")
+            out.append(int(hit[0]))
+        return np.asarray(out, dtype=np.intp)
+
+    # ---------- Storage ----------
+
+    def grow(self, rows: int) -> None:
+        """Extend to `rows` rows; new rows start at q = cvar = 0 (no history)."""
+        old = len(self.q)
+        if rows <= old:
+            return
+        L = len(self.levels)
+        self.q = np.concatenate([self.q, np.zeros((rows - old, L))])
+        self.cvar = np.concatenate([self.cvar, np.zeros((rows - old, L))])
+        if self.method == "p2":
+            new = rows - old
+            self._heights = np.concatenate([self._heights, np.full((new, L, 5), np.inf)])
+            self._pos = np.concatenate([self._pos, np.broadcast_to(np.arange(5.0), (new, L, 5))])
+            self._want = np.concatenate([self._want, np.broadcast_to(self._want0, (new, L, 5))])
+            self._count = np.concatenate([self._count, np.zeros(new, dtype=np.int64)])
+
+    def state(self, rows: int) -> Dict[str, np.ndarray]:
+        """Arrays of the first `rows` rows (see `restore`)."""
+        out = {"q": self.q[:rows], "cvar": self.cvar[:rows]}
+        if self.method == "p2":
+            out.update(heights=self._heights[:rows], pos=self._pos[:rows], want=self._want[:rows], count=self._count[:rows])
+        return out
+
+    def restore(self, state: Dict[str, np.ndarray]) -> None:
+        """Replace all rows by a `state` dump (same levels and method)."""
+        self.q = np.array(state["q"], dtype=float)
+        self.cvar = np.array(state["cvar"], dtype=float)
+        if self.q.shape[1:] != self.levels.shape:
+            raise ValueError("quantile state does not match the bank levels")
+        if self.method == "p2":
+            self._heights = np.array(state["heights"], dtype=float)
+            self._pos = np.array(state["pos"], dtype=float)
+            self._want = np.array(state["want"], dtype=float)
+            self._count = np.array(state["count"], dtype=np.int64)
+
+    # ---------- Update ----------
+
+    def update(self, rows: np.ndarray, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Feed x[k] to row rows[k] (rows unique); returns the new (q, cvar) rows."""
+        rows = np.asarray(rows, dtype=np.intp)
+        x = np.asarray(x, dtype=float)
+        if self.method == "sa":
+            q = self.q[rows]
+            q = q + self.eta * (self.levels - np.where(x[:, None] < q, 1.0, 0.0))
+        else:
+            q = self._update_p2(rows, x)
+        self.q[rows] = q
+        loss = np.minimum(x[:, None] - q, 0.0)
+        cvar = (1 - self.beta_cvar) * self.cvar[rows] + self.beta_cvar * loss
+        self.cvar[rows] = cvar
+        return q, cvar
+
+    def _update_p2(self, rows: np.ndarray, x: np.ndarray) -> np.ndarray:
+        count = self._count[rows]
+        q = np.empty((len(rows), len(self.levels)))
+
+        # warm-up: the first five observations are kept sorted as the markers
+        warm = count < 5
+        if warm.any():
+            wr = rows[warm]
+            h = self._heights[wr]
+            h[:, :, 4] = x[warm, None]
+            h.sort(axis=2)
+            self._heights[wr] = h
+            seen = count[warm] + 1
+            # sample quantile of what has been seen so far
+            pick = np.floor(self.levels[None, :] * (seen[:, None] - 1)).astype(np.intp)
+            q[warm] = np.take_along_axis(h, pick[:, :, None], axis=2)[:, :, 0]
+            q[warm] = np.where(seen[:, None] == 5, h[:, :, 2], q[warm])
+
+        run = ~warm
+        if run.any():
+            rr = rows[run]
+            xr = x[run, None]
+            h, pos, want = self._heights[rr], self._pos[rr], self._want[rr]
+
+            # cell of x: markers above it shift right; the extremes absorb x
+            pos[:, :, 1:4] += xr[:, :, None] < h[:, :, 1:4]
+            pos[:, :, 4] += 1.0
+            h[:, :, 0] = np.minimum(h[:, :, 0], xr)
+            h[:, :, 4] = np.maximum(h[:, :, 4], xr)
+            want += self._dwant
+
+            for i in (1, 2, 3):
+                qi, qm, qp = h[:, :, i], h[:, :, i - 1], h[:, :, i + 1]
+                ni, nm, npl = pos[:, :, i], pos[:, :, i - 1], pos[:, :, i + 1]
+                d = want[:, :, i] - ni
+                up = (d >= 1.0) & (npl - ni > 1.0)
+                down = (d <= -1.0) & (nm - ni < -1.0)
+                move = up | down
+                if not move.any():
+                    continue
+                s = np.where(up, 1.0, -1.0)
+                parabolic = qi + s / (npl - nm) * (
+                    (ni - nm + s) * (qp - qi) / (npl - ni) + (npl - ni - s) * (qi - qm) / (ni - nm)
+                )
+                linear = qi + s * (np.where(up, qp, qm) - qi) / (np.where(up, npl, nm) - ni)
+                adjusted = np.where((qm < parabolic) & (parabolic < qp), parabolic, linear)
+                h[:, :, i] = np.where(move, adjusted, qi)
+                pos[:, :, i] = ni + np.where(move, s, 0.0)
+
+            self._heights[rr], self._pos[rr], self._want[rr] = h, pos, want
+            q[run] = h[:, :, 2]
+
+        self._count[rows] = count + 1
+        return q
@@ -1,17 +1,126 @@
+from abc import ABC, abstractmethod
+
 import numpy as np
 
-def simplex_normalize(w: np.ndarray) -> np.ndarray:
-    w = np.clip(w, 0.0, None)
-    s = w.sum()
+def simplex_normalize(w: np.ndarray, *, out: np.ndarray | None = None) -> np.ndarray:
+    """Project onto the simplex (clip at 0, renormalize; uniform if sum is 0).
+
+    With `out`, the result is written into that buffer (may alias w).
+    """
+    if out is None:
+        w = np.clip(w, 0.0, None)
+        s = w.sum()
+        if s == 0:
+            return np.ones_like(w) / len(w)
+        return w / s
+    np.clip(w, 0.0, None, out=out)
+    s = out.sum()
     if s == 0:
-        return np.ones_like(w) / len(w)
-    return w / s
+        out.fill(1.0 / len(out))
+        return out
+    return np.divide(out, s, out=out)
 
-def exp_reweight(w: np.ndarray, score: np.ndarray, eta: float) -> np.ndarray:
+def exp_reweight(
+    w: np.ndarray,
+    score: np.ndarray,
+    eta: float,
+    *,
+    out: np.ndarray | None = None,
+    work: np.ndarray | None = None,
+) -> np.ndarray:
     """Exponentiated gradient update on simplex.
 
     score is a per-channel vector. If a scalar is provided, it is broadcast.
+    With `out` (may alias w) and a scratch `work` buffer of w's shape (must
+    not alias w or out), no temporaries are allocated.
     """
-    g = np.zeros_like(w)
+    if out is None:
+        g = np.zeros_like(w)
+        g[:] = score
+        return simplex_normalize(w * np.exp(eta * g))
+    g = np.empty_like(w) if work is None else work
     g[:] = score
-    return simplex_normalize(w * np.exp(eta * g))
+    np.multiply(g, eta, out=g)
+    np.exp(g, out=g)
+    np.multiply(w, g, out=out)
+    return simplex_normalize(out, out=out)
+
+def exp_reweight_normalize(
+    w: np.ndarray,
+    score: np.ndarray,
+    eta: float,
+    *,
+    out: np.ndarray,
+    work: np.ndarray | None = None,
+) -> np.ndarray:
+    """Fused hot-path kernel: exp_reweight followed by the invariant projection.
+
+    Equals `simplex_normalize(exp_reweight(w, score, eta))` bit-for-bit, but
+    runs entirely in the caller-supplied buffers.
+    """
+    exp_reweight(w, score, eta, out=out, work=work)
+    return simplex_normalize(out, out=out)
+
+
+class ReweightOperator(ABC):
+    """Typed reweight rule attached to selectors by the builder.
+
+    Backends dispatch on the operator object instead of introspecting
+    closures: `__call__` is the numpy rule for one selector (w, score of
+    shape (K,)), `apply_batch` the row-wise (B, K) variant and
+    `apply_tensor` the torch variant used by CudaCore. Subclasses must
+    implement `__call__`; the batch/tensor variants have generic fallbacks.
+    """
+
+    kind: str = "abstract"
+
+    @abstractmethod
+    def __call__(self, w: np.ndarray, score: np.ndarray) -> np.ndarray:
+        """New weights for one selector."""
+
+    def apply_batch(self, w: np.ndarray, score: np.ndarray) -> np.ndarray:
+        return np.stack([self(wi, si) for wi, si in zip(w, score)])
+
+    def apply_tensor(self, w, score):
+        """Torch fallback: round-trip through `apply_batch` on the host."""
+        import torch
+
+        out = self.apply_batch(w.detach().cpu().numpy(), score.detach().cpu().numpy())
+        return torch.as_tensor(out, dtype=w.dtype, device=w.device)
+
+
+class ExpReweight(ReweightOperator):
+    """Exponentiated-gradient reweight operator with an explicit eta.
+
+    Callable like the legacy closures (`fn(w, adv) -> w_new`); selectors
+    recognise it and switch to the allocation-free fused kernel. For
+    `apply_batch`, eta may also be a (B, 1) column with one eta per row
+    (BatchedCapitalSelector lanes).
+    """
+
+    kind = "exp"
+
+    def __init__(self, eta):
+        self.eta = float(eta) if np.ndim(eta) == 0 else np.asarray(eta, dtype=float)
+
+    def __call__(self, w: np.ndarray, score: np.ndarray) -> np.ndarray:
+        return exp_reweight(w, score, self.eta)
+
+    def apply_batch(self, w: np.ndarray, score: np.ndarray) -> np.ndarray:
+        w = np.clip(w * np.exp(self.eta * np.asarray(score, dtype=float)), 0.0, None)
+        s = w.sum(axis=1, keepdims=True)
+        zero = (s == 0).reshape(-1)
+        if zero.any():
+            w[zero] = 1.0
+            s[zero] = w.shape[1]
+        return w / s
+
+    def apply_tensor(self, w, score):
+        import torch
+
+        w_new = torch.clamp(w * torch.exp(self.eta * score), min=0.0)
+        s = w_new.sum(dim=1, keepdim=True)
+        return torch.where(s == 0.0, torch.ones_like(w_new) / w_new.shape[1], w_new / s)
+
+    def __repr__(self) -> str:
+        return f"ExpReweight(eta={self.eta!r})"
@@ -1,16 +1,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator
 import os
 import numpy as np
-import torch
 
 from .config import ProfileAConfig
-from .interfaces import World, Curriculum, Teacher, validate_world_output
+from .interfaces import World, Curriculum, Teacher, iter_world, iter_world_blocks
 from .builder import CapitalSelectorBuilder
+from .core import CapitalSelector
 from .cpu_impl import CpuCore
-from .cuda_impl import CudaCore
+from .history import HistoryRecorder
 
 
 @dataclass(frozen=True)
@@ -20,38 +21,156 @@ class RuntimeConfig:
     mode: str = "A"
 
 
+@dataclass
+class RunCheckpoint:
+    """Resume point of an `iter_run` stream.
+
+    `t` is the number of steps already applied to `selector` (the next step
+    to run). A fresh `RunCheckpoint()` starts a new run; pass the same object
+    back to `iter_run` together with the same world to resume.
+    """
+    t: int = 0
+    selector: CapitalSelector | None = None
+
+
+class _StepTrace(Sequence):
+    """Read-only `["step"] * n` without materialising the list."""
+
+    def __init__(self, n: int):
+        self._n = int(n)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return ["step"] * len(range(*i.indices(self._n)))
+        if not -self._n <= i < self._n:
+            raise IndexError("trace index out of range")
+        return "step"
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, _StepTrace):
+            return self._n == other._n
+        if isinstance(other, (list, tuple)):
+            return len(other) == self._n and all(x == "step" for x in other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"['step'] * {self._n}"
+
+
+def _select_core(cfg: RuntimeConfig):
+    if cfg.profile != "A":
+        raise ValueError("Only Profile A is supported in v1")
+    # "cuda", "cuda:1", ... -> tensor backend; torch is only imported then
+    device_type = os.environ.get("CAPM_DEVICE", "cpu").split(":", 1)[0].strip()
+    if device_type == "cuda":
+        from .cuda_impl import CudaCore
+
+        return CudaCore()
+    return CpuCore()
+
+
+def _advance(core, selector: CapitalSelector, r_vec: np.ndarray, c_total: float, freeze: bool) -> None:
+    if selector.w is None or len(selector.w) != len(r_vec):
+        selector.w = np.ones(len(r_vec)) / max(1, len(r_vec))
+        selector.K = len(r_vec)
+    core.step(selector, r_vec, c_total, freeze=freeze)
+
+
+def _advance_block(core, selector: CapitalSelector, b0: int, R: np.ndarray, C: np.ndarray, freeze: bool, rec: HistoryRecorder) -> None:
+    """Apply the steps b0.. of one world block and record them.
+
+    Without rebirth hooks the block runs through `core.run_sequence`; a hook
+    may change what is recorded (e.g. `kind`), so then it is stepped.
+    """
+    if selector.has_rebirth_hooks():
+        for i in range(len(C)):
+            _advance(core, selector, R[i], float(C[i]), freeze)
+            rec.record(b0 + i, selector)
+        return
+    if selector.w is None or len(selector.w) != R.shape[1]:
+        selector.w = np.ones(R.shape[1]) / max(1, R.shape[1])
+        selector.K = R.shape[1]
+    rec.record_block(b0, core.run_sequence(selector, R, C, freeze=freeze), selector.kind)
+
+
 def run(
     *,
     world: World,
     steps: int,
     config: RuntimeConfig | None = None,
     profile: ProfileAConfig | None = None,
+    recorder: HistoryRecorder | None = None,
 ) -> Dict[str, Any]:
     """Canonical runtime entry point (Profile A).
 
     This is a minimal runner for deterministic Profile A semantics.
+    The world is consumed in blocks that run through `core.run_sequence`.
+    Per-step state goes into `recorder` (default: all fields, every step);
+    `history` is a list of dicts in the `selector.state()` layout, or a lazy
+    view over the recorder when one is passed (a recorder holds one run).
+    `trace` is a lazy sequence with one "step" entry per step.
     """
     cfg = config or RuntimeConfig()
-    if cfg.profile != "A":
-        raise ValueError("Only Profile A is supported in v1")
-
+    core = _select_core(cfg)
     prof = profile or ProfileAConfig()
-    device = torch.device(os.environ.get("CAPM_DEVICE", "cpu"))
-    core = CudaCore() if device.type == "cuda" else CpuCore()
 
     # initialize selector from Profile A defaults
     selector = CapitalSelectorBuilder().with_K(0).build()
 
-    trace = []
-    history = []
-    for t in range(int(steps)):
-        out = world.step(t)
-        r_vec, c_total = validate_world_output(out)
-        if selector.w is None or len(selector.w) != len(r_vec):
-            selector.w = np.ones(len(r_vec)) / max(1, len(r_vec))
-            selector.K = len(r_vec)
-        core.step(selector, r_vec, c_total, freeze=cfg.freeze)
-        history.append(selector.state())
-        trace.append("step")
-
-    return {"history": history, "trace": trace}
+    rec = recorder if recorder is not None else HistoryRecorder()
+    rec.begin(int(steps))
+    for b0, R, C in iter_world_blocks(world, 0, int(steps)):
+        _advance_block(core, selector, b0, R, C, cfg.freeze, rec)
+
+    history = rec.as_dicts() if recorder is not None else list(rec.as_dicts())
+    return {"history": history, "trace": _StepTrace(steps), "recorder": rec}
+
+
+def iter_run(
+    *,
+    world: World,
+    steps: int,
+    config: RuntimeConfig | None = None,
+    profile: ProfileAConfig | None = None,
+    chunk_size: int | None = None,
+    checkpoint: RunCheckpoint | None = None,
+) -> Iterator[Any]:
+    """Streaming variant of `run`: yields state lazily while stepping.
+
+    Without `chunk_size` each step yields `{"t": t, **selector.state()}`;
+    with it, a filled `HistoryRecorder` per chunk of that many steps.
+
+    `checkpoint` is updated before every yield, so stopping the stream (break
+    or close) leaves it pointing at the next step. Passing it back (with the
+    same world) resumes the run up to `steps`. Worlds with `step_block` are
+    sampled one chunk at a time, and chunks run through `core.run_sequence`.
+    """
+    cfg = config or RuntimeConfig()
+    core = _select_core(cfg)
+    prof = profile or ProfileAConfig()
+    if chunk_size is not None and int(chunk_size) < 1:
+        raise ValueError("chunk_size must be >= 1")
+
+    if checkpoint is None:
+        checkpoint = RunCheckpoint()
+    if checkpoint.selector is None:
+        checkpoint.selector = CapitalSelectorBuilder().with_K(0).build()
+    selector = checkpoint.selector
+
+    while checkpoint.t < int(steps):
+        # world blocks never extend past the next yield, so a stopped stream
+        # leaves the world in step with the checkpoint
+        n = 1 if chunk_size is None else min(int(chunk_size), int(steps) - checkpoint.t)
+        rec = None if chunk_size is None else HistoryRecorder(capacity=n)
+        if rec is None:
+            for t, r_vec, c_total in iter_world(world, checkpoint.t, checkpoint.t + n, block=n):
+                _advance(core, selector, r_vec, c_total, cfg.freeze)
+                checkpoint.t = t + 1
+        else:
+            for b0, R, C in iter_world_blocks(world, checkpoint.t, checkpoint.t + n, block=n):
+                _advance_block(core, selector, b0, R, C, cfg.freeze, rec)
+                checkpoint.t = b0 + len(C)
+        yield {"t": checkpoint.t - 1, **selector.state()} if rec is None else rec
@@ -2,8 +2,25 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple, Any
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple, Any
+import itertools
 import json
+import os
+import threading
+import time
+import weakref
+
+import numpy as np
+
+
+_SNAPSHOT_FORMAT = 1
+
+
+def _intern(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """(unique values, index of each value into them)."""
+    table: Dict[str, int] = {}
+    idx = [table.setdefault(v, len(table)) for v in values]
+    return np.array(list(table), dtype=str), np.asarray(idx, dtype=np.int32)
 
 
 @dataclass(frozen=True)
@@ -18,6 +35,77 @@ class SedimentNode:
     run_id: str
 
 
+class SedimentLogWriter:
+    """Append-only JSONL writer that keeps its file open and buffers lines.
+
+    Buffered lines are written and flushed to the OS when `flush_every`
+    events are pending, on `flush()` / `close()`, and at most
+    `flush_interval_ms` after the oldest pending event: a daemon timer
+    flushes a quiet writer, so no event waits for the next write. The
+    default (flush_every=1) writes every event through, as the unbuffered
+    log did.
+    """
+
+    def __init__(self, path: Path, *, flush_every: int = 1, flush_interval_ms: Optional[float] = None):
+        if int(flush_every) < 1:
+            raise ValueError("flush_every must be >= 1")
+        if flush_interval_ms is not None and float(flush_interval_ms) < 0:
+            raise ValueError("flush_interval_ms must be >= 0")
+        self.path = path
+        self.flush_every = int(flush_every)
+        self.flush_interval = None if flush_interval_ms is None else float(flush_interval_ms) / 1000.0
+        self._fh = None
+        self._pending: List[str] = []
+        self._last_flush = time.monotonic()
+        # the timer thread and writers share _pending / _fh
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def write(self, event: str, payload: Dict[str, Any]):
+        line = json.dumps({"event": event, "payload": payload}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._pending.append(line)
+            if len(self._pending) >= self.flush_every or (
+                self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self._flush()
+            elif self.flush_interval is not None and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            if self._pending:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            if self._fh is None:
+                self._fh = open(self.path, "a", encoding="utf-8")
+            self._fh.write("".join(self._pending))
+            self._pending.clear()
+        if self._fh is not None:
+            self._fh.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Flush pending lines and close the file (reopened on the next write)."""
+        with self._lock:
+            self._flush()
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
 class SedimentDAG:
     """Passive, append-only record of dead mediation configurations.
 
@@ -29,30 +117,235 @@ class SedimentDAG:
     Canonical (v1):
     - Sediment is non-causal for weights/stats/wealth.
     - Its only effect is structural exclusion during stack formation.
+
+    With `persist_path`, events go through a SedimentLogWriter
+    (`flush_every`, `flush_interval_ms`). Pending events are written on
+    `flush()`, `close()`, context exit and at interpreter exit.
+
+    `snapshot()` writes all nodes to `snapshot_path` (default: the log path
+    with a `.snapshot.npz` suffix) and truncates the log, automatically
+    every `snapshot_every` new nodes if set. `load` rebuilds a DAG from the
+    snapshot plus the events logged after it. Edge events are not kept in
+    snapshots: the chain is implied by node ids per run_id.
     """
 
-    def __init__(self, persist_path: Optional[Path] = None, *, forbid_pairs: bool = False, truncate: bool = False):
+    def __init__(
+        self,
+        persist_path: Optional[Path] = None,
+        *,
+        forbid_pairs: bool = False,
+        truncate: bool = False,
+        flush_every: int = 1,
+        flush_interval_ms: Optional[float] = None,
+        snapshot_path: Optional[Path] = None,
+        snapshot_every: Optional[int] = None,
+    ):
         # G2 inventory: see docs/phase_g_g2_state_inventory.md
         self.persist_path = persist_path
         self.forbid_pairs = bool(forbid_pairs)
+        self._log: Optional[SedimentLogWriter] = None
+        if snapshot_path is None and persist_path is not None:
+            snapshot_path = persist_path.with_name(persist_path.name + ".snapshot.npz")
+        self.snapshot_path = snapshot_path
+        if snapshot_every is not None and int(snapshot_every) < 1:
+            raise ValueError("snapshot_every must be >= 1")
+        self.snapshot_every = None if snapshot_every is None else int(snapshot_every)
+        self._nodes_at_snapshot = 0
 
         self._nodes: Dict[int, SedimentNode] = {}
         self._last_node_id_by_run: Dict[str, int] = {}
         self._next_node_id = 1
+        # lookup indexes for is_forbidden, kept in step with _nodes; the
+        # O(m^2)-per-node pair index only exists once pairs are forbidden
+        self._exact: Set[Tuple[str, FrozenSet[str]]] = set()
+        self._pairs: Optional[Set[Tuple[str, FrozenSet[str]]]] = set() if self.forbid_pairs else None
 
         if self.persist_path is not None:
             self.persist_path.parent.mkdir(parents=True, exist_ok=True)
             if truncate:
-                # create/clear file
+                # create/clear file (and drop the snapshot that preceded it)
                 self.persist_path.write_text("", encoding="utf-8")
+                if self.snapshot_path is not None and self.snapshot_path.exists():
+                    self.snapshot_path.unlink()
+            self._log = SedimentLogWriter(
+                self.persist_path, flush_every=flush_every, flush_interval_ms=flush_interval_ms
+            )
+            # final flush when the DAG is collected or the interpreter exits
+            self._finalizer = weakref.finalize(self, self._log.close)
 
     # ---------- persistence helpers ----------
 
     def _append_event(self, event: str, payload: Dict[str, Any]):
-        if self.persist_path is None:
+        if self._log is None:
             return
-        with open(self.persist_path, "a", encoding="utf-8") as fh:
-            fh.write(json.dumps({"event": event, "payload": payload}, ensure_ascii=False) + "\n")
+        self._log.write(event, payload)
+
+    def flush(self):
+        """Write pending log events to the persist file."""
+        if self._log is not None:
+            self._log.flush()
+
+    def close(self):
+        """Flush and close the persist file (it is reopened on the next event)."""
+        if self._log is not None:
+            self._log.close()
+
+    # ---------- snapshots / reload ----------
+
+    def state_dict(self) -> Dict[str, np.ndarray]:
+        """All nodes as flat arrays; member, world, phase and run ids interned.
+
+        Masks are JSON strings; the usual {"masked_members": members, ...}
+        mask is stored without its member list (flag `mask_members`).
+        """
+        nodes = self.nodes()
+        members, world, phase, run = [], [], [], []
+        offsets = [0]
+        masks, mask_members = [], []
+        for node in nodes:
+            members.extend(node.members)
+            offsets.append(len(members))
+            world.append(node.world_id)
+            phase.append(node.phase_id)
+            run.append(node.run_id)
+            mask = node.mask
+            inline = next(iter(mask), None) == "masked_members" and mask["masked_members"] == node.members
+            if inline:
+                mask = {k: v for k, v in mask.items() if k != "masked_members"}
+            masks.append(json.dumps(mask, ensure_ascii=False))
+            mask_members.append(inline)
+
+        state: Dict[str, np.ndarray] = {
+            "format": np.asarray(_SNAPSHOT_FORMAT),
+            "next_node_id": np.asarray(self._next_node_id, dtype=np.int64),
+            "node_id": np.asarray([n.node_id for n in nodes], dtype=np.int64),
+            "t": np.asarray([n.t for n in nodes], dtype=np.int64),
+            "member_offsets": np.asarray(offsets, dtype=np.int64),
+            "mask_members": np.asarray(mask_members, dtype=bool),
+        }
+        for name, values in (("member", members), ("world", world), ("phase", phase), ("run", run), ("mask", masks)):
+            state[f"{name}_table"], state[f"{name}_idx"] = _intern(values)
+        return state
+
+    def _restore_state(self, state: Dict[str, np.ndarray]):
+        if int(state["format"]) != _SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported sediment snapshot format: {int(state['format'])}")
+
+        def column(name: str) -> List[str]:
+            table = state[f"{name}_table"].tolist()
+            return [table[i] for i in state[f"{name}_idx"].tolist()]
+
+        members, world, phase, run = column("member"), column("world"), column("phase"), column("run")
+        mask_table = [json.loads(m) for m in state["mask_table"].tolist()]
+        masks = [mask_table[i] for i in state["mask_idx"].tolist()]
+        offsets = state["member_offsets"].tolist()
+        for k, (node_id, t, inline) in enumerate(
+            zip(state["node_id"].tolist(), state["t"].tolist(), state["mask_members"].tolist())
+        ):
+            node_members = members[offsets[k] : offsets[k + 1]]
+            mask = {"masked_members": list(node_members), **masks[k]} if inline else dict(masks[k])
+            self._insert(SedimentNode(node_id, node_members, mask, world[k], phase[k], t, run[k]))
+        self._next_node_id = max(self._next_node_id, int(state["next_node_id"]))
+
+    def snapshot(self):
+        """Write all nodes to `snapshot_path` and truncate the event log.
+
+        The snapshot replaces the previous one atomically; log events of
+        nodes it already holds are skipped on `load`, so a crash between
+        the two steps loses nothing.
+        """
+        if self.persist_path is None or self.snapshot_path is None:
+            raise ValueError("snapshot() needs a persist_path")
+        self.close()
+        tmp = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp.npz")
+        np.savez(tmp, **self.state_dict())
+        os.replace(tmp, self.snapshot_path)
+        self.persist_path.write_text("", encoding="utf-8")
+        self._nodes_at_snapshot = len(self._nodes)
+
+    @classmethod
+    def load(cls, persist_path: Path, **kwargs) -> "SedimentDAG":
+        """Rebuild a DAG from its snapshot (if any) and event log.
+
+        Replays SEDIMENT_NODE_ADDED events; a torn last line (crash during
+        a write) is cut off. The DAG keeps appending to the same log. kwargs go to the
+        constructor (`truncate` is not allowed).
+        """
+        if kwargs.get("truncate"):
+            raise ValueError("load() cannot truncate the log it reads")
+        dag = cls(Path(persist_path), **kwargs)
+        if dag.snapshot_path is not None and dag.snapshot_path.exists():
+            with np.load(dag.snapshot_path, allow_pickle=False) as data:
+                dag._restore_state({key: data[key] for key in data.files})
+        dag._nodes_at_snapshot = len(dag._nodes)
+        if dag.persist_path.exists():
+            text = dag.persist_path.read_text(encoding="utf-8")
+            end = text.rfind("\n") + 1
+            if end < len(text):
+                # partial write at the end of the log: drop it before appending
+                with open(dag.persist_path, "r+", encoding="utf-8") as fh:
+                    fh.truncate(len(text[:end].encode("utf-8")))
+            dag._replay(text[:end])
+        return dag
+
+    def _replay(self, text: str):
+        for k, line in enumerate(text.split("\n")):
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                raise ValueError(f"Corrupt sediment log line {k + 1}") from None
+            if event.get("event") != "SEDIMENT_NODE_ADDED":
+                continue
+            p = event["payload"]
+            if int(p["node_id"]) in self._nodes:
+                # already in the snapshot
+                continue
+            self._insert(
+                SedimentNode(
+                    node_id=int(p["node_id"]),
+                    members=list(p["members"]),
+                    mask=dict(p["mask"]),
+                    world_id=str(p["world_id"]),
+                    phase_id=str(p["phase_id"]),
+                    t=int(p["t"]),
+                    run_id=str(p["run_id"]),
+                )
+            )
+
+    def __enter__(self) -> "SedimentDAG":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _insert(self, node: SedimentNode):
+        """Register a node without logging it (restore/replay)."""
+        self._nodes[node.node_id] = node
+        self._index_node(node)
+        last = self._last_node_id_by_run.get(node.run_id)
+        if last is None or node.node_id > last:
+            self._last_node_id_by_run[node.run_id] = node.node_id
+        self._next_node_id = max(self._next_node_id, node.node_id + 1)
+
+    def _index_node(self, node: SedimentNode):
+        self._exact.add((node.phase_id, frozenset(node.members)))
+        if self._pairs is not None:
+            self._index_pairs(node)
+
+    def _index_pairs(self, node: SedimentNode):
+        for pair in itertools.combinations(frozenset(node.members), 2):
+            self._pairs.add((node.phase_id, frozenset(pair)))
+
+    def _pair_index(self) -> Set[Tuple[str, FrozenSet[str]]]:
+        """The pair index, built from all nodes on first use (forbid_pairs
+        switched on after construction)."""
+        if self._pairs is None:
+            self._pairs = set()
+            for node in self._nodes.values():
+                self._index_pairs(node)
+        return self._pairs
 
     # ---------- public API ----------
 
@@ -71,6 +364,7 @@ class SedimentDAG:
             run_id=str(run_id),
         )
         self._nodes[node_id] = node
+        self._index_node(node)
 
         # persist node
         self._append_event("SEDIMENT_NODE_ADDED", {
@@ -89,6 +383,9 @@ class SedimentDAG:
             self.add_edge(last, node_id, run_id=node.run_id, t=node.t)
         self._last_node_id_by_run[node.run_id] = node_id
 
+        if self.snapshot_every is not None and len(self._nodes) - self._nodes_at_snapshot >= self.snapshot_every:
+            self.snapshot()
+
         return node_id
 
     def add_edge(self, a: int, b: int, *, run_id: str, t: int):
@@ -99,22 +396,20 @@ class SedimentDAG:
         return [self._nodes[k] for k in sorted(self._nodes.keys())]
 
     def is_forbidden(self, *, candidate_members: List[str], phase_id: str) -> bool:
-        cand = set(candidate_members)
+        """True if the candidate equals a sediment node of the phase (or, with
+        forbid_pairs, contains any member pair of one).
+
+        Hash lookups only: O(|candidate|^2), independent of the sediment size.
+        """
+        cand = frozenset(candidate_members)
         phase_id = str(phase_id)
 
-        for node in self._nodes.values():
-            if node.phase_id != phase_id:
-                continue
-            M = set(node.members)
-            if cand == M:
-                return True
-            if self.forbid_pairs:
-                # forbid any pair from known-bad clique
-                if len(M) >= 2:
-                    mlist = list(M)
-                    # check if any pair subset is contained in candidate
-                    for i in range(len(mlist)):
-                        for j in range(i+1, len(mlist)):
-                            if {mlist[i], mlist[j]}.issubset(cand):
-                                return True
+        if (phase_id, cand) in self._exact:
+            return True
+        if self.forbid_pairs:
+            # forbid any pair from known-bad clique
+            pairs = self._pair_index()
+            for pair in itertools.combinations(cand, 2):
+                if (phase_id, frozenset(pair)) in pairs:
+                    return True
         return False
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+import functools
+import multiprocessing as mp
+import weakref
+
+import numpy as np
+
+from .broker import Broker, BrokerConfig, _EXPLORER_COLUMNS
+from .quantiles import QuantileBank
+
+
+# scalar observes buffered before ShardedBroker flushes on its own
+_MAX_PENDING = 4096
+
+
+def _attach(names: Dict[str, str], capacity: int):
+    """Map the shared column blocks as arrays of `capacity` rows."""
+    blocks, cols = {}, {}
+    for name, (dtype, _) in _EXPLORER_COLUMNS.items():
+        shm = shared_memory.SharedMemory(name=names[name])
+        blocks[name] = shm
+        cols[name] = np.ndarray((capacity,), dtype=dtype, buffer=shm.buf)
+    return blocks, cols
+
+
+def _release(shm: shared_memory.SharedMemory, unlink: bool = False):
+    try:
+        shm.close()
+    except BufferError:
+        # a caller still holds a view; the mapping goes away with it
+        pass
+    if unlink:
+        shm.unlink()
+
+
+def _shard_main(conn, cfg: BrokerConfig, shard: int, n_shards: int, names: Dict[str, str], capacity: int):
+    """Worker loop: a Broker whose columns are the shared blocks.
+
+    Only rows with row % n_shards == shard are ever written here.
+    """
+    broker = Broker(cfg)
+    blocks, broker._cols = _attach(names, capacity)
+    if broker._tail is not None:
+        broker._tail.grow(capacity)
+    try:
+        while True:
+            cmd, payload = conn.recv()
+            if cmd == "stop":
+                break
+            try:
+                if cmd == "remap":
+                    names, capacity = payload
+                    old = blocks
+                    broker._cols = {}
+                    blocks, broker._cols = _attach(names, capacity)
+                    for shm in old.values():
+                        _release(shm)
+                    if broker._tail is not None:
+                        broker._tail.grow(capacity)
+                    out = None
+                elif cmd == "observe":
+                    broker._observe_rows(*payload)
+                    out = None
+                elif cmd == "limits":
+                    rows = np.arange(shard, payload, n_shards)
+                    out = rows[broker._limit_rows(rows)]
+                elif cmd == "tail_cvar":
+                    out = broker.tail_cvar(payload)
+                elif cmd == "tail_state":
+                    out = broker._tail.state(payload)
+                elif cmd == "tail_restore":
+                    state, capacity = payload
+                    broker._tail.restore(state)
+                    broker._tail.grow(capacity)
+                    out = None
+                else:
+                    raise ValueError(f"Unknown shard command: {cmd}")
+            except Exception as exc:  # reported to the parent, worker keeps running
+                conn.send((False, exc))
+            else:
+                conn.send((True, out))
+    finally:
+        broker._cols = {}
+        for shm in blocks.values():
+            _release(shm)
+        conn.close()
+
+
+def _shutdown(workers: List, conns: List, blocks: Dict[str, shared_memory.SharedMemory]):
+    for conn in conns:
+        try:
+            conn.send(("stop", None))
+        except (BrokenPipeError, OSError):
+            pass
+    for proc in workers:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.terminate()
+    for conn in conns:
+        conn.close()
+    for shm in blocks.values():
+        _release(shm, unlink=True)
+    workers.clear()
+    conns.clear()
+    blocks.clear()
+
+
+class ShardedBroker(Broker):
+    """Broker whose per-explorer work is split across worker processes.
+
+    Explorer rows (registration order) are assigned round-robin to
+    `n_shards` workers. The metric/policy columns live in shared memory in
+    global row order: workers run the per-row kernels (`observe_batch`
+    updates, the `decide_limits` rules, the optional quantile bank) for
+    their own rows, while this process keeps global time, the id table,
+    the eligibility index and the correlation tracker (which only ever sees
+    the funded set passed to `apply_decorrelation_cap`). Reads
+    (`policies`, `metric_snapshot`, `column`, ...) need no IPC.
+
+    Scalar `observe` calls are buffered and sent to the workers as batches
+    on the next other broker call (read, limits, correlations, ...), so the
+    per-id call pattern costs one round-trip per flush instead of one per
+    id. `observe_batch` sends immediately.
+
+    Results are identical to a single-process `Broker` with the same config
+    and call sequence. Call `close()` (or use as a context manager) to stop
+    the workers and free the shared memory.
+    """
+
+    def __init__(self, config: Optional[BrokerConfig] = None, *, n_shards: int = 2, start_method: Optional[str] = None):
+        super().__init__(config)
+        if int(n_shards) < 1:
+            raise ValueError("n_shards must be >= 1")
+        self.n_shards = int(n_shards)
+        # quantile bank state lives in the workers; keep the levels for lookups
+        self._tail_levels: Optional[QuantileBank] = self._tail
+        self._tail = None
+        # buffered scalar observes: (row, r, c, alive, dt), in call order
+        self._pending: List[tuple] = []
+
+        ctx = mp.get_context(start_method)
+        self._blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self._conns: List = []
+        self._workers: List = []
+        self._finalizer = weakref.finalize(self, _shutdown, self._workers, self._conns, self._blocks)
+        # blocks exist before the workers start, so they share this process'
+        # resource tracker instead of each unlinking the blocks on exit
+        names, capacity, _ = self._allocate(16)
+        for shard in range(self.n_shards):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_shard_main, args=(child, self.cfg, shard, self.n_shards, names, capacity), daemon=True
+            )
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._workers.append(proc)
+
+    # ----- lifecycle -----
+
+    def close(self):
+        """Stop the workers and release the shared columns."""
+        if self._finalizer.alive:
+            self._flush_observes()
+            self._cols = {name: np.array(arr) for name, arr in self._cols.items()}
+            self._finalizer()
+
+    def __enter__(self) -> "ShardedBroker":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----- worker IPC -----
+
+    def _check_open(self):
+        if not self._finalizer.alive:
+            raise RuntimeError("ShardedBroker is closed")
+
+    def _call(self, messages: Dict[int, tuple]) -> Dict[int, object]:
+        """Send one command per shard, then collect all replies."""
+        self._check_open()
+        for shard, msg in messages.items():
+            self._conns[shard].send(msg)
+        out, error = {}, None
+        for shard in messages:
+            ok, value = self._conns[shard].recv()
+            if ok:
+                out[shard] = value
+            elif error is None:
+                error = value
+        if error is not None:
+            raise error
+        return out
+
+    def _split(self, rows: np.ndarray) -> Dict[int, np.ndarray]:
+        """Positions into `rows`, grouped by owning shard."""
+        shard_of = rows % self.n_shards
+        parts = {}
+        for shard in range(self.n_shards):
+            pos = np.flatnonzero(shard_of == shard)
+            if len(pos):
+                parts[shard] = pos
+        return parts
+
+    # ----- storage -----
+
+    def _allocate(self, capacity: int):
+        """Move the columns into fresh shared blocks of `capacity` rows."""
+        cap = len(self._cols["mu"])
+        old = dict(self._blocks)
+        cols = {}
+        self._blocks.clear()
+        for name, (dtype, _) in _EXPLORER_COLUMNS.items():
+            shm = shared_memory.SharedMemory(create=True, size=capacity * np.dtype(dtype).itemsize)
+            self._blocks[name] = shm
+            cols[name] = np.ndarray((capacity,), dtype=dtype, buffer=shm.buf)
+            cols[name][:cap] = self._cols[name]
+        self._cols = cols
+        return {name: shm.name for name, shm in self._blocks.items()}, capacity, old
+
+    def _grow(self, need: int):
+        cap = len(self._cols["mu"])
+        if need <= cap:
+            return
+        # no new shared blocks once closed (nothing would unlink them)
+        self._check_open()
+        names, capacity, old = self._allocate(max(need, 2 * cap, 16))
+        self._call({shard: ("remap", (names, capacity)) for shard in range(self.n_shards)})
+        for shm in old.values():
+            _release(shm, unlink=True)
+
+    # ----- sharded kernels -----
+
+    def observe(self, explorer_id: str, r: float, c: float, alive: bool, dt: float):
+        """Buffered `Broker.observe`: applied with the next flush."""
+        self._check_open()
+        idx = self._ensure(explorer_id)
+        dt = float(dt) if dt and dt > 0 else 1.0
+        self._time += dt
+        self._pending.append((idx, float(r), float(c), bool(alive), dt))
+        if len(self._pending) >= _MAX_PENDING:
+            self._flush_observes()
+
+    def _flush_observes(self):
+        """Send buffered observes as batches (a new batch at every repeated row)."""
+        pending, self._pending = self._pending, []
+        start, seen = 0, set()
+        for k, (idx, *_) in enumerate(pending):
+            if idx in seen:
+                self._send_observes(pending[start:k])
+                start, seen = k, set()
+            seen.add(idx)
+        if pending:
+            self._send_observes(pending[start:])
+
+    def _send_observes(self, batch: List[tuple]):
+        idx, r, c, alive, dt = (np.array(col) for col in zip(*batch))
+        self._observe_and_touch(idx.astype(np.intp), r, c, alive, dt)
+
+    def _observe_rows(self, idx, r, c, alive, dt):
+        self._call({
+            shard: ("observe", (idx[pos], r[pos], c[pos], alive[pos], dt[pos]))
+            for shard, pos in self._split(idx).items()
+        })
+
+    def _limit_rows(self, rows) -> np.ndarray:
+        n = len(self._ids)
+        changed = np.zeros(n, dtype=bool)
+        for hit in self._call({shard: ("limits", n) for shard in range(self.n_shards)}).values():
+            changed[hit] = True
+        return changed
+
+    @property
+    def tail_bank(self) -> Optional[QuantileBank]:
+        """Not available: the bank is split across the workers."""
+        return None
+
+    def tail_cvar(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        if self._tail_inhibit is None:
+            return super().tail_cvar(rows)
+        if rows is None:
+            rows = np.arange(len(self._ids))
+        elif isinstance(rows, slice):
+            rows = np.arange(len(self._ids))[rows]
+        rows = np.asarray(rows, dtype=np.intp)
+        out = np.empty(len(rows))
+        parts = self._split(rows)
+        replies = self._call({shard: ("tail_cvar", rows[pos]) for shard, pos in parts.items()})
+        for shard, pos in parts.items():
+            out[pos] = replies[shard]
+        return out
+
+    def _tail_state(self, n: int) -> Dict[str, np.ndarray]:
+        if self._tail_levels is None:
+            return {}
+        replies = self._call({shard: ("tail_state", n) for shard in range(self.n_shards)})
+        merged = {name: np.array(arr) for name, arr in replies[0].items()}
+        for shard in range(1, self.n_shards):
+            own = np.arange(shard, n, self.n_shards)
+            for name, arr in replies[shard].items():
+                merged[name][own] = arr[own]
+        return merged
+
+    def _restore_tail(self, state: Dict[str, np.ndarray]):
+        if self._tail_levels is not None:
+            cap = len(self._cols["mu"])
+            self._call({shard: ("tail_restore", (state, cap)) for shard in range(self.n_shards)})
+
+
+def _flushing(fn):
+    @functools.wraps(fn)
+    def method(self, *args, **kwargs):
+        if self._pending:
+            self._flush_observes()
+        return fn(self, *args, **kwargs)
+
+    return method
+
+
+# every Broker entry point that reads or writes observed state applies the
+# buffered observes first
+for _name in (
+    "column", "observe_batch", "drop_correlations", "update_correlations", "rho", "rho_matrix",
+    "most_correlated", "correlation_error", "tail_cvar", "update_limits", "decide_limits", "is_eligible",
+    "eligible_rows", "eligible_ids", "eligible_mask", "mark_funded", "apply_policies_array", "apply_policies",
+    "apply_decorrelation_cap_array", "apply_decorrelation_cap", "metric_arrays", "metric_snapshot", "state_dict",
+):
+    setattr(ShardedBroker, _name, _flushing(getattr(ShardedBroker, _name)))
+for _name in ("correlation_epoch", "policies", "metrics"):
+    setattr(ShardedBroker, _name, property(_flushing(getattr(ShardedBroker, _name).fget)))
+del _name
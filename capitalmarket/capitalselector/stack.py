@@ -8,7 +8,8 @@ import numpy as np
 import uuid
 from pathlib import Path
 
-from .broker import PhaseCChannel, LegacyChannelAdapter, Broker, BrokerConfig
+from .broker import PhaseCChannel, LegacyChannelAdapter, Broker, BrokerConfig, CorrelationGraph
+from .channels import BankedExplorer
 from .sediment import SedimentDAG
 from .telemetry import TelemetryLogger
 
@@ -29,22 +30,299 @@ class StackConfig:
     use_cvar: bool = False
 
 
+# Summation order: member sums (r, c, dt) are left folds from 0.0 in member
+# order, in the scalar and in the array paths alike.
+def _fold_sum(xs: Iterable[float]) -> float:
+    """Left-to-right float sum from 0.0."""
+    acc = 0.0
+    for x in xs:
+        acc += x
+    return acc
+
+
+def _fold_columns(m: np.ndarray) -> np.ndarray:
+    """Per-row left-to-right sum of a (rows, cols) array."""
+    acc = np.zeros(m.shape[0])
+    for j in range(m.shape[1]):
+        acc += m[:, j]
+    return acc
+
+
+# StackBank float statistics, one column each (StackChannel attribute "_" + name)
+_STAT_COLUMNS = ("mu", "var", "beta", "dd_peak", "dd_val", "dd_max", "cvar")
+_STAT_KEYS = tuple("_" + name for name in _STAT_COLUMNS)
+# per-row copies of the StackConfig stability thresholds
+_TAU_COLUMNS = ("tau_mu", "tau_vol", "tau_cvar", "tau_dd")
+
+# below this many stacks calling stable() per stack is faster than one
+# stable_mask over the StackBank (tests/test_stack_benchmark.py)
+_BANK_MIN_STACKS = 8
+# below this many stepped stacks, updating their statistics row by row is
+# faster than one StackBank.update (tests/test_stack_benchmark.py)
+_UPDATE_MIN_STACKS = 16
+# below this many stacks on one explorer bank, stepping their members one
+# by one is faster than one `step_rows` call for all of them
+# (tests/test_stack_benchmark.py)
+_ROWS_MIN_STACKS = 32
+
+
+def _stats_step(mu, var, beta, dd_peak, dd_val, dd_max, cvar, net):
+    """One `StackChannel._update_stats` step on plain floats (in _STAT_COLUMNS order)."""
+    mu = (1 - beta) * mu + beta * net
+    var = (1 - beta) * var + beta * (net - mu) ** 2
+    # drawdown
+    dd_val += net
+    dd_peak = max(dd_peak, dd_val)
+    dd_max = max(dd_max, dd_peak - dd_val)
+    # crude cvar proxy: EWMA of negative net
+    cvar = (1 - beta) * cvar + beta * min(net, 0.0)
+    return mu, var, beta, dd_peak, dd_val, dd_max, cvar
+
+
+class StackBank:
+    """Statistics of the stacks of one StackManager as columns, one row per stack.
+
+    The manager acquires a row when a stack joins `StackManager.stacks` and
+    releases it when the stack leaves. While a stack holds a row its
+    statistics live there (the StackChannel attributes read and write the
+    row). Each row also carries the stability thresholds of its stack's
+    cfg, copied when the stack joins, so `stable_mask` evaluates
+    `StackChannel.stable` for all rows at once.
+    """
+
+    def __init__(self, capacity: int = 16):
+        capacity = max(1, int(capacity))
+        self._stats = np.zeros((capacity, len(_STAT_COLUMNS)))
+        self._tau = np.zeros((capacity, len(_TAU_COLUMNS)))
+        self._use_cvar = np.zeros(capacity, dtype=bool)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._size = np.zeros(capacity, dtype=np.int64)
+        self._used = np.zeros(capacity, dtype=bool)
+        # join order, so rows can be visited in StackManager.stacks order
+        self._seq = np.zeros(capacity, dtype=np.int64)
+        self.ids: List[Optional[str]] = [None] * capacity
+        self._free: List[int] = []
+        self._n = 0  # rows handed out so far (high-water mark)
+        self._joined = 0
+
+    def __len__(self) -> int:
+        return self._n - len(self._free)
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of one column over the rows handed out so far."""
+        if name in _STAT_COLUMNS:
+            col = self._stats[: self._n, _STAT_COLUMNS.index(name)]
+        elif name in _TAU_COLUMNS:
+            col = self._tau[: self._n, _TAU_COLUMNS.index(name)]
+        elif name in ("alive", "size", "used", "use_cvar"):
+            col = getattr(self, "_" + name)[: self._n]
+        else:
+            raise KeyError(name)
+        view = col.view()
+        view.flags.writeable = False
+        return view
+
+    def _grow(self):
+        cap = 2 * len(self._used)
+        for name in ("_stats", "_tau", "_use_cvar", "_alive", "_size", "_used", "_seq"):
+            old = getattr(self, name)
+            new = np.zeros((cap,) + old.shape[1:], dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+        self.ids.extend([None] * (cap - len(self.ids)))
+
+    def acquire(self, stack_id: str, st: "StackChannel", seq: Optional[int] = None) -> int:
+        """Give `st` a row and move its statistics there; returns the row."""
+        if st._bank is not None:
+            raise ValueError(f"Stack {st.stack_id} already holds a StackBank row")
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._n == len(self._used):
+                self._grow()
+            row = self._n
+            self._n += 1
+        d = st.__dict__
+        cfg = st.cfg
+        self._stats[row] = [d[key] for key in _STAT_KEYS]
+        self._tau[row] = (cfg.tau_mu, cfg.tau_vol, cfg.tau_cvar, cfg.tau_dd)
+        self._use_cvar[row] = cfg.use_cvar
+        self._alive[row] = d["_alive"]
+        self._size[row] = len(st._ids)
+        self._used[row] = True
+        if seq is None:
+            seq = self._joined
+            self._joined += 1
+        self._seq[row] = seq
+        self.ids[row] = stack_id
+        st._bank, st._bank_row = self, row
+        return row
+
+    def release(self, st: "StackChannel"):
+        """Move the statistics of `st` back to the stack and free its row."""
+        row = st._bank_row
+        d = st.__dict__
+        d.update(zip(_STAT_KEYS, self._stats[row].tolist()))
+        d["_alive"] = bool(self._alive[row])
+        st._bank, st._bank_row = None, -1
+        self._used[row] = False
+        self._alive[row] = False
+        self.ids[row] = None
+        self._free.append(row)
+
+    def update_row(self, row: int, net: float):
+        """`StackChannel._update_stats` on one row."""
+        self._stats[row] = _stats_step(*self._stats[row].tolist(), net)
+
+    def update(self, rows: np.ndarray, net: np.ndarray):
+        """`update_row` for many rows at once (same floats as row by row)."""
+        s = self._stats[rows]
+        mu, var, beta, dd_peak, dd_val, dd_max, cvar = s.T
+        mu = (1 - beta) * mu + beta * net
+        var = (1 - beta) * var + beta * (net - mu) ** 2
+        dd_val = dd_val + net
+        # np.where(b > a, b, a) is max(a, b), min(net, 0.0) likewise
+        dd_peak = np.where(dd_val > dd_peak, dd_val, dd_peak)
+        gap = dd_peak - dd_val
+        dd_max = np.where(gap > dd_max, gap, dd_max)
+        cvar = (1 - beta) * cvar + beta * np.where(0.0 < net, 0.0, net)
+        self._stats[rows] = np.stack((mu, var, beta, dd_peak, dd_val, dd_max, cvar), axis=1)
+
+    def stable_mask(self) -> np.ndarray:
+        """`StackChannel.stable` of every row handed out so far (False for free rows)."""
+        n = self._n
+        s = self._stats[:n]
+        tau = self._tau[:n]
+        vol = np.sqrt(np.maximum(s[:, 1], 0.0))
+        ok = (s[:, 0] >= tau[:, 0]) & (vol <= tau[:, 1]) & (s[:, 5] <= tau[:, 3])
+        ok &= self._used[:n] & self._alive[:n]
+        ok &= ~self._use_cvar[:n] | (s[:, 6] >= tau[:, 2])
+        return ok
+
+    def rows_in_order(self, rows: np.ndarray) -> np.ndarray:
+        """`rows` sorted by the order their stacks joined."""
+        return rows[np.argsort(self._seq[rows], kind="stable")]
+
+
+class _BankCell:
+    """A StackChannel statistic: an instance attribute, or the stack's
+    StackBank cell while the stack holds a row."""
+
+    def __init__(self, column: str):
+        self.column = column
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, st, owner=None):
+        if st is None:
+            return self
+        bank = st._bank
+        if bank is None:
+            return st.__dict__[self.name]
+        if self.column == "alive":
+            return bool(bank._alive[st._bank_row])
+        return bank._stats[st._bank_row, _STAT_COLUMNS.index(self.column)].item()
+
+    def __set__(self, st, value):
+        bank = st._bank
+        if bank is None:
+            st.__dict__[self.name] = value
+        elif self.column == "alive":
+            bank._alive[st._bank_row] = value
+        else:
+            bank._stats[st._bank_row, _STAT_COLUMNS.index(self.column)] = value
+
+
+class _StackTable(dict):
+    """stack_id -> StackChannel of a StackManager; every stack in it holds a
+    row of the manager's StackBank."""
+
+    def __init__(self, bank: StackBank):
+        super().__init__()
+        self.bank = bank
+
+    def __setitem__(self, sid, st):
+        old = self.get(sid)
+        if old is st:
+            return
+        seq = None
+        if old is not None:
+            seq = int(self.bank._seq[old._bank_row])
+            self.bank.release(old)
+        self.bank.acquire(sid, st, seq=seq)
+        super().__setitem__(sid, st)
+
+    def __delitem__(self, sid):
+        self.bank.release(self[sid])
+        super().__delitem__(sid)
+
+    def pop(self, sid, *default):
+        if sid not in self:
+            if default:
+                return default[0]
+            raise KeyError(sid)
+        st = self[sid]
+        del self[sid]
+        return st
+
+    def popitem(self):
+        sid = next(reversed(self))
+        return sid, self.pop(sid)
+
+    def clear(self):
+        for st in self.values():
+            self.bank.release(st)
+        super().clear()
+
+    def setdefault(self, sid, default=None):
+        if sid not in self:
+            self[sid] = default
+        return self[sid]
+
+    def update(self, *args, **kwargs):
+        for sid, st in dict(*args, **kwargs).items():
+            self[sid] = st
+
+
 class StackChannel(PhaseCChannel):
-    """Aggregated identity (Stack) exported as a Phase-C Channel."""
+    """Aggregated identity (Stack) exported as a Phase-C Channel.
+
+    Members are kept as aligned lists (ids, channels). Members that die
+    are dropped once at the end of the step (all members of a step share
+    the same internal weight). If every member is a row of one explorer
+    bank (BankedExplorer), `StackManager.step_stacks` can step the members
+    of many such stacks with one `step_rows` call.
+
+    While the stack belongs to a StackManager its statistics (`_mu`,
+    `_var`, ..., `_alive`) live in a row of the manager's StackBank.
+    """
+
+    _alive = _BankCell("alive")
+    _mu = _BankCell("mu")
+    _var = _BankCell("var")
+    _beta = _BankCell("beta")
+    _dd_peak = _BankCell("dd_peak")
+    _dd_val = _BankCell("dd_val")
+    _dd_max = _BankCell("dd_max")
+    _cvar = _BankCell("cvar")
 
     def __init__(self, members: Dict[str, PhaseCChannel], cfg: Optional[StackConfig] = None, stack_id: str = "stack"):
         # G2 inventory: see docs/phase_g_g2_state_inventory.md
         if len(members) == 0:
             raise ValueError("Stack needs at least one member")
-        self.members: Dict[str, PhaseCChannel] = dict(members)
         self.cfg = cfg or StackConfig()
         self.stack_id = stack_id
 
         if self.cfg.stack_weighting != "equal":
             raise ValueError(f"Unsupported stack_weighting: {self.cfg.stack_weighting}")
 
+        # StackBank row while the stack belongs to a StackManager
+        self._bank: Optional[StackBank] = None
+        self._bank_row = -1
+
         # equal internal allocation
-        self._w_internal: Dict[str, float] = {k: 1.0 / len(self.members) for k in self.members.keys()}
+        self._set_members(list(members.keys()), list(members.values()))
         self._alive = True
         self._dt = 1.0
 
@@ -57,63 +335,107 @@ class StackChannel(PhaseCChannel):
         self._dd_max = 0.0
         self._cvar = 0.0
 
+    @property
+    def members(self) -> Dict[str, PhaseCChannel]:
+        """Member id -> channel (a fresh dict; change members via add/remove)."""
+        return dict(zip(self._ids, self._channels))
+
+    @property
+    def _w_internal(self) -> Dict[str, float]:
+        return {eid: self._w_each for eid in self._ids}
+
+    def _set_members(self, ids: List[str], channels: List[PhaseCChannel]):
+        self._ids = ids
+        self._channels = channels
+        self._w_each = 1.0 / len(ids) if ids else 0.0
+        if self._bank is not None:
+            self._bank._size[self._bank_row] = len(ids)
+        # explorer bank rows, if all members live in the same bank
+        bank = getattr(channels[0], "bank", None) if channels else None
+        if bank is not None and all(isinstance(ch, BankedExplorer) and ch.bank is bank for ch in channels):
+            self._rows_bank = bank
+            self._rows = np.array([ch.row for ch in channels], dtype=np.intp)
+        else:
+            self._rows_bank = None
+            self._rows = None
+
     def add(self, explorer_id: str, ch: PhaseCChannel):
-        self.members[explorer_id] = ch
-        self._w_internal = {k: 1.0 / len(self.members) for k in self.members.keys()}
+        if explorer_id in self._ids:
+            self._channels[self._ids.index(explorer_id)] = ch
+        else:
+            self._set_members(self._ids + [explorer_id], self._channels + [ch])
 
     def remove(self, explorer_id: str):
-        if explorer_id in self.members:
-            del self.members[explorer_id]
-        if len(self.members) == 0:
+        if explorer_id in self._ids:
+            k = self._ids.index(explorer_id)
+            self._set_members(self._ids[:k] + self._ids[k + 1 :], self._channels[:k] + self._channels[k + 1 :])
+        if len(self._ids) == 0:
             self._alive = False
-        else:
-            self._w_internal = {k: 1.0 / len(self.members) for k in self.members.keys()}
+
+    def _step_members(self, weight: float) -> Tuple[float, float, float]:
+        """Step all members, drop the dead ones; returns (r_total, c_total, dt)."""
+        wi = weight * self._w_each
+        rs, cs, dts, alive = [], [], [], []
+        for ch in self._channels:
+            r, c, ok, dt = ch.step(wi)
+            rs.append(r)
+            cs.append(c)
+            dts.append(dt)
+            alive.append(ok)
+
+        if not all(alive):
+            self._keep(alive)
+        r_total = _fold_sum(rs)
+        c_total = _fold_sum(cs) + self.cfg.C_agg
+        dt_out = _fold_sum(dts) / len(dts) if dts else self._dt
+        return r_total, c_total, dt_out
+
+    def _keep(self, keep: List[bool]):
+        """Drop the members whose `keep` flag is False."""
+        self._set_members(
+            [eid for eid, ok in zip(self._ids, keep) if ok],
+            [ch for ch, ok in zip(self._channels, keep) if ok],
+        )
+        if not self._ids:
+            self._alive = False
+
+    def _end_step(self, dt_out: float) -> bool:
+        self._dt = dt_out
+        if len(self._ids) < self.cfg.min_size:
+            self._alive = False
+        return self._alive
 
     def step(self, weight: float) -> Tuple[float, float, bool, float]:
         if not self._alive:
             return 0.0, 0.0, False, self._dt
 
-        rs, cs = [], []
-        alive_all = True
-        dts = []
-        for eid, ch in list(self.members.items()):
-            wi = weight * self._w_internal[eid]
-            r, c, alive, dt = ch.step(wi)
-            rs.append(r); cs.append(c); dts.append(dt)
-            if not alive:
-                alive_all = False
-                # remove dead member
-                self.remove(eid)
-
-        r_total = float(sum(rs))
-        c_total = float(sum(cs) + self.cfg.C_agg)
-        dt_out = float(np.mean(dts)) if dts else self._dt
-
-        # update internal stats on net (r-c)
-        net = r_total - c_total
-        self._mu = (1 - self._beta) * self._mu + self._beta * net
-        self._var = (1 - self._beta) * self._var + self._beta * (net - self._mu) ** 2
-        # drawdown
-        self._dd_val += net
-        self._dd_peak = max(self._dd_peak, self._dd_val)
-        self._dd_max = max(self._dd_max, self._dd_peak - self._dd_val)
-        # crude cvar proxy: EWMA of negative net
-        self._cvar = (1 - self._beta) * self._cvar + self._beta * min(net, 0.0)
-
-        self._dt = dt_out
-        if len(self.members) < self.cfg.min_size:
-            self._alive = False
+        r_total, c_total, dt_out = self._step_members(weight)
+        self._update_stats(r_total - c_total)
+        return r_total, c_total, self._end_step(dt_out), dt_out
 
-        return r_total, c_total, self._alive, dt_out
+    def _update_stats(self, net: float):
+        """Update internal stats on net (r-c)."""
+        if self._bank is not None:
+            self._bank.update_row(self._bank_row, net)
+            return
+        d = self.__dict__
+        d.update(zip(_STAT_KEYS, _stats_step(*[d[key] for key in _STAT_KEYS], net)))
 
     def state(self) -> Dict[str, float]:
+        bank = self._bank
+        if bank is None:
+            d = self.__dict__
+            mu, var, dd_max, cvar, alive = d["_mu"], d["_var"], d["_dd_max"], d["_cvar"], d["_alive"]
+        else:
+            mu, var, _, _, _, dd_max, cvar = bank._stats[self._bank_row].tolist()
+            alive = bank._alive[self._bank_row]
         return {
-            "mu": float(self._mu),
-            "vol": float(math.sqrt(max(self._var, 0.0))),
-            "dd": float(self._dd_max),
-            "cvar": float(self._cvar),
-            "size": float(len(self.members)),
-            "alive": float(1.0 if self._alive else 0.0),
+            "mu": float(mu),
+            "vol": float(math.sqrt(max(var, 0.0))),
+            "dd": float(dd_max),
+            "cvar": float(cvar),
+            "size": float(len(self._ids)),
+            "alive": float(1.0 if alive else 0.0),
         }
 
     def stable(self) -> bool:
@@ -174,7 +496,9 @@ class StackManager:
             min_size=self.stack_cfg.min_size,
             max_size=self.stack_cfg.max_size,
         )
-        self.stacks: Dict[str, StackChannel] = {}
+        # stack statistics as columns; a stack holds a row while it is in self.stacks
+        self.bank = StackBank()
+        self.stacks: Dict[str, StackChannel] = _StackTable(self.bank)
         self._counter = 0
 
         self.sediment = sediment
@@ -187,6 +511,8 @@ class StackManager:
         self._t_counter = 0
         # ensure we emit at most one rejection per time step to avoid flooding
         self._last_reject_t: int = -1
+        # low-correlation adjacency for formation (rebuilt if tau_corr changes)
+        self._corr_graph: Optional[CorrelationGraph] = None
 
     def set_context(self, *, world_id: Optional[str] = None, phase_id: Optional[str] = None, run_id: Optional[str] = None):
         if world_id is not None:
@@ -208,137 +534,229 @@ class StackManager:
         if self.telemetry is not None:
             self.telemetry.log(t=t, event_type=event_type, subject_id=str(subject_id), **attrs)
 
+    def step_stacks(self, weights: Dict[str, float]) -> Dict[str, Tuple[float, float, bool, float]]:
+        """Step the stacks in `weights` (stack_id -> weight) as one batch.
+
+        Same per-stack results as calling `step` on each. Stacks whose
+        members are rows of one explorer bank are stepped together with one
+        `step_rows` call per bank (from `_ROWS_MIN_STACKS` stacks on), and
+        the statistics of all stepped stacks are updated with one
+        `StackBank.update` (from `_UPDATE_MIN_STACKS` stacks on).
+        """
+        out: Dict[str, Tuple[float, float, bool, float]] = {}
+        stepped: List[Tuple[str, StackChannel, float, float, float]] = []
+        banked: Dict[int, Tuple[object, List[Tuple[str, StackChannel, float]]]] = {}
+        for sid, wi in weights.items():
+            st = self.stacks[sid]
+            if not st._alive:
+                out[sid] = (0.0, 0.0, False, st._dt)
+            elif st._rows_bank is not None:
+                banked.setdefault(id(st._rows_bank), (st._rows_bank, []))[1].append((sid, st, wi))
+            else:
+                stepped.append((sid, st, *st._step_members(wi)))
+        for bank, group in banked.values():
+            if len(group) >= _ROWS_MIN_STACKS:
+                stepped.extend(self._step_banked(bank, group))
+            else:
+                stepped.extend((sid, st, *st._step_members(wi)) for sid, st, wi in group)
+
+        if len(stepped) >= _UPDATE_MIN_STACKS:
+            rows = np.array([st._bank_row for _, st, _, _, _ in stepped], dtype=np.intp)
+            self.bank.update(rows, np.array([r_total - c_total for _, _, r_total, c_total, _ in stepped]))
+        else:
+            for _, st, r_total, c_total, _ in stepped:
+                st._update_stats(r_total - c_total)
+        for sid, st, r_total, c_total, dt_out in stepped:
+            out[sid] = (r_total, c_total, st._end_step(dt_out), dt_out)
+        return {sid: out[sid] for sid in weights}
+
+    @staticmethod
+    def _step_banked(bank, group: List[Tuple[str, StackChannel, float]]) -> List[Tuple[str, StackChannel, float, float, float]]:
+        """Step the members of stacks that share one explorer bank at once.
+
+        Per-stack sums are left folds over the member positions (the order
+        `StackChannel._step_members` uses), so the results are the same.
+        """
+        stacks = [st for _, st, _ in group]
+        lens = np.array([len(st._rows) for st in stacks])
+        w_each = np.array([wi * st._w_each for _, st, wi in group])
+        r, c, alive, dt = bank.step_rows(np.concatenate([st._rows for st in stacks]), np.repeat(w_each, lens))
+
+        # (stack, position) layout, padded with zeros past each stack's end
+        width = int(lens.max())
+        pad = np.arange(width) < lens[:, None]
+        idx = np.where(pad, (np.cumsum(lens) - lens)[:, None] + np.arange(width), 0)
+        r_total = _fold_columns(np.where(pad, r[idx], 0.0))
+        c_total = _fold_columns(np.where(pad, c[idx], 0.0)) + np.array([st.cfg.C_agg for st in stacks])
+        dt_out = _fold_columns(np.where(pad, dt[idx], 0.0)) / lens
+
+        if not alive.all():
+            keep = np.where(pad, alive[idx], True)
+            for k in np.flatnonzero(~keep.all(axis=1)).tolist():
+                stacks[k]._keep(keep[k, : lens[k]].tolist())
+        return [
+            (sid, st, r_k, c_k, dt_k)
+            for (sid, st, _), r_k, c_k, dt_k in zip(group, r_total.tolist(), c_total.tolist(), dt_out.tolist())
+        ]
+
     def try_form_stack(self, broker: Broker, channels: Dict[str, PhaseCChannel]) -> Optional[str]:
         """Form one stack if possible. Returns new stack_id or None."""
+        formed = self.try_form_stacks(broker, channels, max_stacks=1)
+        return formed[0] if formed else None
+
+    def try_form_stacks(
+        self, broker: Broker, channels: Dict[str, PhaseCChannel], max_stacks: Optional[int] = None
+    ) -> List[str]:
+        """Form disjoint stacks until no candidate set remains (or max_stacks).
+
+        Each stack is the one `try_form_stack` would form next. Returns the
+        new stack_ids in formation order.
+        """
         th = self.thresholds
         ids = list(channels.keys())
 
-        # Candidate filter by per-explorer metrics
-        cand: List[str] = []
-        snap = broker.metric_snapshot()
-        for eid in ids:
-            m = snap.get(eid)
-            if m is None:
-                continue
-            if m["alive"] < 0.5:
-                continue
-            if m["mu"] < th.tau_mu:
-                continue
-            if m["vol"] > th.tau_vol:
-                continue
-            if m["cvar"] < th.tau_cvar:
-                continue
-            if m["surv"] < th.tau_surv:
-                continue
-            cand.append(eid)
+        # Candidate filter by per-explorer metrics (one mask over broker columns)
+        rows = broker.lookup(ids)
+        known = np.flatnonzero(rows >= 0)
+        m = broker.metric_arrays(rows[known])
+        keep = ~(
+            (m["alive"] < 0.5)
+            | (m["mu"] < th.tau_mu)
+            | (m["vol"] > th.tau_vol)
+            | (m["cvar"] < th.tau_cvar)
+            | (m["surv"] < th.tau_surv)
+        )
+        cand: List[str] = [ids[k] for k in known[keep].tolist()]
 
         if len(cand) < th.min_size:
-            return None
-
-        # Build low-correlation subsets greedily, with sediment-aware retries (v0)
-        def build_subset(seed: str) -> List[str]:
-            chosen: List[str] = []
-            for eid in [seed] + [x for x in cand if x != seed]:
-                if len(chosen) == 0:
-                    chosen.append(eid)
-                    continue
-                ok = True
-                for other in chosen:
-                    if abs(broker.rho(eid, other)) > th.tau_corr:
-                        ok = False
-                        break
-                if ok:
-                    chosen.append(eid)
+            return []
+
+        # Low-correlation structure among candidates: compatible[i, j] iff
+        # not |rho| > tau_corr (bitset rows of the broker's correlation graph)
+        graph = self._corr_graph
+        if graph is None or graph.tau != float(th.tau_corr):
+            graph = self._corr_graph = CorrelationGraph(th.tau_corr)
+        graph.sync(broker)
+        compatible = graph.compatible(cand)
+        free = np.ones(len(cand), dtype=bool)
+
+        # greedy in candidate order: a member joins if compatible with all chosen
+        def build_subset(seed: int) -> List[int]:
+            chosen = [seed]
+            allowed = compatible[seed] & free
+            pos = 0
+            while True:
+                rest = allowed[pos:]
+                if not rest.any():
+                    break
+                nxt = pos + int(np.argmax(rest))
+                chosen.append(nxt)
+                allowed &= compatible[nxt]
+                pos = nxt + 1
                 if len(chosen) >= th.max_size:
                     break
             return chosen
 
-        # try different seeds until we find a non-forbidden candidate (or give up)
-        chosen: List[str] = []
-        for seed in cand:
-            trial = build_subset(seed)
-            if len(trial) < th.min_size:
-                continue
-            if self.sediment is not None:
-                members_fp = self._fingerprint_members(trial)
-                if self.sediment.is_forbidden(candidate_members=members_fp, phase_id=self.phase_id):
-                    # emit at most one rejection per time step to stabilize late-phase counts
-                    if self._last_reject_t != self._t_counter:
-                        self._emit(
-                            self._t_counter,
-                            "SEDIMENT_FORMATION_REJECTED",
-                            "stack_candidate",
-                            members=members_fp,
-                            phase_id=self.phase_id,
-                            world_id=self.world_id,
-                            run_id=self.run_id,
-                        )
-                        self._last_reject_t = self._t_counter
+        formed: List[str] = []
+        while max_stacks is None or len(formed) < max_stacks:
+            if int(free.sum()) < th.min_size:
+                break
+            # try different seeds until we find a non-forbidden candidate (or give up)
+            chosen: List[str] = []
+            for seed in np.flatnonzero(free).tolist():
+                trial = [cand[k] for k in build_subset(seed)]
+                if len(trial) < th.min_size:
                     continue
-            chosen = trial
-            break
-
-        if len(chosen) < th.min_size:
-            return None
-
-        # Create stack, remove members from channels
-        members = {eid: channels[eid] for eid in chosen}
-        for eid in chosen:
-            del channels[eid]
-
-        sid = self._next_id()
-        stack = StackChannel(members, cfg=self.stack_cfg, stack_id=sid)
-        self.stacks[sid] = stack
-        channels[sid] = stack
-
-        return sid
+                if self.sediment is not None:
+                    members_fp = self._fingerprint_members(trial)
+                    if self.sediment.is_forbidden(candidate_members=members_fp, phase_id=self.phase_id):
+                        # emit at most one rejection per time step to stabilize late-phase counts
+                        if self._last_reject_t != self._t_counter:
+                            self._emit(
+                                self._t_counter,
+                                "SEDIMENT_FORMATION_REJECTED",
+                                "stack_candidate",
+                                members=members_fp,
+                                phase_id=self.phase_id,
+                                world_id=self.world_id,
+                                run_id=self.run_id,
+                            )
+                            self._last_reject_t = self._t_counter
+                        continue
+                chosen = trial
+                break
+
+            if len(chosen) < th.min_size:
+                break
+
+            # Create stack, remove members from channels
+            members = {eid: channels[eid] for eid in chosen}
+            for eid in chosen:
+                del channels[eid]
+                free[cand.index(eid)] = False
+
+            sid = self._next_id()
+            stack = StackChannel(members, cfg=self.stack_cfg, stack_id=sid)
+            self.stacks[sid] = stack
+            channels[sid] = stack
+            formed.append(sid)
+
+        return formed
 
     def maintain(self, channels: Dict[str, PhaseCChannel]):
         """Remove dead/unstable stacks.
 
+        Stability is read off the StackBank for all stacks at once; only the
+        stacks that dissolve are visited (in formation order).
+
         Phase E: on dissolution, emit STACK_DISSOLVED and write Sediment node.
         """
         self._t_counter += 1
         t = self._t_counter
 
-        to_remove: List[str] = []
-        for sid, st in list(self.stacks.items()):
-            if sid not in channels:
-                to_remove.append(sid)
-                continue
-
-            if not st.stable():
-                members_fp = self._fingerprint_members(st.members.keys())
-                mask = {"masked_members": members_fp, "mask_depth": 1}
+        gone = self.stacks.keys() - channels.keys()
+        if len(self.stacks) >= _BANK_MIN_STACKS:
+            bank = self.bank
+            rows = bank.rows_in_order(np.flatnonzero(bank._used[: bank._n] & ~bank.stable_mask()))
+            unstable = [bank.ids[row] for row in rows.tolist()]
+        else:
+            unstable = [sid for sid, st in self.stacks.items() if not st.stable()]
 
-                # Telemetry: dissolution
-                self._emit(
-                    t,
-                    "STACK_DISSOLVED",
-                    sid,
+        for sid in unstable:
+            if sid in gone:
+                continue
+            st = self.stacks[sid]
+            members_fp = self._fingerprint_members(st._ids)
+            mask = {"masked_members": members_fp, "mask_depth": 1}
+
+            # Telemetry: dissolution
+            self._emit(
+                t,
+                "STACK_DISSOLVED",
+                sid,
+                members=members_fp,
+                mask=mask,
+                phase_id=self.phase_id,
+                world_id=self.world_id,
+                run_id=self.run_id,
+            )
+
+            # Sediment insertion
+            if self.sediment is not None:
+                self.sediment.add_node(
                     members=members_fp,
                     mask=mask,
-                    phase_id=self.phase_id,
                     world_id=self.world_id,
+                    phase_id=self.phase_id,
+                    t=t,
                     run_id=self.run_id,
                 )
 
-                # Sediment insertion
-                if self.sediment is not None:
-                    self.sediment.add_node(
-                        members=members_fp,
-                        mask=mask,
-                        world_id=self.world_id,
-                        phase_id=self.phase_id,
-                        t=t,
-                        run_id=self.run_id,
-                    )
-
-                # dissolve: re-expose members if still alive
-                for eid, ch in st.members.items():
-                    channels[eid] = ch
-                del channels[sid]
-                to_remove.append(sid)
-
-        for sid in to_remove:
+            # dissolve: re-expose members if still alive
+            for eid, ch in zip(st._ids, st._channels):
+                channels[eid] = ch
+            del channels[sid]
+            del self.stacks[sid]
+
+        for sid in sorted(gone):
             self.stacks.pop(sid, None)
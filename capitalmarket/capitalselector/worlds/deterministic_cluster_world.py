@@ -20,3 +20,7 @@ class DeterministicClusterWorld:
     def step(self, t: int) -> Dict[str, Any]:
         _ = t
         return {"r": self.r_vec.copy(), "c": 0.0}
+
+    def step_block(self, t0: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        _ = t0
+        return np.tile(self.r_vec, (int(n), 1)), np.zeros(int(n))
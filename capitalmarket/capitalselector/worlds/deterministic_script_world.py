@@ -14,3 +14,7 @@ class DeterministicScriptWorld:
     def step(self, t: int) -> Dict[str, Any]:
         _ = t  # unused; world is time-invariant
         return {"r": self._r, "c": self._c}
+
+    def step_block(self, t0: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        _ = t0
+        return np.tile(self._r, (int(n), 1)), np.full(int(n), self._c)
@@ -25,3 +25,10 @@ class FlipClusterWorld:
         else:
             r_vec = self._r_pre if t < int(self.flip_time) else self._r_post
         return {"r": r_vec.copy(), "c": 0.0}
+
+    def step_block(self, t0: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        t = np.arange(int(t0), int(t0) + int(n))
+        R = np.where((t < int(self.flip_time))[:, None], self._r_pre, self._r_post)
+        shock = (self.shock_start <= t) & (t < self.shock_end)
+        R[shock] = self._r_shock
+        return R, np.zeros(int(n))
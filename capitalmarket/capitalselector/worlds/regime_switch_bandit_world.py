@@ -1,12 +1,73 @@
 from __future__ import annotations
 
+from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Dict, Any
 import numpy as np
 
 
+class _RegimeBlockSampler(ABC):
+    """`step_block` support shared by the regime-switching worlds.
+
+    Consumes `_rng` exactly like n sequential `step` calls. Regime flips
+    (`random()`) and noise (`normal`) interleave on one stream, so without a
+    regime or noise sequence only the raw draws stay step-wise (regime path
+    and noise scale are computed for the whole block); otherwise the
+    remaining draws are taken in a single call. Worlds implement
+    `_sigma_block`; one that does not cannot be instantiated.
+    """
+
+    _MEAN_A = np.array([0.02, 0.0, 0.0, 0.0, 0.0], dtype=float)
+    _MEAN_B = np.array([0.0, 0.0, 0.0, 0.02, 0.0], dtype=float)
+
+    @abstractmethod
+    def _sigma_block(self, t: np.ndarray, is_a: np.ndarray):
+        """Noise scale for steps t: a float or an (n, 5) array."""
+
+    def _means_block(self, is_a: np.ndarray) -> np.ndarray:
+        return np.where(is_a[:, None], self._MEAN_A, self._MEAN_B)
+
+    def _flip_block(self, n: int) -> np.ndarray:
+        return self._flips_to_path(self._rng.random(n))
+
+    def _flips_to_path(self, u: np.ndarray) -> np.ndarray:
+        """Regime path from the flip draws u (flip where u < p)."""
+        is_a = (self._regime == "A") ^ (np.cumsum(u < float(self.p)) % 2 == 1)
+        if len(u):
+            self._regime = "A" if is_a[-1] else "B"
+        return is_a
+
+    def _regime_block(self, t0: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        """Regime path (True = "A") and noise for steps t0 .. t0 + n - 1."""
+        t = np.arange(int(t0), int(t0) + int(n))
+        noise_seq = getattr(self, "noise_sequence", None)
+        if self.regime_sequence is not None:
+            is_a = np.array([self.regime_sequence[i] == "A" for i in t], dtype=bool)
+        elif noise_seq is not None:
+            is_a = self._flip_block(int(n))
+        else:
+            # interleaved draws: only the raw draws stay step-wise;
+            # normal(0, sigma) is sigma * standard_normal() draw for draw
+            u = np.empty(int(n), dtype=float)
+            z = np.empty((int(n), 5), dtype=float)
+            random, standard_normal = self._rng.random, self._rng.standard_normal
+            for i in range(int(n)):
+                u[i] = random()
+                standard_normal(out=z[i])
+            is_a = self._flips_to_path(u)
+            return is_a, self._sigma_block(t, is_a) * z
+
+        if noise_seq is not None:
+            noise = np.asarray(noise_seq[int(t0) : int(t0) + int(n)], dtype=float)
+            if noise.shape != (int(n), 5):
+                raise IndexError("noise_sequence does not cover the requested block")
+        else:
+            noise = self._rng.normal(0.0, self._sigma_block(t, is_a), size=(int(n), 5))
+        return is_a, noise
+
+
 @dataclass
-class RegimeSwitchBanditWorld:
+class RegimeSwitchBanditWorld(_RegimeBlockSampler):
     """Regime-switching bandit world with deterministic RNG."""
 
     p: float = 0.05
@@ -60,9 +121,31 @@ class RegimeSwitchBanditWorld:
         c = c_regime + c_shock
         return {"r": r, "c": c}
 
+    def _sigma_block(self, t: np.ndarray, is_a: np.ndarray):
+        return float(self.sigma)
+
+    def step_block(self, t0: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        is_a, noise = self._regime_block(t0, n)
+        R = self._means_block(is_a) + noise
+        t = np.arange(int(t0), int(t0) + int(n))
+        if self.shock_times and self.shock_size:
+            rows = np.flatnonzero([int(ti) in self.shock_times for ti in t])
+            cols = np.where(is_a[rows], 0, 3)
+            R[rows, cols] = R[rows, cols] - float(self.shock_size)
+        if self.shock_sequence is not None:
+            shock = np.array([bool(self.shock_sequence[i]) for i in t], dtype=bool)
+        elif float(self.q) > 0.0:
+            shock = self._shock_rng.random(int(n)) < float(self.q)
+        else:
+            shock = np.zeros(int(n), dtype=bool)
+
+        c_regime = np.where(is_a, 0.0, float(self.c_high))
+        c_shock = np.where(shock, float(self.c_spike), 0.0)
+        return R, c_regime + c_shock
+
 
 @dataclass
-class RuinRegimeBanditWorld:
+class RuinRegimeBanditWorld(_RegimeBlockSampler):
     """Regime-switching world with a ruinous regime mean."""
 
     p: float = 0.05
@@ -95,6 +178,15 @@ class RuinRegimeBanditWorld:
         r = mean + noise
         return {"r": r, "c": 0.0}
 
+    _MEAN_B = np.array([-0.03, 0.0, 0.0, 0.0, 0.0], dtype=float)
+
+    def _sigma_block(self, t: np.ndarray, is_a: np.ndarray):
+        return float(self.sigma)
+
+    def step_block(self, t0: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        is_a, noise = self._regime_block(t0, n)
+        return self._means_block(is_a) + noise, np.zeros(int(n))
+
 
 @dataclass
 class MarginalMatchedControlWorld:
@@ -115,9 +207,23 @@ class MarginalMatchedControlWorld:
         r = mean + noise
         return {"r": r, "c": 0.0}
 
+    def step_block(self, t0: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        _ = t0
+        # index and noise draws interleave on one stream: only the raw draws
+        # stay step-wise
+        u = np.empty(int(n), dtype=float)
+        z = np.empty((int(n), 5), dtype=float)
+        random, standard_normal = self._rng.random, self._rng.standard_normal
+        for i in range(int(n)):
+            u[i] = random()
+            standard_normal(out=z[i])
+        R = np.zeros((int(n), 5), dtype=float)
+        R[np.arange(int(n)), np.where(u < 0.5, 0, 3)] = 0.02
+        return R + float(self.sigma) * z, np.zeros(int(n))
+
 
 @dataclass
-class SubsetRegimeBanditWorld:
+class SubsetRegimeBanditWorld(_RegimeBlockSampler):
     """Regime-switching world with subset-based channel boosts."""
 
     p: float = 0.05
@@ -146,9 +252,19 @@ class SubsetRegimeBanditWorld:
         r = mean + noise
         return {"r": r, "c": 0.0}
 
+    _MEAN_A = np.array([0.02, 0.02, 0.0, 0.0, 0.0], dtype=float)
+    _MEAN_B = np.array([0.0, 0.0, 0.0, 0.02, 0.02], dtype=float)
+
+    def _sigma_block(self, t: np.ndarray, is_a: np.ndarray):
+        return float(self.sigma)
+
+    def step_block(self, t0: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        is_a, noise = self._regime_block(t0, n)
+        return self._means_block(is_a) + noise, np.zeros(int(n))
+
 
 @dataclass
-class VolatilityRegimeBanditWorld:
+class VolatilityRegimeBanditWorld(_RegimeBlockSampler):
     """Regime-switching world with regime-dependent volatility."""
 
     p: float = 0.05
@@ -180,9 +296,17 @@ class VolatilityRegimeBanditWorld:
         r = mean + noise
         return {"r": r, "c": 0.0}
 
+    def _sigma_block(self, t: np.ndarray, is_a: np.ndarray):
+        sigma = np.where(is_a, float(self.sigma_low), float(self.sigma_high))
+        return np.broadcast_to(sigma[:, None], (len(sigma), 5))
+
+    def step_block(self, t0: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        is_a, noise = self._regime_block(t0, n)
+        return self._means_block(is_a) + noise, np.zeros(int(n))
+
 
 @dataclass
-class NonStationaryVolatilityBanditWorld:
+class NonStationaryVolatilityBanditWorld(_RegimeBlockSampler):
     """Regime-switching world with time-varying volatility schedule."""
 
     p: float = 0.05
@@ -243,9 +367,27 @@ class NonStationaryVolatilityBanditWorld:
         r = mean + noise
         return {"r": r, "c": 0.0}
 
+    def _sigma_block(self, t: np.ndarray, is_a: np.ndarray):
+        mode = str(self.volatility_mode)
+        if mode == "stationary":
+            return float(self.sigma_stationary)
+        if mode not in ("drift_up", "asym_drift"):
+            raise ValueError(f"Unsupported volatility_mode: {mode}")
+        denom = float(max(1, int(self.horizon) - 1))
+        frac = t.astype(float) / denom
+        sigma_drift = self.sigma_low + (self.sigma_high - self.sigma_low) * frac
+        sigma = np.repeat(sigma_drift[:, None], 5, axis=1)
+        if mode == "asym_drift":
+            sigma[np.arange(len(t)), np.where(is_a, 0, 3)] = float(self.sigma_stationary)
+        return sigma
+
+    def step_block(self, t0: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        is_a, noise = self._regime_block(t0, n)
+        return self._means_block(is_a) + noise, np.zeros(int(n))
+
 
 @dataclass
-class AdversarialPhaseShiftBanditWorld:
+class AdversarialPhaseShiftBanditWorld(_RegimeBlockSampler):
     """Two-phase world with adversarial SNR reversal under fixed means."""
 
     p: float = 0.001
@@ -293,6 +435,18 @@ class AdversarialPhaseShiftBanditWorld:
         r = mean + noise
         return {"r": r, "c": 0.0}
 
+    def _sigma_block(self, t: np.ndarray, is_a: np.ndarray):
+        sigma = np.full((len(t), 5), float(self.sigma_other), dtype=float)
+        rows = np.arange(len(t))
+        sigma[rows, np.where(is_a, 0, 3)] = float(self.sigma_active_high)
+        sigma[rows, np.where(is_a, 3, 0)] = float(self.sigma_opposing_low)
+        sigma[t < int(self.phase_split)] = float(self.sigma_phase1)
+        return sigma
+
+    def step_block(self, t0: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        is_a, noise = self._regime_block(t0, n)
+        return self._means_block(is_a) + noise, np.zeros(int(n))
+
 
 @dataclass
 class ShuffledRegimeBanditWorld:
@@ -328,6 +482,15 @@ class ShuffledRegimeBanditWorld:
         r = mean + noise
         return {"r": r, "c": 0.0}
 
+    def step_block(self, t0: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        if self.noise_sequence is None:
+            raise ValueError("noise_sequence is required for ShuffledRegimeBanditWorld")
+        idx = self._perm[int(t0) : int(t0) + int(n)]
+        is_a = np.array([self.regime_sequence[int(i)] == "A" for i in idx], dtype=bool)
+        noise = np.asarray(self.noise_sequence[int(t0) : int(t0) + int(n)], dtype=float)
+        R = np.where(is_a[:, None], _RegimeBlockSampler._MEAN_A, _RegimeBlockSampler._MEAN_B) + noise
+        return R, np.zeros(int(n))
+
 
 def _generate_regime_sequence(*, p: float, seed: int, length: int) -> list[str]:
     rng = np.random.default_rng(int(seed))
@@ -0,0 +1,93 @@
+import numpy as np
+
+from capitalmarket.capitalselector.batch import BatchedCapitalSelector
+from capitalmarket.capitalselector.builder import CapitalSelectorBuilder
+from capitalmarket.capitalselector.cuda_state import canonical_state_dump
+from capitalmarket.capitalselector.interfaces import validate_world_output
+from capitalmarket.capitalselector.rebirth import SwitchTypePolicy
+from capitalmarket.capitalselector.worlds.regime_switch_bandit_world import RegimeSwitchBanditWorld
+
+
+def _assert_dump_identical(a, b):
+    assert a.keys() == b.keys()
+    for key in a:
+        va, vb = a[key], b[key]
+        if isinstance(va, dict):
+            _assert_dump_identical(va, vb)
+        elif isinstance(va, np.ndarray):
+            np.testing.assert_array_equal(va, vb)
+        else:
+            assert va == vb, key
+
+
+def _make_selectors(B: int, K: int):
+    selectors = []
+    for b in range(B):
+        sel = (
+            CapitalSelectorBuilder()
+            .with_K(K)
+            .with_stats(0.01 + 0.02 * b)
+            .with_reweight_eta(0.5 + b)
+            .with_rebirth_threshold(0.5 + 0.05 * b)
+            .build()
+        )
+        selectors.append(sel)
+    return selectors
+
+
+def _world_block(seed: int, steps: int):
+    world = RegimeSwitchBanditWorld(p=0.05, sigma=0.01, seed=seed, c_high=0.01)
+    rs, cs = [], []
+    for t in range(steps):
+        r_vec, c_total = validate_world_output(world.step(t))
+        rs.append(r_vec)
+        cs.append(c_total)
+    return np.stack(rs), np.asarray(cs)
+
+
+def test_batched_matches_per_object_selectors_bitwise():
+    B, steps = 4, 300
+    blocks = [_world_block(seed, steps) for seed in range(B)]
+    K = blocks[0][0].shape[1]
+
+    reference = _make_selectors(B, K)
+    batch = BatchedCapitalSelector.from_selectors(_make_selectors(B, K))
+
+    for t in range(steps):
+        r = np.stack([blocks[b][0][t] for b in range(B)])
+        c = np.array([blocks[b][1][t] for b in range(B)])
+        for b, sel in enumerate(reference):
+            sel.feedback_vector(r[b], c[b])
+        batch.feedback_batch(r, c)
+
+    for ref, lane in zip(reference, batch.to_selectors()):
+        _assert_dump_identical(canonical_state_dump(ref), canonical_state_dump(lane))
+
+
+def test_batched_rebirth_is_per_lane():
+    selectors = _make_selectors(2, 3)
+    for sel in selectors:
+        sel.rebirth_policy = SwitchTypePolicy()
+    batch = BatchedCapitalSelector.from_selectors(selectors)
+
+    r = np.array([[-10.0, 0.0, 0.0], [0.1, 0.0, 0.0]])
+    reborn = batch.feedback_batch(r, np.zeros(2))
+    for sel, r_vec in zip(selectors, r):
+        sel.feedback_vector(r_vec, 0.0)
+
+    assert reborn.tolist() == [True, False]
+    assert batch.kinds == ["banker", "entrepreneur"]
+    np.testing.assert_array_equal(batch.w[0], np.ones(3) / 3)
+    for ref, lane in zip(selectors, batch.to_selectors()):
+        _assert_dump_identical(canonical_state_dump(ref), canonical_state_dump(lane))
+
+
+def test_batched_to_selectors_writes_in_place():
+    selectors = _make_selectors(3, 5)
+    batch = BatchedCapitalSelector.from_selectors(selectors)
+    batch.feedback_batch(np.full((3, 5), 0.01), np.zeros(3))
+
+    out = batch.to_selectors(selectors)
+    assert out[0] is selectors[0]
+    np.testing.assert_array_equal(selectors[2].w, batch.w[2])
+    assert selectors[1].wealth == batch.wealth[1]
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.broker import Broker, BrokerConfig
+from capitalmarket.capitalselector.cuda_state import canonical_state_dump
+from capitalmarket.capitalselector import CapitalSelectorBuilder
+
+
+def _drive(broker, ids, steps, seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(steps):
+        r = rng.normal(0.0, 0.3, size=len(ids))
+        broker.observe_batch(ids, r, 0.01, rng.random(len(ids)) > 0.01, rng.choice([0.5, 1.0, 2.0], size=len(ids)))
+        pols = broker.decide_limits()
+        raw = {eid: 1.0 / len(ids) for eid in ids}
+        w = broker.apply_decorrelation_cap(broker.apply_policies(raw))
+        for eid, v in w.items():
+            if v > 0 and pols[eid].limit > 0:
+                broker.mark_funded(eid)
+
+
+@pytest.mark.parametrize(
+    "cfg",
+    [
+        BrokerConfig(sigma_ref=0.3, base_min_interval=1.5, cooldown_factor=1.5),
+        BrokerConfig(corr_mode="sketch", corr_sketch_dim=16, corr_audit_size=5, tail_levels=(0.05, 0.1)),
+        BrokerConfig(tail_levels=(0.01, 0.1), tail_method="p2", tail_inhibit_levels=(0.01,)),
+    ],
+)
+def test_save_load_resumes_identically(tmp_path, cfg):
+    ids = [f"e{i}" for i in range(25)]
+    broker = Broker(cfg)
+    _drive(broker, ids, 30, seed=0)
+    broker.mark_funded("not-yet-observed")
+
+    path = tmp_path / "broker.npz"
+    broker.save(path)
+    restored = Broker.load(path)
+    assert restored.cfg == broker.cfg
+    assert canonical_state_dump(CapitalSelectorBuilder().build(), broker=restored) == canonical_state_dump(
+        CapitalSelectorBuilder().build(), broker=broker
+    )
+    assert restored.eligible_ids() == broker.eligible_ids()
+
+    _drive(broker, ids + ["not-yet-observed"], 20, seed=1)
+    _drive(restored, ids + ["not-yet-observed"], 20, seed=1)
+    a, b = broker.state_dict(), restored.state_dict()
+    assert a.keys() == b.keys()
+    for key in a:
+        np.testing.assert_array_equal(a[key], b[key], err_msg=key)
+    assert restored.metric_snapshot() == broker.metric_snapshot()
+    np.testing.assert_array_equal(restored.rho_matrix(ids), broker.rho_matrix(ids))
+
+
+def test_load_rejects_unknown_format(tmp_path):
+    state = Broker().state_dict()
+    state["format"] = np.array(99)
+    with pytest.raises(ValueError):
+        Broker.from_state_dict(state)
+
+
+def test_save_writes_exactly_the_given_path(tmp_path):
+    broker = Broker()
+    broker.observe("a", 0.1, 0.0, True, 1.0)
+    path = tmp_path / "ckpt"
+    broker.save(path)
+    assert path.exists() and not (tmp_path / "ckpt.npz").exists()
+    assert Broker.load(path).ids == ["a"]
+    assert Broker.load(str(path)).ids == ["a"]
+
+
+def test_state_dict_rejects_non_str_ids(tmp_path):
+    broker = Broker()
+    broker.observe(7, 0.1, 0.0, True, 1.0)
+    with pytest.raises(TypeError):
+        broker.save(tmp_path / "ckpt.npz")
+    assert not (tmp_path / "ckpt.npz").exists()
@@ -0,0 +1,60 @@
+import numpy as np
+
+from capitalmarket.capitalselector.broker import Broker, BrokerConfig, EWMACov
+
+
+def _observe_round(broker, ids, rng):
+    for eid in ids:
+        broker.observe(eid, float(rng.normal(0.0, 0.1)), 0.0, True, 1.0)
+
+
+def test_dense_covariance_matches_pairwise_ewma_and_is_order_free():
+    cfg = BrokerConfig()
+    broker = Broker(cfg)
+    ids = ["a", "b", "c", "d"]
+    ref = {}
+    rng = np.random.default_rng(0)
+    for step in range(50):
+        _observe_round(broker, ids, rng)
+        # alternate the pair order; the legacy (a, b)/(b, a) keys would split here
+        active = ids[: 2 + step % 3]
+        active = active if step % 2 else active[::-1]
+        broker.update_correlations(active)
+        x = {eid: broker.metrics[eid].last_r - broker.metrics[eid].mu.mu for eid in active}
+        for i, a in enumerate(active):
+            for b in active[i + 1 :]:
+                key = tuple(sorted((a, b)))
+                ref.setdefault(key, EWMACov(beta=cfg.beta_var)).update(x[a], x[b])
+
+    var = {eid: max(broker.metrics[eid].var.var, 1e-12) for eid in ids}
+    for (a, b), cov in ref.items():
+        expected = cov.cov / (np.sqrt(var[a] * var[b]) + 1e-12)
+        assert broker.rho(a, b) == broker.rho(b, a) == expected
+
+    rho = broker.rho_matrix(ids)
+    assert np.array_equal(rho, rho.T)
+    for i, a in enumerate(ids):
+        for j, b in enumerate(ids):
+            assert rho[i, j] == broker.rho(a, b)
+
+
+def test_drop_correlations_compacts_active_set():
+    broker = Broker()
+    ids = [f"e{i}" for i in range(20)]
+    rng = np.random.default_rng(1)
+    for _ in range(10):
+        _observe_round(broker, ids, rng)
+        broker.update_correlations(ids)
+    before = broker.rho_matrix(ids)
+
+    dropped = ids[::3]
+    broker.drop_correlations(dropped)
+    kept = [eid for eid in ids if eid not in dropped]
+    assert broker._corr.active.ids == kept
+    kept_idx = [ids.index(eid) for eid in kept]
+    np.testing.assert_array_equal(broker.rho_matrix(kept), before[np.ix_(kept_idx, kept_idx)])
+    assert broker.rho(dropped[0], kept[0]) == 0.0
+
+    # re-entering ids start from a fresh covariance
+    broker.update_correlations([dropped[0], kept[0]])
+    assert broker.rho(dropped[0], kept[0]) != 0.0
@@ -0,0 +1,48 @@
+import numpy as np
+
+from capitalmarket.capitalselector.broker import Broker, BrokerConfig
+
+
+def _exact(broker):
+    return [eid for eid in broker.ids if broker.is_eligible(eid)]
+
+
+def test_eligibility_index_matches_exact_predicate():
+    cfg = BrokerConfig(sigma_ref=0.3, base_min_interval=1.5, cooldown_factor=2.0, hard_block_dd=True)
+    broker = Broker(cfg)
+    ids = [f"e{i}" for i in range(60)]
+    rng = np.random.default_rng(0)
+    broker.mark_funded("late")  # funded before it was ever observed
+    for step in range(120):
+        sub = rng.permutation(len(ids))[: 40 + step % 20]
+        r = rng.normal(0.0, 0.2, size=len(sub))
+        broker.observe_batch([ids[i] for i in sub], r, 0.0, rng.random(len(sub)) > 0.002,
+                             rng.choice([0.25, 1.0, 2.5], size=len(sub)))
+        if step == 30:
+            broker.observe("late", 0.0, 0.0, True, 1.0)
+        if step % 3 == 0:
+            broker.decide_limits()
+        funded = [eid for eid in broker.eligible_ids() if rng.random() < 0.5]
+        for eid in funded:
+            broker.mark_funded(eid)
+
+        assert broker.eligible_ids() == _exact(broker)
+        rows = np.arange(len(broker))
+        assert broker.eligible_mask(rows).tolist() == [broker.is_eligible(eid) for eid in broker.ids]
+
+    # both gates were exercised
+    assert 0 < len(broker.eligible_rows()) < len(broker)
+    assert broker.column("blocked").any()
+
+
+def test_cooldown_expires_without_touching_other_rows():
+    broker = Broker(BrokerConfig(base_min_interval=3.0))
+    broker.observe_batch(["a", "b"], [0.0, 0.0], 0.0, True, 1.0)
+    broker.decide_limits()
+    broker.mark_funded("a")
+    assert broker.eligible_ids() == ["b"]
+    assert len(broker._cooling) == 1
+    for expected in (["b"], ["b"], ["a", "b"]):
+        broker.observe("b", 0.0, 0.0, True, 1.0)
+        assert broker.eligible_ids() == expected
+    assert not broker._cooling
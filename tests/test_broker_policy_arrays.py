@@ -0,0 +1,132 @@
+import copy
+import math
+
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.broker import Broker, BrokerConfig, PolicySnapshot
+
+
+def _legacy_limits(cfg, m, pol):
+    """Scalar reference of the per-explorer decide_limits rule."""
+    limit, min_interval, blocked = pol
+    if not m["alive"]:
+        return 0.0, min_interval, True
+    vol = math.sqrt(max(m["var"], 0.0))
+    min_interval = max(min_interval, cfg.base_min_interval)
+    if abs(m["mu"]) > 1e-12 and vol > cfg.k_var * abs(m["mu"]):
+        limit = max(cfg.min_limit, limit * cfg.lambda_down)
+    if m["cvar"] < -cfg.gamma_tail * cfg.sigma_ref:
+        limit = max(cfg.min_limit, limit * cfg.lambda_down)
+        if cfg.hard_block_tail:
+            blocked, limit = True, 0.0
+    if m["dd"] > cfg.k_dd * cfg.sigma_ref:
+        limit = max(cfg.min_limit, limit * cfg.lambda_down)
+        if cfg.hard_block_dd:
+            blocked, limit = True, 0.0
+    return limit, max(min_interval, m["dt"] * cfg.cooldown_factor), blocked
+
+
+def _drive(broker, ids, steps, seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(steps):
+        r = rng.normal(0.0, 0.3, size=len(ids))
+        r[rng.random(len(ids)) < 0.1] -= 1.5
+        alive = rng.random(len(ids)) > 0.01
+        dt = rng.choice([0.5, 1.0, 3.0], size=len(ids))
+        broker.observe_batch(ids, r, 0.0, alive, dt)
+
+
+@pytest.mark.parametrize("hard", [False, True])
+def test_vectorised_limits_match_scalar_rule(hard):
+    cfg = BrokerConfig(sigma_ref=0.2, hard_block_tail=hard, hard_block_dd=hard, base_min_interval=0.7)
+    broker = Broker(cfg)
+    ids = [f"e{i}" for i in range(50)]
+    _drive(broker, ids, 5, seed=2)
+    expected = {eid: (p.limit, p.min_interval, p.blocked) for eid, p in broker.policies.items()}
+    for _ in range(3):
+        cols = {name: broker.column(name).tolist() for name in ("last_alive", "mu", "var", "cvar", "dd", "dt_mu")}
+        expected = {
+            eid: _legacy_limits(
+                cfg,
+                {"alive": cols["last_alive"][i], "mu": cols["mu"][i], "var": cols["var"][i],
+                 "cvar": cols["cvar"][i], "dd": cols["dd"][i], "dt": cols["dt_mu"][i]},
+                pol,
+            )
+            for i, (eid, pol) in enumerate(expected.items())
+        }
+        pols = broker.decide_limits()
+        assert isinstance(pols, PolicySnapshot)
+        assert {eid: (p.limit, p.min_interval, p.blocked) for eid, p in pols.items()} == expected
+
+
+def _legacy_policies(broker, weights):
+    out = {}
+    for eid, w in weights.items():
+        if not broker.is_eligible(eid):
+            continue
+        w2 = min(float(w), broker.policies[eid].limit)
+        if w2 > 0:
+            out[eid] = w2
+    s = sum(out.values())
+    if s <= 0:
+        return {eid: 0.0 for eid in weights}
+    return {eid: w / s for eid, w in out.items()}
+
+
+def _legacy_cap(broker, weights):
+    cfg = broker.cfg
+    ids = [eid for eid, w in weights.items() if w > 0]
+    w = dict(weights)
+    for i in range(len(ids)):
+        for j in range(i + 1, len(ids)):
+            a, b = ids[i], ids[j]
+            if abs(broker.rho(a, b)) <= cfg.tau_corr:
+                continue
+            ca, cb = broker.metrics[a].cvar, broker.metrics[b].cvar
+            if ca < -cfg.gamma_tail * cfg.sigma_ref or cb < -cfg.gamma_tail * cfg.sigma_ref:
+                w[a] *= cfg.lambda_down
+                w[b] *= cfg.lambda_down
+    s = sum(w.values())
+    return weights if s <= 0 else {eid: v / s for eid, v in w.items()}
+
+
+def test_policy_and_cap_pipeline_matches_dict_reference():
+    cfg = BrokerConfig(sigma_ref=0.1, tau_corr=0.05, default_limit=0.08)
+    broker = Broker(cfg)
+    ids = [f"e{i}" for i in range(30)]
+    rng = np.random.default_rng(3)
+    capped = 0
+    for step in range(40):
+        _drive(broker, ids, 1, seed=step)
+        broker.decide_limits()
+        raw = {eid: float(v) for eid, v in zip(ids, rng.dirichlet(np.ones(len(ids))))}
+        raw[ids[step % len(ids)]] = 0.0
+
+        w = broker.apply_policies(raw)
+        assert w == _legacy_policies(broker, raw)
+
+        # the reference runs on a twin that gets the same correlation update
+        twin = copy.deepcopy(broker)
+        twin.update_correlations([eid for eid, v in w.items() if v > 0])
+        expected = _legacy_cap(twin, w)
+        got = broker.apply_decorrelation_cap(w)
+        assert got == expected
+        capped += got != w
+        for eid, v in got.items():
+            if v > 0:
+                broker.mark_funded(eid)
+    assert capped > 0
+
+
+def test_array_pipeline_is_row_aligned():
+    broker = Broker(BrokerConfig(default_limit=0.5))
+    broker.observe_batch(["a", "b", "c"], [0.1, 0.1, 0.1], 0.0, [True, False, True])
+    broker.decide_limits()
+    rows = broker.index_of(["c", "b", "a"])
+    w = broker.apply_policies_array(rows, np.array([0.9, 0.5, 0.1]))
+    np.testing.assert_array_equal(w, np.array([0.25, 0.0, 0.1]) / 0.35)
+    assert broker.apply_policies_array(rows, np.zeros(3)).tolist() == [0.0, 0.0, 0.0]
+
+    one = np.array([0.0, 0.0, 1.0])
+    assert broker.apply_decorrelation_cap_array(rows, one) is one
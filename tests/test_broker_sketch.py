@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.broker import Broker, BrokerConfig
+
+
+def _factor_market(broker, steps=400, n_group=8, n_free=8, seed=0):
+    """Group "g*" shares one return factor; "f*" explorers are independent."""
+    ids = [f"g{i}" for i in range(n_group)] + [f"f{i}" for i in range(n_free)]
+    rng = np.random.default_rng(seed)
+    for _ in range(steps):
+        factor = rng.normal(0.0, 0.1)
+        r = rng.normal(0.0, 0.1, size=len(ids))
+        r[:n_group] = factor + 0.02 * r[:n_group]
+        broker.observe_batch(ids, r, np.zeros(len(ids)), np.ones(len(ids), dtype=bool))
+        broker.update_correlations(ids)
+    return ids
+
+
+def test_sketch_tracks_exact_rho_within_error_estimate():
+    cfg = BrokerConfig(corr_mode="sketch", corr_sketch_dim=256, corr_audit_size=16)
+    broker = Broker(cfg)
+    _factor_market(broker)
+
+    err = broker.correlation_error()
+    assert err["pairs"] == 16 * 15 // 2
+    assert err["rms"] < 2.0 * err["estimate"]
+    assert err["max_abs"] < 6.0 * err["estimate"]
+
+
+def test_sketch_decays_pairs_not_updated_together():
+    from capitalmarket.capitalselector.broker import DenseCovariance, SketchCovariance
+
+    exact, sketch = DenseCovariance(beta=0.1), SketchCovariance(beta=0.1, dim=32)
+    for cov in (exact, sketch):
+        cov.update(["a", "b"], np.array([1.0, 1.0]))
+    before = exact.pair("a", "b"), sketch.pair("a", "b")
+    for cov in (exact, sketch):
+        for _ in range(5):
+            cov.update(["a"], np.array([0.0]))
+    assert exact.pair("a", "b") == before[0]
+    assert sketch.pair("a", "b") == pytest.approx(before[1] * 0.9 ** 2.5)
+
+
+def test_sketch_top_k_recovers_correlated_group():
+    exact, sketch = Broker(), Broker(BrokerConfig(corr_mode="sketch", corr_sketch_dim=128))
+    for broker in (exact, sketch):
+        _factor_market(broker)
+        top = broker.most_correlated("g0", 7)
+        assert sorted(eid for eid, _ in top) == [f"g{i}" for i in range(1, 8)]
+        assert all(rho > 0.5 for _, rho in top)
+
+    among = ["f0", "f1", "g3"]
+    assert exact.most_correlated("g0", 1, among=among)[0][0] == "g3"
+    assert sketch.most_correlated("g0", 1, among=among)[0][0] == "g3"
+
+
+def test_sketch_rho_matrix_and_decorrelation_cap():
+    broker = Broker(BrokerConfig(corr_mode="sketch", corr_sketch_dim=64))
+    ids = _factor_market(broker, steps=100)
+    rho = broker.rho_matrix(ids)
+    assert rho.shape == (16, 16)
+    assert np.allclose(rho, rho.T)
+    assert np.all(np.diag(rho) == 1.0)
+    assert rho[0, 1] == pytest.approx(broker.rho("g0", "g1"))
+
+    w = broker.apply_decorrelation_cap({eid: 1.0 for eid in ids})
+    assert sum(w.values()) == pytest.approx(1.0)
+
+
+def test_correlation_error_requires_audit_and_mode_is_validated():
+    with pytest.raises(ValueError):
+        Broker().correlation_error()
+    with pytest.raises(ValueError):
+        Broker(BrokerConfig(corr_mode="bogus"))
@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.broker import Broker
+
+
+def _fresh(broker):
+    return {
+        eid: {
+            "mu": m.mu.mu,
+            "vol": math.sqrt(max(m.var.var, 0.0)),
+            "cvar": m.cvar,
+            "dd": m.dd.max_dd,
+            "surv": m.surv,
+            "dt": m.dt_mu,
+            "alive": 1.0 if m.last_alive else 0.0,
+        }
+        for eid, m in broker.metrics.items()
+    }
+
+
+def test_snapshot_cache_rebuilds_only_observed_explorers():
+    broker = Broker()
+    ids = [f"e{i}" for i in range(30)]
+    rng = np.random.default_rng(0)
+    broker.observe_batch(ids, rng.normal(size=30), 0.0, True)
+    first = broker.metric_snapshot()
+    assert first == _fresh(broker)
+
+    broker.observe_batch(ids[:5], rng.normal(size=5), 0.0, False)
+    broker.observe("e7", 0.3, 0.1, True, 2.0)
+    broker.observe("new", -0.2, 0.0, True, 1.0)
+    second = broker.metric_snapshot()
+    assert second == _fresh(broker)
+    assert list(second) == broker.ids
+
+    touched = set(ids[:5]) | {"e7"}
+    for eid in ids:
+        assert (second[eid] is first[eid]) == (eid not in touched)
+    # earlier snapshots are not rewritten
+    assert first["e0"]["alive"] == 1.0 and second["e0"]["alive"] == 0.0
+    # unchanged broker: the cached snapshot itself, read-only
+    assert broker.metric_snapshot() is second
+    with pytest.raises(TypeError):
+        second["e0"]["mu"] = 1.0
+    with pytest.raises(TypeError):
+        second["e0"] = {}
+
+
+def test_metric_arrays_match_snapshot():
+    broker = Broker()
+    rng = np.random.default_rng(1)
+    ids = [f"e{i}" for i in range(12)]
+    for _ in range(20):
+        broker.observe_batch(ids, rng.normal(size=12), 0.01, rng.random(12) > 0.1)
+    snap = broker.metric_snapshot()
+    arrays = broker.metric_arrays()
+    for name, arr in arrays.items():
+        assert arr.tolist() == [snap[eid][name] for eid in broker.ids]
+
+    rows = broker.lookup(["e3", "missing", "e0"])
+    assert rows.tolist() == [3, -1, 0]
+    assert "missing" not in broker.ids
+    assert broker.metric_arrays(rows[[0, 2]])["mu"].tolist() == [snap["e3"]["mu"], snap["e0"]["mu"]]
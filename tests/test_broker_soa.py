@@ -0,0 +1,100 @@
+import math
+
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.broker import Broker, BrokerConfig, EWMADrawdown, EWMAQuantile
+from capitalmarket.capitalselector.stats import EWMAStats
+
+
+def _stream(seed: int, steps: int, n: int):
+    rng = np.random.default_rng(seed)
+    for _ in range(steps):
+        r = rng.normal(0.01, 0.2, size=n)
+        r[rng.random(n) < 0.05] -= 2.0
+        c = rng.random(n) * 0.01
+        alive = rng.random(n) > 0.02
+        dt = rng.choice([0.0, -1.0, 0.5, 1.0, 2.0], size=n)
+        yield r, c, alive, dt
+
+
+def _legacy_observe(m: dict, cfg: BrokerConfig, r, c, alive, dt):
+    """Per-object reference of the original ExplorerMetrics update."""
+    dt = float(dt) if dt and dt > 0 else 1.0
+    m["mu"].update(r)
+    m["var"].update(r)
+    q = m["q"].update(r)
+    m["cvar"] = (1 - cfg.beta_cvar) * m["cvar"] + cfg.beta_cvar * min(r - q, 0.0)
+    m["dd"].update(r - c)
+    m["surv"] = (1 - cfg.beta_surv) * m["surv"] + cfg.beta_surv * (1.0 if alive else 0.0)
+    m["dt_mu"] = (1 - cfg.beta_dt) * m["dt_mu"] + cfg.beta_dt * dt
+    return dt
+
+
+def test_observe_batch_matches_per_id_observe():
+    cfg = BrokerConfig(sigma_ref=0.1)
+    ids = [f"e{i}" for i in range(40)]
+    single, batch = Broker(cfg), Broker(cfg)
+    for step, (r, c, alive, dt) in enumerate(_stream(0, 60, len(ids))):
+        # a varying subset each step, in shuffled order
+        order = np.random.default_rng(step).permutation(len(ids))[: 25 + step % 10]
+        for i in order:
+            single.observe(ids[i], r[i], c[i], bool(alive[i]), dt[i])
+        batch.observe_batch([ids[i] for i in order], r[order], c[order], alive[order], dt[order])
+
+    assert single.ids == batch.ids
+    assert single._time == batch._time
+    for name in ("mu", "mu_var", "var_mu", "var", "q", "cvar", "dd_peak", "dd_value", "dd", "surv", "dt_mu", "last_alive"):
+        np.testing.assert_array_equal(single.column(name), batch.column(name), err_msg=name)
+    assert single.metric_snapshot() == batch.metric_snapshot()
+
+    # row indices address the same explorers
+    idx = batch.index_of(["e3", "e7"])
+    batch.observe_batch(idx, [0.1, 0.2], 0.0, True, None)
+    single.observe("e3", 0.1, 0.0, True, None)
+    single.observe("e7", 0.2, 0.0, True, None)
+    assert single.metric_snapshot() == batch.metric_snapshot()
+
+
+def test_columns_match_legacy_explorer_metrics():
+    cfg = BrokerConfig()
+    broker = Broker(cfg)
+    ref = {
+        "mu": EWMAStats(beta=cfg.beta_mu, mu=0.0, var=1.0),
+        "var": EWMAStats(beta=cfg.beta_var, mu=0.0, var=1.0),
+        "q": EWMAQuantile(alpha=cfg.alpha_tail, eta=cfg.eta_q, q=0.0),
+        "cvar": 0.0,
+        "dd": EWMADrawdown(),
+        "surv": 1.0,
+        "dt_mu": 1.0,
+    }
+    time = 0.0
+    for r, c, alive, dt in _stream(1, 300, 1):
+        broker.observe("x", r[0], c[0], bool(alive[0]), dt[0])
+        time += _legacy_observe(ref, cfg, float(r[0]), float(c[0]), bool(alive[0]), float(dt[0]))
+
+    m = broker.metrics["x"]
+    assert broker._time == time
+    assert (m.mu.mu, m.var.var, m.q.q, m.cvar) == (ref["mu"].mu, ref["var"].var, ref["q"].q, ref["cvar"])
+    assert (m.dd.peak, m.dd.value, m.dd.max_dd) == (ref["dd"].peak, ref["dd"].value, ref["dd"].max_dd)
+    assert (m.surv, m.dt_mu) == (ref["surv"], ref["dt_mu"])
+    assert broker.metric_snapshot()["x"]["vol"] == math.sqrt(ref["var"].var)
+
+
+def test_policy_views_are_snapshots_and_batches_reject_duplicates():
+    broker = Broker(BrokerConfig(default_limit=0.7))
+    broker.observe("a", 0.1, 0.0, False, 1.0)
+    pols = broker.decide_limits()
+    assert pols["a"].blocked and pols["a"].limit == 0.0
+    with pytest.raises(AttributeError):
+        pols["a"].blocked = False
+    legacy = broker.policies
+    assert isinstance(legacy, dict) and legacy == pols.to_dict()
+    legacy["a"].blocked = False
+    assert not legacy["a"].blocked and broker.policies["a"].blocked
+    assert not broker.is_eligible("a")
+    with pytest.raises(ValueError):
+        broker.column("blocked")[0] = False
+
+    with pytest.raises(ValueError):
+        broker.observe_batch(["b", "b"], [0.1, 0.2], 0.0, True)
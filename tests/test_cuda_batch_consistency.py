@@ -11,6 +11,7 @@ from capitalmarket.capitalselector.interfaces import validate_world_output
 from capitalmarket.capitalselector.worlds.regime_switch_bandit_world import RegimeSwitchBanditWorld
 from capitalmarket.capitalselector.cpu_impl import CpuCore
 from capitalmarket.capitalselector.cuda_impl import CudaCore
+from capitalmarket.capitalselector.cuda_state import to_device_state_batch, from_device_state
 
 
 def _seed_all(seed: int) -> None:
@@ -85,3 +86,45 @@ def test_cuda_batch_consistency_b2():
 
     _assert_final_parity(seed0, selector_cpu0, selector_cuda0)
     _assert_final_parity(seed1, selector_cpu1, selector_cuda1)
+
+
+def test_cuda_batch_device_resident_b2():
+    os.environ["CAPM_ENABLE_TOPOLOGY"] = "0"
+
+    steps = 500
+    _seed_all(0)
+    outputs0 = _collect_world_outputs(steps=steps, seed=0)
+    outputs1 = _collect_world_outputs(steps=steps, seed=1)
+    K = len(outputs0[0][0])
+
+    selectors_cpu = [_init_selector(K), _init_selector(K)]
+    selectors_dev = [_init_selector(K), _init_selector(K)]
+    # force one lane into rebirth on the first step
+    for sel in (selectors_cpu[1], selectors_dev[1]):
+        sel.wealth = 0.0
+        sel.rebirth_threshold = 0.5
+
+    cpu_core = CpuCore()
+    cuda_core = CudaCore()
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    state = to_device_state_batch(selectors_dev, device=device)
+    beta = selectors_dev[0].stats.beta
+    eta = selectors_dev[0].reweight_fn.eta
+
+    reborn_any = torch.zeros((2, 1), dtype=torch.bool, device=device)
+    for (r0, c0), (r1, c1) in zip(outputs0, outputs1):
+        cpu_core.step(selectors_cpu[0], r0, c0, freeze=False)
+        cpu_core.step(selectors_cpu[1], r1, c1, freeze=False)
+        state = cuda_core.step_state(state, np.stack([r0, r1]), np.array([c0, c1]), beta=beta, eta=eta)
+        reborn_any |= state.reborn
+        assert state.weights.device.type == device
+
+    assert reborn_any.cpu().reshape(-1).tolist() == [False, True]
+    from_device_state(state, selectors_dev)
+    for sel_cpu, sel_dev in zip(selectors_cpu, selectors_dev):
+        np.testing.assert_allclose(sel_dev.w, sel_cpu.w, rtol=0.0, atol=1e-13)
+        np.testing.assert_allclose(sel_dev.wealth, sel_cpu.wealth, rtol=0.0, atol=1e-13)
+        np.testing.assert_allclose(sel_dev.stats.mu, sel_cpu.stats.mu, rtol=0.0, atol=1e-13)
+        np.testing.assert_allclose(sel_dev.stats.var, sel_cpu.stats.var, rtol=0.0, atol=1e-13)
+        np.testing.assert_allclose(sel_dev.stats.dd, sel_cpu.stats.dd, rtol=0.0, atol=1e-13)
+        np.testing.assert_allclose(sel_dev.stats.cum_pi, sel_cpu.stats.cum_pi, rtol=0.0, atol=1e-13)
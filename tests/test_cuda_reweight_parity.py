@@ -83,3 +83,25 @@ def test_cuda_reweight_multi_step_drift():
 
     # Minimal tolerance to account for tiny float64 accumulation differences.
     np.testing.assert_allclose(selector_cuda.w, selector_cpu.w, rtol=0.0, atol=1e-15)
+
+
+def test_cuda_step_dispatches_on_reweight_operator():
+    from capitalmarket.capitalselector.reweight import ExpReweight, exp_reweight
+
+    rng = np.random.default_rng(3)
+    K = 6
+    typed = _init_selector(K)
+    plain = _init_selector(K)
+    assert isinstance(typed.reweight_fn, ExpReweight)
+    # arbitrary callables (no closure cells to introspect) still run on the host
+    plain.reweight_fn = lambda w, adv: exp_reweight(w, adv, typed.reweight_fn.eta)
+
+    cuda_core = CudaCore()
+    for _ in range(20):
+        r_vec = rng.normal(0.0, 0.02, size=K)
+        c_total = float(rng.random() * 0.01)
+        cuda_core.step(typed, r_vec, c_total, freeze=False)
+        cuda_core.step(plain, r_vec, c_total, freeze=False)
+
+    np.testing.assert_allclose(typed.w, plain.w, rtol=0.0, atol=1e-15)
+    assert typed.wealth == plain.wealth
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.builder import CapitalSelectorBuilder
+from capitalmarket.capitalselector.history import HistoryRecorder
+from capitalmarket.capitalselector.runtime import RuntimeConfig, run
+from capitalmarket.capitalselector.worlds.regime_switch_bandit_world import RegimeSwitchBanditWorld
+
+
+def test_history_view_matches_state_dicts(monkeypatch):
+    monkeypatch.setenv("CAPM_DEVICE", "cpu")
+    rng = np.random.default_rng(0)
+    selector = CapitalSelectorBuilder().with_K(4).with_rebirth_threshold(0.99).build()
+    rec = HistoryRecorder(capacity=3)  # forces growth
+    expected = []
+    for t in range(10):
+        selector.feedback_vector(rng.normal(0.0, 0.02, size=4), 0.005)
+        rec.record(t, selector)
+        expected.append(selector.state())
+
+    history = rec.as_dicts()
+    assert len(history) == 10
+    for got, ref in zip(history, expected):
+        assert got.keys() == ref.keys()
+        np.testing.assert_array_equal(got["weights"], ref["weights"])
+        assert {k: v for k, v in got.items() if k != "weights"} == {k: v for k, v in ref.items() if k != "weights"}
+    assert history[-1]["wealth"] == expected[-1]["wealth"]
+
+
+def test_runtime_run_with_strided_recorder(tmp_path, monkeypatch):
+    monkeypatch.setenv("CAPM_DEVICE", "cpu")
+    full = run(world=RegimeSwitchBanditWorld(p=0.05, sigma=0.01, seed=0), steps=50, config=RuntimeConfig())
+    rec = HistoryRecorder(fields=("wealth", "weights"), stride=5, spill_dir=tmp_path, spill_threshold_bytes=0)
+    res = run(world=RegimeSwitchBanditWorld(p=0.05, sigma=0.01, seed=0), steps=50, config=RuntimeConfig(), recorder=rec)
+
+    assert rec.spilled and rec.spill_path.parent == tmp_path and (rec.spill_path / "weights.npy").exists()
+    np.testing.assert_array_equal(rec["t"], np.arange(0, 50, 5))
+    ref = full["recorder"]
+    np.testing.assert_array_equal(rec["wealth"], ref["wealth"][::5])
+    np.testing.assert_array_equal(rec["weights"], ref["weights"][::5])
+    assert set(res["history"][0]) == {"wealth", "weights"}
+
+    rec.flush()
+    on_disk = np.load(rec.spill_path / "weights.npy", mmap_mode="r")
+    np.testing.assert_array_equal(on_disk[: len(rec)], rec["weights"])
+
+
+def test_recorders_sharing_spill_dir_keep_their_own_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("CAPM_DEVICE", "cpu")
+    recs = [HistoryRecorder(spill_dir=tmp_path, spill_threshold_bytes=0) for _ in range(2)]
+    for seed, rec in enumerate(recs):
+        run(world=RegimeSwitchBanditWorld(p=0.05, sigma=0.01, seed=seed), steps=30, config=RuntimeConfig(), recorder=rec)
+    assert recs[0].spill_path != recs[1].spill_path
+    for rec in recs:
+        rec.flush()
+        np.testing.assert_array_equal(np.load(rec.spill_path / "wealth.npy")[: len(rec)], rec["wealth"])
+    assert not np.array_equal(recs[0]["wealth"], recs[1]["wealth"])
+
+
+def test_recorder_holds_one_run(monkeypatch):
+    monkeypatch.setenv("CAPM_DEVICE", "cpu")
+    rec = HistoryRecorder()
+    run(world=RegimeSwitchBanditWorld(p=0.05, sigma=0.01, seed=0), steps=10, config=RuntimeConfig(), recorder=rec)
+    with pytest.raises(ValueError):
+        run(world=RegimeSwitchBanditWorld(p=0.05, sigma=0.01, seed=0), steps=10, config=RuntimeConfig(), recorder=rec)
+    assert len(rec) == 10
+
+
+def test_runtime_history_is_a_list(monkeypatch):
+    monkeypatch.setenv("CAPM_DEVICE", "cpu")
+    res = run(world=RegimeSwitchBanditWorld(p=0.05, sigma=0.01, seed=0), steps=5, config=RuntimeConfig())
+    history = res["history"]
+    assert isinstance(history, list) and len(history) == 5
+    assert [h["wealth"] for h in history] == res["recorder"]["wealth"].tolist()
+
+
+def test_runtime_trace_is_lazy(monkeypatch):
+    monkeypatch.setenv("CAPM_DEVICE", "cpu")
+    res = run(world=RegimeSwitchBanditWorld(p=0.05, sigma=0.01, seed=0), steps=20, config=RuntimeConfig())
+    trace = res["trace"]
+    assert not isinstance(trace, list)
+    assert len(trace) == 20 and trace[-1] == "step" and trace[5:8] == ["step"] * 3
+    assert trace == ["step"] * 20 and trace != ["step"] * 19
+
+
+def test_runtime_run_blocks_match_per_step_states(monkeypatch):
+    from capitalmarket.capitalselector.interfaces import iter_world
+
+    monkeypatch.setenv("CAPM_DEVICE", "cpu")
+    res = run(world=RegimeSwitchBanditWorld(p=0.05, sigma=0.01, seed=3), steps=2500, config=RuntimeConfig())
+    selector = CapitalSelectorBuilder().with_K(0).build()
+    expected = []
+    for t, r_vec, c_total in iter_world(RegimeSwitchBanditWorld(p=0.05, sigma=0.01, seed=3), 0, 2500):
+        if selector.w is None:
+            selector.w = np.ones(len(r_vec)) / len(r_vec)
+        selector.feedback_vector(r_vec, c_total)
+        expected.append(selector.state())
+
+    rec = res["recorder"]
+    np.testing.assert_array_equal(rec["t"], np.arange(2500))
+    np.testing.assert_array_equal(rec["weights"], np.array([s["weights"] for s in expected]))
+    for name in ("wealth", "mu", "var", "dd", "cum_pi", "peak_cum_pi"):
+        np.testing.assert_array_equal(rec[name], [s[name] for s in expected])
@@ -0,0 +1,41 @@
+import numpy as np
+
+from capitalmarket.capitalselector.runtime import RunCheckpoint, RuntimeConfig, iter_run, run
+from capitalmarket.capitalselector.worlds.regime_switch_bandit_world import RegimeSwitchBanditWorld
+
+
+def _world():
+    return RegimeSwitchBanditWorld(p=0.05, sigma=0.01, seed=0)
+
+
+def test_iter_run_matches_run(monkeypatch):
+    monkeypatch.setenv("CAPM_DEVICE", "cpu")
+    ref = run(world=_world(), steps=30, config=RuntimeConfig())["history"]
+
+    streamed = list(iter_run(world=_world(), steps=30))
+    assert [s["t"] for s in streamed] == list(range(30))
+    for got, want in zip(streamed, ref):
+        assert got["wealth"] == want["wealth"]
+        np.testing.assert_array_equal(got["weights"], want["weights"])
+
+    chunks = list(iter_run(world=_world(), steps=30, chunk_size=8))
+    assert [len(c) for c in chunks] == [8, 8, 8, 6]
+    np.testing.assert_array_equal(np.concatenate([c["t"] for c in chunks]), np.arange(30))
+    np.testing.assert_array_equal(chunks[-1]["weights"][-1], ref[-1]["weights"])
+
+
+def test_iter_run_resumes_from_checkpoint(monkeypatch):
+    monkeypatch.setenv("CAPM_DEVICE", "cpu")
+    ref = run(world=_world(), steps=40, config=RuntimeConfig())["history"]
+
+    world = _world()
+    ckpt = RunCheckpoint()
+    for snap in iter_run(world=world, steps=40, checkpoint=ckpt):
+        if snap["t"] == 14:
+            break
+    assert ckpt.t == 15
+
+    rest = list(iter_run(world=world, steps=40, checkpoint=ckpt))
+    assert rest[0]["t"] == 15 and ckpt.t == 40
+    assert rest[-1]["wealth"] == ref[-1]["wealth"]
+    np.testing.assert_array_equal(rest[-1]["weights"], ref[-1]["weights"])
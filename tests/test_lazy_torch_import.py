@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+
+_CPU_RUN = textwrap.dedent(
+    """
+    import sys
+    import capitalmarket.capitalselector as cs
+    from capitalmarket.capitalselector import runtime, cuda_state
+    from capitalmarket.capitalselector.experiments import g3_3_sweep
+    from capitalmarket.capitalselector.worlds.regime_switch_bandit_world import RegimeSwitchBanditWorld
+    runtime.run(world=RegimeSwitchBanditWorld(seed=0), steps=5)
+    assert "torch" not in sys.modules, "CPU path imported torch"
+    """
+)
+
+
+def _run(code: str, **env):
+    full_env = dict(os.environ, **env)
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=full_env, check=False)
+
+
+def test_cpu_import_and_run_do_not_load_torch():
+    proc = _run(_CPU_RUN, CAPM_DEVICE="cpu")
+    assert proc.returncode == 0, proc.stderr
+
+
+def test_lazy_backend_attributes_resolve():
+    pytest.importorskip("torch")
+    code = "import sys, capitalmarket.capitalselector as cs; cs.CudaCore; cs.to_device_state; assert 'torch' in sys.modules"
+    proc = _run(code)
+    assert proc.returncode == 0, proc.stderr
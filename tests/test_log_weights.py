@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.builder import CapitalSelectorBuilder
+from capitalmarket.capitalselector.interfaces import validate_world_output
+from capitalmarket.capitalselector.worlds.regime_switch_bandit_world import RegimeSwitchBanditWorld
+
+
+def _world_matrix(steps: int, seed: int = 0):
+    world = RegimeSwitchBanditWorld(p=0.05, sigma=0.01, seed=seed, c_high=0.01)
+    rs, cs = [], []
+    for t in range(steps):
+        r_vec, c_total = validate_world_output(world.step(t))
+        rs.append(r_vec)
+        cs.append(c_total)
+    return np.stack(rs), np.asarray(cs)
+
+
+def test_log_weights_parity_in_normal_range():
+    R, C = _world_matrix(500)
+    ref = CapitalSelectorBuilder().with_K(5).with_rebirth_threshold(0.99).build()
+    log_sel = CapitalSelectorBuilder().with_K(5).with_rebirth_threshold(0.99).with_log_weights().build()
+
+    for r_vec, c_total in zip(R, C):
+        ref.feedback_vector(r_vec, c_total)
+        log_sel.feedback_vector(r_vec, c_total)
+        np.testing.assert_allclose(log_sel.w, ref.w, rtol=1e-10, atol=1e-14)
+
+    np.testing.assert_allclose(log_sel.wealth, ref.wealth, rtol=1e-12)
+    np.testing.assert_allclose(np.exp(log_sel._sync_log_w()), log_sel.w, rtol=1e-12)
+
+
+def test_log_weights_survive_overflowing_eta():
+    R = np.tile(np.array([1.0, 0.0, -1.0]), (50, 1))
+    C = np.zeros(50)
+
+    plain = CapitalSelectorBuilder().with_K(3).with_reweight_eta(1e4).with_rebirth_threshold(-1e9).build()
+    with np.errstate(over="ignore", invalid="ignore"):
+        plain.run_sequence(R, C)
+    assert not np.isfinite(plain.w).all() or np.allclose(plain.w, np.ones(3) / 3)
+
+    log_sel = (
+        CapitalSelectorBuilder().with_K(3).with_reweight_eta(1e4).with_rebirth_threshold(-1e9).with_log_weights().build()
+    )
+    log_sel.run_sequence(R, C)
+    assert np.isfinite(log_sel.w).all()
+    assert log_sel.w[0] == pytest.approx(1.0)
+    assert np.isfinite(log_sel._sync_log_w()[:2]).all()
+
+
+def test_external_weight_assignment_resyncs_log_domain():
+    sel = CapitalSelectorBuilder().with_K(2).with_log_weights().build()
+    sel.feedback_vector(np.array([0.1, 0.0]), 0.0)
+    sel.w = np.array([0.25, 0.75])
+    np.testing.assert_allclose(np.exp(sel._sync_log_w()), [0.25, 0.75])
+
+
+def test_cuda_core_log_weights_parity():
+    pytest.importorskip("torch")
+    from capitalmarket.capitalselector.cuda_impl import CudaCore
+
+    R, C = _world_matrix(200, seed=2)
+    cpu = CapitalSelectorBuilder().with_K(5).with_log_weights().build()
+    step = CapitalSelectorBuilder().with_K(5).with_log_weights().build()
+    seq = CapitalSelectorBuilder().with_K(5).with_log_weights().build()
+
+    core = CudaCore()
+    for r_vec, c_total in zip(R, C):
+        cpu.feedback_vector(r_vec, c_total)
+        core.step(step, r_vec, c_total, freeze=False)
+    core.run_sequence(seq, R, C, freeze=False)
+
+    np.testing.assert_allclose(step.w, cpu.w, rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(seq.w, cpu.w, rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(np.exp(seq._sync_log_w()), seq.w, rtol=1e-12)
+
+
+def test_log_weights_stay_authoritative_through_freeze_and_rebirth():
+    R = np.tile(np.array([1.0, 0.0, -1.0]), (20, 1))
+    sel = CapitalSelectorBuilder().with_K(3).with_reweight_eta(50.0).with_rebirth_threshold(-1e9).with_log_weights().build()
+    sel.run_sequence(R, np.zeros(20))
+    assert sel.w[2] == 0.0 and np.isfinite(sel._sync_log_w()).all()
+
+    before = sel._sync_log_w().copy()
+    sel.feedback_vector(R[0], 0.0, freeze=True)
+    np.testing.assert_allclose(sel._sync_log_w(), before, rtol=1e-12)
+    assert np.isfinite(sel._sync_log_w()).all()
+
+    sel.rebirth_threshold = 1e9
+    sel.feedback_vector(R[0], 0.0)
+    np.testing.assert_allclose(sel._sync_log_w(), np.full(3, -np.log(3)), rtol=1e-12)
+    np.testing.assert_array_equal(np.exp(sel._sync_log_w()), sel.w)
+
+
+def test_cuda_step_state_keeps_weights_derived_from_log_weights():
+    torch = pytest.importorskip("torch")
+    from capitalmarket.capitalselector.cuda_impl import CudaCore
+    from capitalmarket.capitalselector.cuda_state import to_device_state
+
+    sel = CapitalSelectorBuilder().with_K(3).with_rebirth_threshold(0.5).with_log_weights().build()
+    state = to_device_state(sel, device="cpu")
+    core = CudaCore()
+    for r in ([0.1, 0.0, -0.1], [-1.0, -1.0, -1.0]):
+        state = core.step_state(state, torch.tensor([r], dtype=torch.float64), torch.zeros(1, dtype=torch.float64), beta=0.1, eta=1.0, seed_var=0.0)
+        assert torch.equal(state.weights, torch.exp(state.log_weights))
+    assert bool(state.reborn[0, 0])
+    frozen = core.step_state(state, torch.zeros((1, 3), dtype=torch.float64), torch.zeros(1, dtype=torch.float64), beta=0.1, eta=1.0, seed_var=0.0, freeze=True)
+    assert torch.equal(frozen.weights, torch.exp(frozen.log_weights))
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.broker import Broker, BrokerConfig
+from capitalmarket.capitalselector.quantiles import QuantileBank
+
+
+def test_sa_bank_matches_broker_alpha_tail_columns():
+    cfg = BrokerConfig(tail_levels=(0.01, 0.1, 0.05))
+    single, batch = Broker(cfg), Broker(cfg)
+    ids = [f"e{i}" for i in range(20)]
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        r = rng.standard_t(3, size=len(ids)) * 0.1
+        batch.observe_batch(ids, r, 0.0, True)
+        for eid, x in zip(ids, r):
+            single.observe(eid, x, 0.0, True, 1.0)
+
+    for broker in (single, batch):
+        k = broker.tail_bank.level_index([0.1])[0]
+        n = len(broker)
+        assert np.array_equal(broker.tail_bank.q[:n, k], broker.column("q"))
+        assert np.array_equal(broker.tail_bank.cvar[:n, k], broker.column("cvar"))
+    assert np.array_equal(single.tail_bank.q, batch.tail_bank.q)
+
+
+def test_p2_tracks_empirical_quantiles_per_row():
+    levels = (0.01, 0.05, 0.1, 0.5)
+    bank = QuantileBank(levels, method="p2")
+    bank.grow(3)
+    rng = np.random.default_rng(1)
+    data = rng.normal(0.0, 1.0, size=(5000, 3)) * [1.0, 2.0, 0.5] + [0.0, 1.0, -1.0]
+    for t, x in enumerate(data):
+        # rows enter batches in varying order and subsets
+        rows = np.array([2, 0, 1]) if t % 2 else np.array([0, 1, 2])
+        bank.update(rows, x[rows])
+    expected = np.quantile(data, levels, axis=0).T
+    np.testing.assert_allclose(bank.q, expected, atol=0.1)
+
+    lone = QuantileBank(levels, method="p2")
+    lone.grow(1)
+    for x in data[:, 1]:
+        lone.update(np.array([0]), np.array([x]))
+    assert np.array_equal(lone.q[0], bank.q[1])
+
+
+def test_inhibition_uses_selected_levels():
+    cfg = BrokerConfig(
+        tail_levels=(0.01, 0.1), tail_method="p2", tail_inhibit_levels=(0.01,),
+        sigma_ref=0.01, k_dd=1e9, k_var=1e9, hard_block_tail=True,
+    )
+    broker = Broker(cfg)
+    ids = [f"e{i}" for i in range(40)]
+    rng = np.random.default_rng(2)
+    scale = np.linspace(0.05, 1.0, len(ids))
+    for _ in range(300):
+        broker.observe_batch(ids, rng.normal(size=len(ids)) * scale, 0.0, True)
+    broker.decide_limits()
+
+    tail = broker.tail_cvar()
+    np.testing.assert_array_equal(tail, broker.tail_bank.cvar[: len(ids), 0])
+    blocked = broker.column("blocked")
+    assert np.array_equal(blocked, tail < -cfg.gamma_tail * cfg.sigma_ref)
+    assert 0 < blocked.sum() < len(ids)
+    # the alpha_tail column alone would block more
+    assert (broker.column("cvar") < -cfg.gamma_tail * cfg.sigma_ref).sum() > blocked.sum()
+
+
+def test_bank_validation():
+    with pytest.raises(ValueError):
+        QuantileBank((0.0, 0.1))
+    with pytest.raises(ValueError):
+        QuantileBank((0.1,), method="ddsketch")
+    with pytest.raises(ValueError):
+        Broker(BrokerConfig(tail_inhibit_levels=(0.05,)))
+    with pytest.raises(ValueError):
+        Broker(BrokerConfig(tail_levels=(0.1,), tail_inhibit_levels=(0.05,)))
@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 
 from capitalmarket.capitalselector.builder import CapitalSelectorBuilder
 
@@ -31,3 +32,103 @@ def test_dominant_score_increases_weight():
     selector.feedback_vector(r_vec, c=0.0)
     w1 = selector.allocate()
     assert w1[0] > w0[0]
+
+
+def test_out_buffer_variants_match_allocating_path():
+    from capitalmarket.capitalselector.reweight import exp_reweight, exp_reweight_normalize, simplex_normalize
+
+    rng = np.random.default_rng(0)
+    w = simplex_normalize(rng.random(1000))
+    score = rng.normal(0.0, 0.05, size=1000)
+
+    expected = exp_reweight(w, score, 2.0)
+    out = np.empty_like(w)
+    work = np.empty_like(w)
+    np.testing.assert_array_equal(exp_reweight(w, score, 2.0, out=out, work=work), expected)
+
+    w_inplace = w.copy()
+    exp_reweight(w_inplace, score, 2.0, out=w_inplace, work=work)
+    np.testing.assert_array_equal(w_inplace, expected)
+
+    fused = exp_reweight_normalize(w, score, 2.0, out=out, work=work)
+    np.testing.assert_array_equal(fused, simplex_normalize(expected))
+
+    zero = np.zeros(4)
+    np.testing.assert_array_equal(simplex_normalize(zero, out=zero), np.ones(4) / 4)
+
+
+def test_fused_hot_path_matches_generic_reweight_fn():
+    from capitalmarket.capitalselector.reweight import exp_reweight
+
+    rng = np.random.default_rng(1)
+    fused = CapitalSelectorBuilder().with_K(50).with_reweight_eta(3.0).with_rebirth_threshold(0.9).build()
+    generic = CapitalSelectorBuilder().with_K(50).with_reweight_eta(3.0).with_rebirth_threshold(0.9).build()
+    generic.reweight_fn = lambda w, adv: exp_reweight(w, adv, 3.0)
+
+    held = [(fused.w, fused.w.copy())]
+    for _ in range(300):
+        r_vec = rng.normal(0.0, 0.02, size=50)
+        c_total = float(rng.random() * 0.01)
+        fused.feedback_vector(r_vec, c_total)
+        generic.feedback_vector(r_vec, c_total)
+        np.testing.assert_array_equal(fused.w, generic.w)
+        assert fused.wealth == generic.wealth
+        held.append((fused.w, fused.w.copy()))
+    # weights handed out by earlier steps are never written into or reused
+    for arr, copy in held:
+        np.testing.assert_array_equal(arr, copy)
+    assert len({id(arr) for arr, _ in held}) == len(held)
+
+
+def test_exp_reweight_operator_batch_and_tensor_match_call():
+    from capitalmarket.capitalselector.reweight import ExpReweight
+
+    op = CapitalSelectorBuilder().with_K(8).with_reweight_eta(1.5).build().reweight_fn
+    assert isinstance(op, ExpReweight)
+    assert op.kind == "exp" and op.eta == 1.5
+
+    rng = np.random.default_rng(2)
+    w = rng.random((4, 8))
+    w /= w.sum(axis=1, keepdims=True)
+    score = rng.normal(0.0, 0.05, size=(4, 8))
+    expected = np.stack([op(wi, si) for wi, si in zip(w, score)])
+    np.testing.assert_array_equal(op.apply_batch(w, score), expected)
+
+    torch = pytest.importorskip("torch")
+    got = op.apply_tensor(torch.as_tensor(w), torch.as_tensor(score)).numpy()
+    np.testing.assert_allclose(got, expected, rtol=0.0, atol=1e-15)
+
+
+def test_reweight_operator_requires_call():
+    from capitalmarket.capitalselector.reweight import ExpReweight, ReweightOperator
+
+    class Incomplete(ReweightOperator):
+        kind = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+    rng = np.random.default_rng(3)
+    w = rng.random((3, 5))
+    score = rng.normal(0.0, 0.05, size=(3, 5))
+    etas = np.array([0.5, 1.0, 2.0])
+    expected = np.stack([ExpReweight(eta)(wi, si) for eta, wi, si in zip(etas, w, score)])
+    np.testing.assert_array_equal(ExpReweight(etas[:, None]).apply_batch(w, score), expected)
+
+
+def test_batched_selector_dispatches_to_apply_batch(monkeypatch):
+    from capitalmarket.capitalselector.batch import BatchedCapitalSelector
+    from capitalmarket.capitalselector.reweight import ExpReweight
+
+    calls = []
+    apply_batch = ExpReweight.apply_batch
+
+    def _recording(self, w, score):
+        calls.append(np.array(self.eta))
+        return apply_batch(self, w, score)
+
+    monkeypatch.setattr(ExpReweight, "apply_batch", _recording)
+    batch = BatchedCapitalSelector(weights=np.ones((2, 3)) / 3, wealth=1.0, rebirth_threshold=0.0, beta=0.1, eta=[0.5, 2.0])
+    batch.feedback_batch(np.array([[0.1, 0.0, 0.0], [0.0, 0.2, 0.0]]), np.zeros(2))
+    assert len(calls) == 1
+    np.testing.assert_array_equal(calls[0], [[0.5], [2.0]])
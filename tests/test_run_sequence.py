@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.builder import CapitalSelectorBuilder
+from capitalmarket.capitalselector.cpu_impl import CpuCore
+from capitalmarket.capitalselector.interfaces import validate_world_output
+from capitalmarket.capitalselector.worlds.regime_switch_bandit_world import RegimeSwitchBanditWorld
+
+
+def _world_matrix(steps: int, seed: int = 0):
+    world = RegimeSwitchBanditWorld(p=0.05, sigma=0.01, seed=seed, c_high=0.02)
+    rs, cs = [], []
+    for t in range(steps):
+        r_vec, c_total = validate_world_output(world.step(t))
+        rs.append(r_vec)
+        cs.append(c_total)
+    return np.stack(rs), np.asarray(cs)
+
+
+def _stepwise(selector, R, C):
+    traj = {k: [] for k in ("wealth", "mu", "var", "dd", "weights")}
+    for r_vec, c_total in zip(R, C):
+        selector.feedback_vector(r_vec, float(c_total), trace=None, freeze=False)
+        traj["wealth"].append(selector.wealth)
+        traj["mu"].append(selector.stats.mu)
+        traj["var"].append(selector.stats.var)
+        traj["dd"].append(selector.stats.dd)
+        traj["weights"].append(selector.w.copy())
+    return {k: np.asarray(v) for k, v in traj.items()}
+
+
+def test_run_sequence_matches_stepwise_bitwise():
+    R, C = _world_matrix(500)
+    ref = CapitalSelectorBuilder().with_K(0).with_rebirth_threshold(0.9).build()
+    sel = CapitalSelectorBuilder().with_K(0).with_rebirth_threshold(0.9).build()
+    ref.w = np.ones(R.shape[1]) / R.shape[1]
+    ref.K = R.shape[1]
+
+    expected = _stepwise(ref, R, C)
+    traj = sel.run_sequence(R, C)
+
+    for key, arr in expected.items():
+        np.testing.assert_array_equal(traj[key], arr)
+    np.testing.assert_array_equal(sel.w, ref.w)
+    assert sel.wealth == ref.wealth
+
+
+def test_run_sequence_flags_rebirth_steps():
+    R = np.array([[0.1, 0.0], [-5.0, 0.0], [0.0, 0.1]])
+    C = np.zeros(3)
+    sel = CapitalSelectorBuilder().with_K(2).with_rebirth_threshold(0.5).build()
+    traj = CpuCore().run_sequence(sel, R, C, freeze=False)
+    assert traj["rebirth"].tolist() == [False, True, False]
+    assert traj["weights"].shape == (3, 2)
+    np.testing.assert_array_equal(traj["weights"][1], np.ones(2) / 2)
+
+
+def test_run_sequence_rejects_bad_shapes():
+    sel = CapitalSelectorBuilder().with_K(2).build()
+    with pytest.raises(ValueError):
+        sel.run_sequence(np.zeros(4), np.zeros(4))
+    with pytest.raises(ValueError):
+        sel.run_sequence(np.zeros((4, 2)), np.zeros(3))
+
+
+def test_run_sequence_rejects_mismatched_weights():
+    sel = CapitalSelectorBuilder().with_K(3).build()
+    sel.w = np.array([0.5, 0.3, 0.2])
+    with pytest.raises(ValueError):
+        sel.run_sequence(np.zeros((4, 2)), np.zeros(4))
+    # learned weights are kept
+    np.testing.assert_array_equal(sel.w, [0.5, 0.3, 0.2])
+
+
+def test_run_sequence_weights_do_not_alias_trajectory():
+    R, C = _world_matrix(20)
+    sel = CapitalSelectorBuilder().with_K(R.shape[1]).build()
+    traj = sel.run_sequence(R, C)
+    np.testing.assert_array_equal(sel.w, traj["weights"][-1])
+    sel.w[0] = 2.0
+    assert traj["weights"][-1][0] != 2.0
+
+
+def test_has_rebirth_hooks():
+    sel = CapitalSelectorBuilder().with_K(2).build()
+    assert not sel.has_rebirth_hooks()
+    sel.rebirth = lambda: None
+    assert sel.has_rebirth_hooks()
+
+
+def test_cuda_core_run_sequence_matches_stepwise():
+    torch = pytest.importorskip("torch")
+    from capitalmarket.capitalselector.cuda_impl import CudaCore
+
+    R, C = _world_matrix(300, seed=3)
+    K = R.shape[1]
+    core = CudaCore()
+    ref = CapitalSelectorBuilder().with_K(K).with_rebirth_threshold(0.995).build()
+    sel = CapitalSelectorBuilder().with_K(K).with_rebirth_threshold(0.995).build()
+
+    rebirth = []
+    original_rebirth = ref.rebirth
+
+    def _rebirth_wrapper():
+        rebirth[-1] = True
+        return original_rebirth()
+
+    ref.rebirth = _rebirth_wrapper
+    for r_vec, c_total in zip(R, C):
+        rebirth.append(False)
+        core.step(ref, r_vec, float(c_total), freeze=False)
+
+    traj = core.run_sequence(sel, R, C, freeze=False)
+    np.testing.assert_allclose(sel.w, ref.w, rtol=0.0, atol=1e-15)
+    np.testing.assert_allclose(traj["wealth"][-1], ref.wealth, rtol=0.0, atol=1e-15)
+    np.testing.assert_allclose(sel.stats.var, ref.stats.var, rtol=0.0, atol=1e-15)
+    assert traj["rebirth"].tolist() == rebirth
+    assert traj["rebirth"].any()
+    assert sel._last_r == pytest.approx(ref._last_r)
+
+    sel.w = np.ones(K + 1) / (K + 1)
+    with pytest.raises(ValueError):
+        core.run_sequence(sel, R, C, freeze=False)
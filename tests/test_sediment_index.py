@@ -0,0 +1,57 @@
+import itertools
+import random
+
+from capitalmarket.capitalselector.sediment import SedimentDAG
+
+
+def _scan(sd: SedimentDAG, candidate_members, phase_id) -> bool:
+    """The former linear scan over all nodes."""
+    cand = set(candidate_members)
+    for node in sd.nodes():
+        if node.phase_id != phase_id:
+            continue
+        M = set(node.members)
+        if cand == M:
+            return True
+        if sd.forbid_pairs:
+            for a, b in itertools.combinations(list(M), 2):
+                if {a, b}.issubset(cand):
+                    return True
+    return False
+
+
+def test_index_matches_scan():
+    rng = random.Random(0)
+    ids = [f"e{k}" for k in range(12)]
+    for forbid_pairs in (False, True):
+        sd = SedimentDAG(forbid_pairs=forbid_pairs)
+        for t in range(80):
+            members = rng.sample(ids, rng.randint(1, 4))
+            sd.add_node(members=members, mask={}, world_id="w", phase_id=rng.choice(["E1", "E2"]), t=t, run_id="r")
+        for _ in range(500):
+            cand = rng.sample(ids, rng.randint(0, 5))
+            phase = rng.choice(["E1", "E2", "E3"])
+            assert sd.is_forbidden(candidate_members=cand, phase_id=phase) == _scan(sd, cand, phase)
+
+
+def test_pair_forbid_only_with_flag():
+    for forbid_pairs, expected in ((False, False), (True, True)):
+        sd = SedimentDAG(forbid_pairs=forbid_pairs)
+        sd.add_node(members=["a", "b", "c"], mask={}, world_id="w", phase_id="E1", t=1, run_id="r")
+        assert sd.is_forbidden(candidate_members=["c", "a", "b"], phase_id="E1")
+        assert sd.is_forbidden(candidate_members=["a", "c", "x"], phase_id="E1") is expected
+        assert not sd.is_forbidden(candidate_members=["a", "c", "x"], phase_id="E2")
+        assert not sd.is_forbidden(candidate_members=["a", "x"], phase_id="E1")
+
+
+def test_pair_index_only_built_when_pairs_are_forbidden():
+    sd = SedimentDAG()
+    sd.add_node(members=["a", "b", "c"], mask={}, world_id="w", phase_id="E1", t=1, run_id="r")
+    sd.is_forbidden(candidate_members=["a", "c", "x"], phase_id="E1")
+    assert sd._pairs is None
+
+    # switching the flag on later indexes the existing nodes on first use
+    sd.forbid_pairs = True
+    assert sd.is_forbidden(candidate_members=["a", "c", "x"], phase_id="E1")
+    sd.add_node(members=["d", "e"], mask={}, world_id="w", phase_id="E1", t=2, run_id="r")
+    assert sd.is_forbidden(candidate_members=["e", "d", "y"], phase_id="E1")
@@ -0,0 +1,90 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from capitalmarket.capitalselector.sediment import SedimentDAG
+
+
+def _add(sd, members, t, run_id="r"):
+    return sd.add_node(members=members, mask={"mask_depth": 1}, world_id="w", phase_id="E1", t=t, run_id=run_id)
+
+
+def _lines(path: Path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_default_writes_every_event_through(tmp_path):
+    path = tmp_path / "sediment.jsonl"
+    sd = SedimentDAG(persist_path=path, truncate=True)
+    _add(sd, ["b", "a"], 1)
+    assert _lines(path) == [
+        {
+            "event": "SEDIMENT_NODE_ADDED",
+            "payload": {"node_id": 1, "members": ["a", "b"], "mask": {"mask_depth": 1}, "world_id": "w", "phase_id": "E1", "t": 1, "run_id": "r"},
+        }
+    ]
+    _add(sd, ["c", "d"], 2)
+    assert [e["event"] for e in _lines(path)] == ["SEDIMENT_NODE_ADDED", "SEDIMENT_NODE_ADDED", "SEDIMENT_EDGE_ADDED"]
+    assert _lines(path)[2]["payload"] == {"from": 1, "to": 2, "run_id": "r", "t": 2}
+    sd.close()
+
+
+def test_flush_every_and_explicit_flush(tmp_path):
+    path = tmp_path / "sediment.jsonl"
+    sd = SedimentDAG(persist_path=path, truncate=True, flush_every=4)
+    _add(sd, ["a", "b"], 1)
+    _add(sd, ["c", "d"], 2)  # node + edge: 3 events pending
+    assert path.read_text(encoding="utf-8") == ""
+    _add(sd, ["e", "f"], 3)  # reaches 4 -> flushed, 1 pending
+    assert len(_lines(path)) == 4
+    sd.flush()
+    assert len(_lines(path)) == 5
+    sd.close()
+
+
+def test_context_exit_flushes_and_reopens(tmp_path):
+    path = tmp_path / "sediment.jsonl"
+    with SedimentDAG(persist_path=path, truncate=True, flush_every=100, flush_interval_ms=60_000) as sd:
+        _add(sd, ["a", "b"], 1)
+        assert path.read_text(encoding="utf-8") == ""
+    assert len(_lines(path)) == 1
+    # closed logs reopen in append mode
+    _add(sd, ["c", "d"], 2)
+    sd.close()
+    assert len(_lines(path)) == 3
+
+
+def test_interval_zero_flushes_on_write(tmp_path):
+    path = tmp_path / "sediment.jsonl"
+    sd = SedimentDAG(persist_path=path, truncate=True, flush_every=100, flush_interval_ms=0)
+    _add(sd, ["a", "b"], 1)
+    assert len(_lines(path)) == 1
+    sd.close()
+
+
+def test_pending_events_flushed_at_exit(tmp_path):
+    path = tmp_path / "sediment.jsonl"
+    script = (
+        "from pathlib import Path\n"
+        "from capitalmarket.capitalselector.sediment import SedimentDAG\n"
+        f"sd = SedimentDAG(persist_path=Path({str(path)!r}), truncate=True, flush_every=1000)\n"
+        "sd.add_node(members=['a', 'b'], mask={}, world_id='w', phase_id='E1', t=1, run_id='r')\n"
+        "sd.add_node(members=['c', 'd'], mask={}, world_id='w', phase_id='E1', t=2, run_id='r')\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=Path(__file__).resolve().parents[1])
+    assert len(_lines(path)) == 3
+
+
+def test_interval_flushes_a_quiet_writer(tmp_path):
+    import time
+
+    path = tmp_path / "sediment.jsonl"
+    sd = SedimentDAG(persist_path=path, truncate=True, flush_every=100, flush_interval_ms=200)
+    _add(sd, ["a", "b"], 1)
+    assert path.read_text(encoding="utf-8") == ""
+    deadline = time.monotonic() + 5.0
+    while not path.read_text(encoding="utf-8") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(_lines(path)) == 1
+    sd.close()
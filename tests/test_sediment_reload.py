@@ -0,0 +1,102 @@
+import json
+
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.sediment import SedimentDAG
+
+
+def _fill(sd, n, start=0):
+    for k in range(start, start + n):
+        members = sorted({f"e{k % 7}", f"e{(3 * k + 1) % 7}", f"x{k}"})
+        mask = {"masked_members": members, "mask_depth": 1} if k % 3 else {"mask_depth": 2, "note": "ü"}
+        sd.add_node(members=members, mask=mask, world_id=f"w{k % 2}", phase_id=f"E{k % 3}", t=k, run_id=f"r{k % 4}")
+
+
+def _same(a: SedimentDAG, b: SedimentDAG):
+    assert a.nodes() == b.nodes()
+    assert [list(n.mask) for n in a.nodes()] == [list(n.mask) for n in b.nodes()]
+    assert a._next_node_id == b._next_node_id
+    assert a._last_node_id_by_run == b._last_node_id_by_run
+    assert a._exact == b._exact and a._pair_index() == b._pair_index()
+
+
+def test_load_replays_log(tmp_path):
+    path = tmp_path / "sediment.jsonl"
+    sd = SedimentDAG(persist_path=path, truncate=True)
+    _fill(sd, 20)
+    sd.close()
+
+    again = SedimentDAG.load(path, forbid_pairs=True)
+    _same(sd, again)
+    assert again.is_forbidden(candidate_members=sd.nodes()[3].members, phase_id=sd.nodes()[3].phase_id)
+
+    # new nodes continue the id sequence and the per-run chain
+    node_id = again.add_node(members=["a", "b"], mask={}, world_id="w", phase_id="E1", t=99, run_id="r1")
+    again.close()
+    assert node_id == 21
+    last = json.loads(path.read_text(encoding="utf-8").splitlines()[-1])
+    assert last == {"event": "SEDIMENT_EDGE_ADDED", "payload": {"from": sd._last_node_id_by_run["r1"], "to": 21, "run_id": "r1", "t": 99}}
+
+
+def test_snapshot_truncates_log_and_reloads(tmp_path):
+    path = tmp_path / "sediment.jsonl"
+    sd = SedimentDAG(persist_path=path, truncate=True)
+    _fill(sd, 30)
+    sd.snapshot()
+    assert path.read_text(encoding="utf-8") == ""
+    assert sd.snapshot_path.exists()
+    _fill(sd, 5, start=30)
+    sd.close()
+
+    again = SedimentDAG.load(path)
+    _same(sd, again)
+
+    with np.load(sd.snapshot_path, allow_pickle=False) as data:
+        # member ids are interned: 7 shared ids + one x-id per node
+        assert len(data["member_table"]) == 7 + 30
+        assert data["mask_members"].sum() == 20
+
+
+def test_snapshot_every_and_crash_between_snapshot_and_truncation(tmp_path):
+    path = tmp_path / "sediment.jsonl"
+    sd = SedimentDAG(persist_path=path, truncate=True, snapshot_every=8)
+    _fill(sd, 20)
+    sd.close()
+    assert len(path.read_text(encoding="utf-8").splitlines()) > 0
+    _same(sd, SedimentDAG.load(path))
+
+    # log still holding events the snapshot already covers
+    full = tmp_path / "full.jsonl"
+    ref = SedimentDAG(persist_path=full, truncate=True)
+    _fill(ref, 20)
+    ref.close()
+    path.write_text(full.read_text(encoding="utf-8"), encoding="utf-8")
+    _same(ref, SedimentDAG.load(path))
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = tmp_path / "sediment.jsonl"
+    sd = SedimentDAG(persist_path=path, truncate=True)
+    _fill(sd, 4)
+    sd.close()
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write('{"event": "SEDIMENT_NODE_ADDED", "payl')
+
+    again = SedimentDAG.load(path)
+    _same(sd, again)
+    again.add_node(members=["a", "b"], mask={}, world_id="w", phase_id="E1", t=5, run_id="r0")
+    again.close()
+    assert len(SedimentDAG.load(path).nodes()) == 5
+
+
+def test_truncate_drops_snapshot(tmp_path):
+    path = tmp_path / "sediment.jsonl"
+    sd = SedimentDAG(persist_path=path, truncate=True)
+    _fill(sd, 3)
+    sd.snapshot()
+    SedimentDAG(persist_path=path, truncate=True)
+    assert not sd.snapshot_path.exists()
+    assert SedimentDAG.load(path).nodes() == []
+    with pytest.raises(ValueError):
+        SedimentDAG.load(path, truncate=True)
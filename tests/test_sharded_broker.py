@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.broker import Broker, BrokerConfig
+from capitalmarket.capitalselector.sharded import ShardedBroker
+
+
+def _drive(broker, ids, steps, seed):
+    rng = np.random.default_rng(seed)
+    for step in range(steps):
+        sub = rng.permutation(len(ids))[: len(ids) - step % 7]
+        r = rng.normal(0.0, 0.3, size=len(sub))
+        broker.observe_batch([ids[i] for i in sub], r, 0.01, rng.random(len(sub)) > 0.01,
+                             rng.choice([0.5, 1.0, 2.0], size=len(sub)))
+        broker.observe(ids[step % len(ids)], 0.05, 0.0, True, 1.0)
+        pols = broker.decide_limits()
+        raw = {eid: 1.0 / len(ids) for eid in ids}
+        w = broker.apply_decorrelation_cap(broker.apply_policies(raw))
+        for eid, v in w.items():
+            if v > 0 and pols[eid].limit > 0:
+                broker.mark_funded(eid)
+    return w
+
+
+@pytest.mark.parametrize(
+    "cfg",
+    [
+        BrokerConfig(sigma_ref=0.3, base_min_interval=1.5, tau_corr=0.3),
+        BrokerConfig(tail_levels=(0.01, 0.1), tail_method="p2", tail_inhibit_levels=(0.01,), sigma_ref=0.05),
+    ],
+)
+def test_sharded_broker_matches_single_process(cfg, tmp_path):
+    ids = [f"e{i}" for i in range(50)]  # more rows than the initial capacity
+    single = Broker(cfg)
+    with ShardedBroker(cfg, n_shards=3) as sharded:
+        w_single = _drive(single, ids, 25, seed=0)
+        w_sharded = _drive(sharded, ids, 25, seed=0)
+        assert w_sharded == w_single
+
+        a, b = single.state_dict(), sharded.state_dict()
+        assert a.keys() == b.keys()
+        for key in a:
+            np.testing.assert_array_equal(a[key], b[key], err_msg=key)
+        assert sharded.metric_snapshot() == single.metric_snapshot()
+        assert sharded.eligible_ids() == single.eligible_ids()
+
+        sharded.save(tmp_path / "sharded.npz")
+    restored = Broker.load(tmp_path / "sharded.npz")
+    assert restored.state_dict().keys() == a.keys()
+    with ShardedBroker.load(tmp_path / "sharded.npz", n_shards=2) as resumed:
+        assert _drive(resumed, ids, 5, seed=1) == _drive(restored, ids, 5, seed=1)
+
+
+def test_closed_sharded_broker_keeps_readable_columns():
+    sharded = ShardedBroker(n_shards=2)
+    sharded.observe_batch(["a", "b", "c"], [0.1, 0.2, 0.3], 0.0, True)
+    sharded.close()
+    assert sharded.column("last_r").tolist() == [0.1, 0.2, 0.3]
+    with pytest.raises(RuntimeError):
+        sharded.observe("a", 0.1, 0.0, True, 1.0)
+    sharded.close()
+
+
+def test_closed_sharded_broker_allocates_no_shared_memory():
+    sharded = ShardedBroker(n_shards=2)
+    sharded.close()
+    with pytest.raises(RuntimeError):
+        sharded.observe_batch([f"e{i}" for i in range(40)], 0.1, 0.0, True)
+    assert not sharded._blocks
+
+
+def test_buffered_scalar_observes_match_broker():
+    cfg = BrokerConfig(tail_levels=(0.05,), sigma_ref=0.1)
+    single = Broker(cfg)
+    rng = np.random.default_rng(3)
+    calls = [(f"e{rng.integers(6)}", *rng.normal(0.0, 0.2, size=2), bool(rng.random() > 0.05), 0.5) for _ in range(210)]
+    with ShardedBroker(cfg, n_shards=3) as sharded:
+        for broker in (single, sharded):
+            for k, call in enumerate(calls):
+                broker.observe(*call)
+                if k % 50 == 49:
+                    broker.update_correlations(broker.ids)
+                    broker.decide_limits()
+        assert len(sharded._pending) > 0
+        a, b = single.state_dict(), sharded.state_dict()
+        assert not sharded._pending
+        for key in a:
+            np.testing.assert_array_equal(a[key], b[key], err_msg=key)
+        assert sharded.metric_snapshot() == single.metric_snapshot()
@@ -0,0 +1,101 @@
+import numpy as np
+
+from capitalmarket.capitalselector.channels import DeterministicExplorer
+from capitalmarket.capitalselector import stack as stack_mod
+from capitalmarket.capitalselector.stack import StackChannel, StackConfig, StackManager
+
+
+def _stack(r, cfg=None, sid="stack"):
+    members = {f"{sid}_a": DeterministicExplorer(r=r), f"{sid}_b": DeterministicExplorer(r=r)}
+    return StackChannel(members, cfg=cfg or StackConfig(C_agg=0.0), stack_id=sid)
+
+
+def test_stable_mask_matches_stable():
+    rng = np.random.default_rng(0)
+    mgr = StackManager()
+    stacks = []
+    for k in range(64):
+        # distinct but equal-valued configs, plus mixed thresholds per row
+        use_cvar = k % 2 == 0
+        cfg = StackConfig(tau_mu=0.0, tau_vol=0.5, tau_cvar=-0.2, tau_dd=0.3 if k % 3 else 0.1, use_cvar=use_cvar)
+        st = _stack(0.0, cfg=cfg, sid=f"s{k}")
+        mgr.stacks[st.stack_id] = st
+        st._mu = float(rng.normal(0.0, 0.1))
+        st._var = float(rng.choice([-0.01, 0.1, 0.3, np.nan]))
+        st._dd_max = float(rng.uniform(0.0, 0.5))
+        st._cvar = float(rng.normal(-0.2, 0.1))
+        st._alive = bool(rng.random() < 0.9)
+        stacks.append(st)
+    assert mgr.bank.stable_mask().tolist() == [st.stable() for st in stacks]
+
+
+def test_rows_follow_stacks_in_and_out():
+    mgr = StackManager()
+    a, b = _stack(0.1, sid="a"), _stack(0.2, sid="b")
+    mgr.stacks["a"] = a
+    mgr.stacks["b"] = b
+    a.step(1.0)
+    assert mgr.bank.column("mu")[a._bank_row] == a._mu != 0.0
+    assert mgr.bank.column("size").tolist() == [2, 2]
+
+    mu = a._mu
+    del mgr.stacks["a"]
+    assert a._bank is None and a._mu == mu and len(mgr.bank) == 1
+    # the freed row is reused
+    c = _stack(0.3, sid="c")
+    mgr.stacks["c"] = c
+    assert c._bank_row == 0 and c._mu == 0.0
+
+
+def _manager(rs, cfg):
+    mgr = StackManager(cfg)
+    channels = {}
+    for k, r in enumerate(rs):
+        sid = f"stack_{k}"
+        mgr.stacks[sid] = channels[sid] = _stack(r, cfg=cfg, sid=sid)
+    return mgr, channels
+
+
+def test_maintain_dissolves_only_unstable_in_order(monkeypatch):
+    cfg = StackConfig(C_agg=0.0, tau_mu=0.0)
+    for cutoff in (1, 1000):  # StackBank mask and per-stack stability check
+        monkeypatch.setattr(stack_mod, "_BANK_MIN_STACKS", cutoff)
+        mgr, channels = _manager([0.1, -0.1, 0.2, -0.3, 0.1], cfg)
+        # re-inserting a stack under its id keeps its place in formation order
+        mgr.stacks["stack_1"] = channels["stack_1"] = _stack(-0.1, cfg=cfg, sid="stack_1")
+        mgr.step_stacks({sid: 1.0 for sid in mgr.stacks})
+
+        events = []
+        mgr._emit = lambda t, event_type, subject_id, **attrs: events.append(subject_id)
+        mgr.maintain(channels)
+
+        assert events == ["stack_1", "stack_3"]
+        assert list(mgr.stacks) == ["stack_0", "stack_2", "stack_4"]
+        assert "stack_1_a" in channels and "stack_1" not in channels
+        assert len(mgr.bank) == 3
+
+
+def test_bank_update_matches_standalone_stacks(monkeypatch):
+    from capitalmarket.capitalselector.channels import GaussianExplorer
+
+    monkeypatch.setattr(stack_mod, "_UPDATE_MIN_STACKS", 1)
+    cfg = StackConfig(C_agg=0.001, min_size=1)
+
+    def stacks():
+        return {
+            f"stack_{s}": StackChannel(
+                {f"s{s}e{k}": GaussianExplorer(mu=0.01 * (k - 1), sigma=0.05, seed=10 * s + k) for k in range(3)},
+                cfg=cfg,
+                stack_id=f"stack_{s}",
+            )
+            for s in range(5)
+        }
+
+    mgr = StackManager(cfg)
+    mgr.stacks.update(stacks())
+    alone = stacks()
+    for t in range(50):
+        assert mgr.step_stacks({sid: 1.0 for sid in alone}) == {sid: st.step(1.0) for sid, st in alone.items()}
+    for sid, st in alone.items():
+        assert mgr.stacks[sid].state() == st.state()
+        assert mgr.stacks[sid]._dd_val == st._dd_val and mgr.stacks[sid]._dd_peak == st._dd_peak
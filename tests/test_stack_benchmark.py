@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.channels import DeterministicExplorer, DeterministicExplorerBank
+from capitalmarket.capitalselector.stack import StackChannel, StackConfig, StackManager
+
+
+def _manager(n_stacks: int, size: int, bank: DeterministicExplorerBank | None) -> StackManager:
+    mgr = StackManager(StackConfig(C_agg=0.001, min_size=1))
+    for s in range(n_stacks):
+        members = {}
+        for k in range(size):
+            row = s * size + k
+            members[f"s{s}e{k}"] = bank.member(row) if bank is not None else DeterministicExplorer(r=0.01 * (row % 5), c=0.001)
+        mgr.stacks[f"stack_{s}"] = StackChannel(members, cfg=mgr.stack_cfg, stack_id=f"stack_{s}")
+    return mgr
+
+
+def _best_of(fn, repeats: int = 7, steps: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for _ in range(steps):
+            fn()
+        best = min(best, time.perf_counter() - t0)
+    return best / steps
+
+
+@pytest.mark.skipif(os.environ.get("CAPM_BENCHMARK") != "1", reason="Set CAPM_BENCHMARK=1 to run")
+def test_banked_step_stacks_benchmark_optional():
+    n_stacks, size = 500, 3
+    rows = np.arange(n_stacks * size)
+    bank = DeterministicExplorerBank(0.01 * (rows % 5), c=0.001)
+    loop = _manager(n_stacks, size, None)
+    batched = _manager(n_stacks, size, bank)
+    weights = {sid: 1.0 for sid in loop.stacks}
+
+    assert batched.step_stacks(weights) == {sid: st.step(1.0) for sid, st in loop.stacks.items()}
+
+    loop_time = _best_of(lambda: [st.step(1.0) for st in loop.stacks.values()])
+    batched_time = _best_of(lambda: batched.step_stacks(weights))
+
+    print(f"per-stack step: {loop_time * 1e3:.3f}ms")
+    print(f"banked step_stacks: {batched_time * 1e3:.3f}ms")
+    print(f"Speedup: {loop_time / batched_time:.2f}x")
+
+    assert batched_time < loop_time
+
+
+def _maintain_manager(n_stacks: int) -> tuple[StackManager, dict]:
+    mgr = StackManager(StackConfig(tau_mu=-1.0))
+    channels = {}
+    for s in range(n_stacks):
+        members = {f"s{s}e{k}": DeterministicExplorer(r=0.01) for k in range(2)}
+        # one cfg object per stack (equal values)
+        mgr.stacks[f"stack_{s}"] = channels[f"stack_{s}"] = StackChannel(members, cfg=StackConfig(tau_mu=-1.0))
+    return mgr, channels
+
+
+@pytest.mark.skipif(os.environ.get("CAPM_BENCHMARK") != "1", reason="Set CAPM_BENCHMARK=1 to run")
+def test_maintain_stable_mask_benchmark_optional(monkeypatch):
+    """Crossover behind _BANK_MIN_STACKS: per-stack stable() vs one StackBank mask."""
+    from capitalmarket.capitalselector import stack as stack_mod
+
+    cutoff = stack_mod._BANK_MIN_STACKS
+    times = {}
+    for n_stacks in (4, 8, 16, 32, 64, 128, 512):
+        mgr, channels = _maintain_manager(n_stacks)
+        monkeypatch.setattr(stack_mod, "_BANK_MIN_STACKS", 10**9)
+        loop_time = _best_of(lambda: mgr.maintain(channels), steps=200)
+        monkeypatch.setattr(stack_mod, "_BANK_MIN_STACKS", 1)
+        mask_time = _best_of(lambda: mgr.maintain(channels), steps=200)
+        times[n_stacks] = (loop_time, mask_time)
+        print(f"{n_stacks} stacks: stable() loop {loop_time * 1e6:.1f}us, mask {mask_time * 1e6:.1f}us")
+
+    assert all(mask < loop for n, (loop, mask) in times.items() if n >= 2 * cutoff)
+
+
+@pytest.mark.skipif(os.environ.get("CAPM_BENCHMARK") != "1", reason="Set CAPM_BENCHMARK=1 to run")
+def test_step_stacks_crossover_benchmark_optional(monkeypatch):
+    """Crossovers behind _UPDATE_MIN_STACKS (statistics) and _ROWS_MIN_STACKS (banked members)."""
+    from capitalmarket.capitalselector import stack as stack_mod
+
+    for name in ("_UPDATE_MIN_STACKS", "_ROWS_MIN_STACKS"):
+        cutoff = getattr(stack_mod, name)
+        times = {}
+        for n_stacks in (4, 8, 16, 32, 64, 256):
+            rows = np.arange(n_stacks * 3)
+            bank = DeterministicExplorerBank(0.01 * (rows % 5), c=0.001)
+            mgr = _manager(n_stacks, 3, bank if name == "_ROWS_MIN_STACKS" else None)
+            weights = {sid: 1.0 for sid in mgr.stacks}
+            monkeypatch.setattr(stack_mod, name, 10**9)
+            loop_time = _best_of(lambda: mgr.step_stacks(weights), steps=100)
+            monkeypatch.setattr(stack_mod, name, 1)
+            batched_time = _best_of(lambda: mgr.step_stacks(weights), steps=100)
+            times[n_stacks] = (loop_time, batched_time)
+            print(f"{name} {n_stacks} stacks: per stack {loop_time * 1e6:.1f}us, batched {batched_time * 1e6:.1f}us")
+
+        assert all(batched < loop for n, (loop, batched) in times.items() if n >= 2 * cutoff)
@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.broker import PhaseCChannel
+from capitalmarket.capitalselector.channels import DeterministicExplorer, DeterministicExplorerBank, GaussianExplorer
+from capitalmarket.capitalselector import stack as stack_mod
+from capitalmarket.capitalselector.stack import StackChannel, StackConfig, StackManager
+
+
+class _Recorder(PhaseCChannel):
+    """Scalar-only member that records the weights it receives."""
+
+    def __init__(self, r: float, die_at: int = -1):
+        self.r = r
+        self.die_at = die_at
+        self.t = 0
+        self.weights = []
+
+    def step(self, weight: float):
+        self.weights.append(weight)
+        self.t += 1
+        return self.r * weight, 0.0, self.t != self.die_at, 1.0
+
+
+def test_bank_rows_step_like_deterministic_explorers():
+    r, c, dt = [0.1, -0.2, 0.3, 0.4], [0.01, 0.0, 0.03, 0.02], [1.0, 2.0, 0.5, 1.5]
+    bank = DeterministicExplorerBank(r, c=c, dt=dt)
+    ref = [DeterministicExplorer(r=r[k], c=c[k], dt=dt[k]) for k in range(4)]
+    bank.alive[2] = False
+    ref[2].alive = False
+    w = np.array([0.5, 0.25, 1.0, 2.0])
+
+    rows = bank.step_rows(np.arange(4), w)
+    expected = [ch.step(float(wk)) for ch, wk in zip(ref, w)]
+    assert [bank.member(k).step(float(w[k])) for k in range(4)] == expected
+    assert list(zip(*(col.tolist() for col in rows))) == expected
+
+
+def test_mixed_members_step_in_member_order():
+    members = {
+        "a": DeterministicExplorer(r=1.0, c=0.1),
+        "b": _Recorder(r=2.0),
+        "c": DeterministicExplorer(r=3.0, c=0.2),
+    }
+    stack = StackChannel(members, cfg=StackConfig(C_agg=0.0, min_size=1))
+    r, c, alive, dt = stack.step(3.0)
+    assert r == sum([1.0 * 1.0, 2.0 * 1.0, 3.0 * 1.0])
+    assert c == sum([0.1 * 1.0, 0.0, 0.2 * 1.0])
+    assert alive and dt == 1.0
+    assert list(stack.members) == ["a", "b", "c"]
+
+
+def test_dead_members_are_compacted_once_per_step():
+    rec = {eid: _Recorder(r=1.0, die_at=1 if eid == "a" else -1) for eid in "abc"}
+    stack = StackChannel(rec, cfg=StackConfig(C_agg=0.0, min_size=2))
+
+    r, _, alive, _ = stack.step(3.0)
+    # every member of the step is funded with the same internal weight
+    assert [rec[eid].weights for eid in "abc"] == [[1.0], [1.0], [1.0]]
+    assert r == 3.0 and alive
+    assert list(stack.members) == ["b", "c"]
+    assert stack._w_internal == {"b": 0.5, "c": 0.5}
+
+    stack.step(3.0)
+    assert rec["b"].weights[-1] == 1.5
+
+
+def test_stack_dies_below_min_size():
+    rec = {eid: _Recorder(r=1.0, die_at=1 if eid != "c" else -1) for eid in "abc"}
+    stack = StackChannel(rec, cfg=StackConfig(C_agg=0.0, min_size=2))
+    _, _, alive, _ = stack.step(1.0)
+    assert not alive
+    assert stack.step(1.0) == (0.0, 0.0, False, stack._dt)
+
+
+def _gaussian_stacks(mgr):
+    for s in range(3):
+        members = {f"s{s}e{k}": GaussianExplorer(mu=0.01 * k, sigma=0.05, alive_prob=0.97, seed=10 * s + k) for k in range(3)}
+        mgr.stacks[f"stack_{s}"] = StackChannel(members, cfg=mgr.stack_cfg, stack_id=f"stack_{s}")
+
+
+@pytest.mark.parametrize("update_cutoff", [1, 1000])  # StackBank.update and row by row
+def test_step_stacks_matches_per_stack_step(update_cutoff, monkeypatch):
+    monkeypatch.setattr(stack_mod, "_UPDATE_MIN_STACKS", update_cutoff)
+    cfg = StackConfig(C_agg=0.001, min_size=2)
+    batched, single = StackManager(cfg), StackManager(cfg)
+    _gaussian_stacks(batched)
+    _gaussian_stacks(single)
+
+    for t in range(60):
+        weights = {sid: 0.2 + 0.1 * k + 0.01 * t for k, sid in enumerate(single.stacks)}
+        out = batched.step_stacks(weights)
+        ref = {sid: single.stacks[sid].step(w) for sid, w in weights.items()}
+        assert out == ref
+        assert list(out) == list(weights)
+
+    for sid, st in single.stacks.items():
+        other = batched.stacks[sid]
+        assert list(other.members) == list(st.members)
+        for name in ("_mu", "_var", "_dd_peak", "_dd_val", "_dd_max", "_cvar", "_dt", "_alive"):
+            assert getattr(other, name) == getattr(st, name)
+
+
+def _deterministic_stacks(mgr, sizes, bank=None):
+    row = 0
+    for s, n in enumerate(sizes):
+        members = {}
+        for k in range(n):
+            r, c, dt = 0.01 * (row % 7) - 0.02, 0.001 * (row % 3), 1.0 + 0.1 * (row % 5)
+            members[f"s{s}e{k}"] = bank.member(row) if bank is not None else DeterministicExplorer(r=r, c=c, dt=dt)
+            row += 1
+        mgr.stacks[f"stack_{s}"] = StackChannel(members, cfg=mgr.stack_cfg, stack_id=f"stack_{s}")
+    return row
+
+
+# small stacks only, and some with many members
+@pytest.mark.parametrize("sizes", [[2, 3, 5, 4, 2, 3], [2, 3, 5, 9, 3, 17, 4, 2]])
+def test_banked_step_stacks_matches_scalar_stacks(sizes, monkeypatch):
+    monkeypatch.setattr(stack_mod, "_ROWS_MIN_STACKS", 1)
+    monkeypatch.setattr(stack_mod, "_UPDATE_MIN_STACKS", 1)
+    cfg = StackConfig(C_agg=0.001, min_size=2)
+    scalar, banked = StackManager(cfg), StackManager(cfg)
+    n = _deterministic_stacks(scalar, sizes)
+    rows = np.arange(n)
+    bank = DeterministicExplorerBank(0.01 * (rows % 7) - 0.02, c=0.001 * (rows % 3), dt=1.0 + 0.1 * (rows % 5))
+    _deterministic_stacks(banked, sizes, bank)
+    ref_channels = [ch for st in scalar.stacks.values() for ch in st._channels]
+
+    for t in range(40):
+        if t in (5, 12, 20):
+            # members die between steps: row t in the bank, same explorer in the scalar run
+            bank.alive[3 * t % n] = False
+            ref_channels[3 * t % n].alive = False
+        weights = {sid: 0.2 + 0.1 * k + 0.01 * t for k, sid in enumerate(scalar.stacks)}
+        ref = {sid: scalar.stacks[sid].step(w) for sid, w in weights.items()}
+        assert banked.step_stacks(weights) == ref
+
+    for sid, st in scalar.stacks.items():
+        assert banked.stacks[sid].step(0.7) == st.step(0.7)
+    for sid, st in scalar.stacks.items():
+        other = banked.stacks[sid]
+        assert list(other.members) == list(st.members)
+        for name in ("_mu", "_var", "_dd_peak", "_dd_val", "_dd_max", "_cvar", "_dt", "_alive"):
+            assert getattr(other, name) == getattr(st, name)
@@ -0,0 +1,129 @@
+import numpy as np
+
+from capitalmarket.capitalselector.broker import Broker, CorrelationGraph
+from capitalmarket.capitalselector.channels import DeterministicExplorer
+from capitalmarket.capitalselector.stack import StackFormationThresholds, StackManager
+
+
+def _observe_groups(broker, ids, rng, groups=4):
+    """Explorers in the same group share a return factor."""
+    factors = rng.normal(0.0, 0.1, size=groups)
+    r = factors[np.arange(len(ids)) % groups] + rng.normal(0.0, 0.05, size=len(ids))
+    broker.observe_batch(ids, r, 0.0, True)
+
+
+def _legacy_subsets(broker, cand, th):
+    """Pairwise-rho greedy of the original try_form_stack, for every seed."""
+    out = []
+    for seed in cand:
+        chosen = []
+        for eid in [seed] + [x for x in cand if x != seed]:
+            if not chosen:
+                chosen.append(eid)
+                continue
+            if all(abs(broker.rho(eid, other)) <= th.tau_corr for other in chosen):
+                chosen.append(eid)
+            if len(chosen) >= th.max_size:
+                break
+        out.append(chosen)
+    return out
+
+
+def test_incremental_graph_matches_rebuild():
+    broker = Broker()
+    ids = [f"e{i}" for i in range(24)]
+    rng = np.random.default_rng(0)
+    graph = CorrelationGraph(0.3)
+    for step in range(60):
+        _observe_groups(broker, ids[: 12 + step % 12], rng)
+        broker.update_correlations(rng.permutation(ids)[: 6 + step % 10].tolist())
+        if step == 30:
+            broker.drop_correlations(ids[:3])
+        graph.sync(broker)
+        fresh = CorrelationGraph(0.3)
+        fresh.sync(broker)
+        assert graph.ids == fresh.ids
+        assert np.array_equal(graph.adjacency, fresh.adjacency)
+
+    rho = broker.rho_matrix(graph.ids)
+    expected = ~(np.abs(rho) > 0.3)
+    np.fill_diagonal(expected, False)
+    assert np.array_equal(graph.adjacency, expected)
+    assert not expected.all()
+
+
+def test_only_rho_changes_bump_the_correlation_epoch():
+    broker = Broker()
+    broker.observe_batch(["a", "b", "c"], [0.1, 0.2, 0.3], 0.0, True)
+    broker.update_correlations(["a", "b"])
+    epoch = broker.correlation_epoch
+    broker.observe("c", 0.5, 0.0, True, 1.0)
+    broker.observe_batch(["c"], [0.4], 0.0, True)
+    assert broker.correlation_epoch == epoch
+    broker.observe("a", 0.5, 0.0, True, 1.0)
+    assert broker.correlation_epoch > epoch
+    epoch = broker.correlation_epoch
+    broker.observe_batch(["b", "c"], [0.4, 0.1], 0.0, True)
+    assert broker.correlation_epoch > epoch
+    assert broker.column("touched")[2] < broker.correlation_epoch
+
+    restored = Broker.from_state_dict(broker.state_dict())
+    assert restored.column("corr_active").tolist() == [True, True, False]
+
+
+def test_bitset_subsets_match_pairwise_greedy():
+    th = StackFormationThresholds(tau_mu=-1.0, tau_corr=0.3, min_size=2, max_size=4, tau_surv=0.0)
+    mgr = StackManager(thresholds=th)
+    broker = Broker()
+    ids = [f"e{i}" for i in range(16)]
+    rng = np.random.default_rng(1)
+    for _ in range(80):
+        _observe_groups(broker, ids, rng)
+        broker.update_correlations(ids)
+
+    extra = ["never-observed"]
+    cand = ids + extra
+    broker.observe("never-observed", 0.01, 0.0, True, 1.0)
+    mgr._corr_graph = CorrelationGraph(th.tau_corr)
+    mgr._corr_graph.sync(broker)
+    compatible = mgr._corr_graph.compatible(cand)
+    expected = _legacy_subsets(broker, cand, th)
+    for seed, legacy in enumerate(expected):
+        chosen = [seed]
+        allowed = compatible[seed].copy()
+        for k in range(len(cand)):
+            if allowed[k] and len(chosen) < th.max_size:
+                chosen.append(k)
+                allowed &= compatible[k]
+        assert [cand[k] for k in chosen] == legacy
+
+
+def test_try_form_stacks_forms_disjoint_stacks():
+    th = StackFormationThresholds(tau_mu=-1.0, tau_corr=0.3, min_size=2, max_size=4, tau_surv=0.0)
+    broker = Broker()
+    ids = [f"e{i}" for i in range(16)]
+    rng = np.random.default_rng(2)
+    for _ in range(80):
+        _observe_groups(broker, ids, rng)
+        broker.update_correlations(ids)
+
+    one = StackManager(thresholds=th)
+    channels = {eid: DeterministicExplorer(r=0.01) for eid in ids}
+    first = one.try_form_stack(broker, channels)
+
+    many = StackManager(thresholds=th)
+    channels = {eid: DeterministicExplorer(r=0.01) for eid in ids}
+    formed = many.try_form_stacks(broker, channels)
+    assert formed[0] == first
+    assert list(many.stacks[formed[0]].members) == list(one.stacks[first].members)
+    assert len(formed) >= 3
+
+    members = [eid for sid in formed for eid in many.stacks[sid].members]
+    assert len(members) == len(set(members))
+    for sid in formed:
+        group = list(many.stacks[sid].members)
+        assert sid in channels and not set(group) & set(channels)
+        rho = broker.rho_matrix(group)
+        np.fill_diagonal(rho, 0.0)
+        assert np.all(np.abs(rho) <= th.tau_corr)
+    assert many.try_form_stacks(broker, channels, max_stacks=0) == []
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from capitalmarket.capitalselector.interfaces import iter_world, iter_world_blocks, validate_world_output
+from capitalmarket.capitalselector.worlds import (
+    AdversarialPhaseShiftBanditWorld,
+    DeterministicClusterWorld,
+    DeterministicScriptWorld,
+    FlipClusterWorld,
+    MarginalMatchedControlWorld,
+    NonStationaryVolatilityBanditWorld,
+    RegimeSwitchBanditWorld,
+    RuinRegimeBanditWorld,
+    ShuffledRegimeBanditWorld,
+    SubsetRegimeBanditWorld,
+    VolatilityRegimeBanditWorld,
+)
+from capitalmarket.capitalselector.worlds.regime_switch_bandit_world import (
+    _generate_regime_sequence,
+    _generate_shock_sequence,
+)
+
+T = 120
+SEQ = _generate_regime_sequence(p=0.05, seed=3, length=T)
+NOISE = np.random.default_rng(9).normal(0.0, 0.01, size=(T, 5))
+SHOCKS = _generate_shock_sequence(q=0.1, seed=1, length=T)
+
+WORLDS = {
+    "script": lambda: DeterministicScriptWorld(c=0.01),
+    "cluster": lambda: DeterministicClusterWorld(),
+    "flip": lambda: FlipClusterWorld(flip_time=60, shock_start=30, shock_end=40),
+    "regime": lambda: RegimeSwitchBanditWorld(seed=1),
+    "regime_costs": lambda: RegimeSwitchBanditWorld(seed=1, q=0.2, c_high=0.01, shock_times={3, 50}, shock_size=0.5),
+    "regime_seq": lambda: RegimeSwitchBanditWorld(seed=1, regime_sequence=SEQ, shock_sequence=SHOCKS),
+    "regime_noise": lambda: RegimeSwitchBanditWorld(seed=1, noise_sequence=NOISE, c_high=0.01),
+    "ruin": lambda: RuinRegimeBanditWorld(seed=4),
+    "marginal": lambda: MarginalMatchedControlWorld(seed=5),
+    "subset_seq": lambda: SubsetRegimeBanditWorld(seed=6, regime_sequence=SEQ),
+    "volatility": lambda: VolatilityRegimeBanditWorld(seed=7),
+    "volatility_seq": lambda: VolatilityRegimeBanditWorld(seed=7, regime_sequence=SEQ),
+    "drift_up": lambda: NonStationaryVolatilityBanditWorld(seed=8, volatility_mode="drift_up", horizon=T),
+    "asym_drift_seq": lambda: NonStationaryVolatilityBanditWorld(
+        seed=8, volatility_mode="asym_drift", horizon=T, regime_sequence=SEQ
+    ),
+    "adversarial": lambda: AdversarialPhaseShiftBanditWorld(seed=9, p=0.05, horizon=T),
+    "adversarial_seq": lambda: AdversarialPhaseShiftBanditWorld(seed=9, horizon=T, regime_sequence=SEQ),
+    "shuffled": lambda: ShuffledRegimeBanditWorld(seed=1, regime_sequence=SEQ, noise_sequence=NOISE),
+}
+
+
+@pytest.mark.parametrize("name", sorted(WORLDS))
+def test_step_block_matches_sequential_steps(name):
+    seq_world, block_world = WORLDS[name](), WORLDS[name]()
+    ref = [validate_world_output(seq_world.step(t)) for t in range(T)]
+
+    blocks = [block_world.step_block(t0, t1 - t0) for t0, t1 in ((0, 1), (1, 45), (45, 45), (45, T))]
+    R = np.concatenate([b[0] for b in blocks])
+    C = np.concatenate([b[1] for b in blocks])
+
+    np.testing.assert_array_equal(R, np.stack([r for r, _ in ref]))
+    np.testing.assert_array_equal(C, np.array([c for _, c in ref]))
+
+
+def test_iter_world_falls_back_to_step():
+    class _StepOnly:
+        def step(self, t):
+            return {"r": [float(t), 0.0], "c": 0.5}
+
+    out = list(iter_world(_StepOnly(), 2, 5))
+    assert [t for t, _, _ in out] == [2, 3, 4]
+    np.testing.assert_array_equal(out[-1][1], [4.0, 0.0])
+
+
+def test_iter_world_blocks_splits_where_r_changes_length():
+    class _StepOnly:
+        def step(self, t):
+            return {"r": [float(t)] * (2 if t < 4 else 3), "c": 0.5}
+
+    out = list(iter_world_blocks(_StepOnly(), 1, 9, block=3))
+    assert [(b0, R.shape) for b0, R, _ in out] == [(1, (3, 2)), (4, (3, 3)), (7, (2, 3))]
+    np.testing.assert_array_equal(out[-1][1][:, 0], [7.0, 8.0])
+
+    world = WORLDS["regime"]()
+    blocks = list(iter_world_blocks(WORLDS["regime"](), 0, T, block=40))
+    assert [b0 for b0, _, _ in blocks] == list(range(0, T, 40))
+    ref = list(iter_world(world, 0, T))
+    np.testing.assert_array_equal(np.concatenate([R for _, R, _ in blocks]), np.stack([r for _, r, _ in ref]))
+
+
+def test_block_sampler_requires_sigma_block():
+    from dataclasses import dataclass
+
+    from capitalmarket.capitalselector.worlds.regime_switch_bandit_world import _RegimeBlockSampler
+
+    @dataclass
+    class NoSigmaWorld(_RegimeBlockSampler):
+        p: float = 0.05
+
+    with pytest.raises(TypeError):
+        NoSigmaWorld()